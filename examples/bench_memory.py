@@ -0,0 +1,73 @@
+"""Paměťový benchmark: kolik bajtů stojí uzel a hrana v Canvas.
+
+Staví stejnou topologii jako stress.py (preferential attachment, stejný
+seed i meta uzlů) a přes tracemalloc měří přírůstek alokací po vložení
+uzlů a po vložení hran. Pending delty se před měřením vydrénují – počítá
+se jen trvalý stav grafu.
+
+Použití:
+    python examples/bench_memory.py            # 100k uzlů
+    python examples/bench_memory.py 1000000    # 1M uzlů
+"""
+import random
+import sys
+import tracemalloc
+from collections import Counter
+
+import viewbase as vb
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+M = 2
+
+
+def topology(n: int, m: int) -> tuple[Counter, set]:
+    """Hrany a stupně modelem preferential attachment (jako stress.py)."""
+    random.seed(42)
+    edges = set()
+    pool = []
+    seed = m + 1
+    for i in range(seed):
+        for j in range(i + 1, seed):
+            edges.add((i, j))
+            pool += [i, j]
+    for new in range(seed, n):
+        chosen = set()
+        while len(chosen) < m:
+            chosen.add(random.choice(pool))
+        for t in chosen:
+            edges.add((min(new, t), max(new, t)))
+            pool += [new, t]
+    degree = Counter()
+    for a, b in edges:
+        degree[a] += 1
+        degree[b] += 1
+    return degree, edges
+
+
+def main() -> None:
+    degree, edges = topology(N, M)
+    canvas = vb.Canvas(title="bench")
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    with canvas.batch():
+        for i in range(N):
+            canvas.add_node(f"n{i}", degree=degree[i], size=1.0,
+                            color="#3a7bd6")
+    canvas.drain()
+    after_nodes = tracemalloc.get_traced_memory()[0]
+    with canvas.batch():
+        for a, b in edges:
+            canvas.add_edge(f"n{a}", f"n{b}")
+    canvas.drain()
+    after_edges = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    per_node = (after_nodes - base) / N
+    per_edge = (after_edges - after_nodes) / len(edges)
+    print(f"{N} uzlů, {len(edges)} hran")
+    print(f"  uzel: {per_node:8.1f} B   (celkem {(after_nodes - base) / 2**20:.1f} MiB)")
+    print(f"  hrana: {per_edge:7.1f} B   (celkem {(after_edges - after_nodes) / 2**20:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
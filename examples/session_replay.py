@@ -0,0 +1,39 @@
+"""Přehraj nahranou relaci (vb.Recorder) s převíjením a zrychlením.
+
+Nahrávání v libovolném skriptu:
+    recorder = vb.Recorder(canvas, "relace.jsonl", keyframe_every=60)
+
+Spuštění:
+    python examples/session_replay.py relace.jsonl --seek 2820 --speed 4
+"""
+import argparse
+import os
+import sys
+import threading
+
+import viewbase as vb
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Přehrání záznamu relace")
+    parser.add_argument("recording", help="cesta k záznamu (vb.Recorder)")
+    parser.add_argument("--seek", type=float, default=0.0,
+                        help="začni od času v sekundách (default 0)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="násobek rychlosti přehrávání (default 1.0)")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.recording):
+        sys.exit(f"Soubor '{args.recording}' neexistuje.")
+    replay = vb.Replay(args.recording)
+    replay.seek(args.seek)          # nejbližší keyframe + zbytek intervalu
+    print(f"Záznam {replay.duration:.0f} s, start v {replay.position:.0f} s")
+
+    threading.Thread(target=replay.play, kwargs={"speed": args.speed},
+                     daemon=True).start()
+    vb.serve(replay.canvas, port=args.port, open_browser=True)
+
+
+if __name__ == "__main__":
+    main()
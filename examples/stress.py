@@ -6,6 +6,7 @@ k několika existujícím s pravděpodobností úměrnou jejich stupni, takže
 vznikají přirozené huby jako v reálných sítích.
 
 Velikost a barva uzlu = stupeň (počet spojení): huby jsou velké a teplé.
+Stupeň drží canvas sám (track_metrics) – platí i po změnách hran.
 
 Použití:
     python examples/stress.py            # 3000 uzlů
@@ -14,7 +15,6 @@ Použití:
 import math
 import random
 import sys
-from collections import Counter
 
 import viewbase as vb
 
@@ -38,30 +38,27 @@ for new in range(seed, N):
         edges.add((min(new, t), max(new, t)))
         pool += [new, t]
 
-degree = Counter()
-for a, b in edges:
-    degree[a] += 1
-    degree[b] += 1
-max_deg = max(degree.values())
-print(f"Generuji {N} uzlů, {len(edges)} hran (max stupeň {max_deg}).")
+print(f"Generuji {N} uzlů, {len(edges)} hran.")
+SCALE = M * math.sqrt(N)    # největší hub BA modelu má stupeň řádově m·√N
 
 
-def styl(deg: int):
-    norm = math.sqrt(deg / max_deg)           # odmocnina kvůli širokému rozsahu
+def styl(meta: dict) -> dict:
+    """Styl z odvozeného stupně – canvas ho zavolá při každé jeho změně."""
+    norm = min(1.0, math.sqrt(meta["degree"] / SCALE))  # odmocnina: široký rozsah
     size = round(0.5 + 2.8 * norm, 2)
     color = "#{:02x}{:02x}{:02x}".format(
         round(0x3a + (0xff - 0x3a) * norm),
         round(0x7b + (0x52 - 0x7b) * norm),
         round(0xd6 + (0x3a - 0xd6) * norm))
-    return size, color
+    return {"size": size, "color": color}
 
 
 canvas = vb.Canvas(title=f"Stress test ({N} uzlů)", theme="modern", quality="auto")
+canvas.track_metrics("degree", style=styl)
 
 with canvas.batch():
     for i in range(N):
-        size, color = styl(degree[i])
-        canvas.add_node(f"n{i}", degree=degree[i], size=size, color=color)
+        canvas.add_node(f"n{i}")
     for a, b in edges:
         canvas.add_edge(f"n{a}", f"n{b}")
 
@@ -29,7 +29,9 @@ def build_canvas() -> vb.Canvas:
     for name, color in PROTO_COLORS.items():
         canvas.define_flow_type(name, color=color, speed=1.0)
     canvas.node_label("{fqdn} [{ip}]")   # title se sestaví z meta uzlu
-    canvas.detail_window(rows=[("FQDN", "fqdn"), ("IP", "ip")], width_chars=42)
+    canvas.detail_window(rows=[("FQDN", "fqdn"), ("IP", "ip"),
+                               ("pakety", "packets"), ("bajty", "bytes")],
+                         width_chars=42)
     return canvas
 
 
@@ -54,6 +56,10 @@ def make_handler(canvas: vb.Canvas):
             if edge not in edges:
                 edges.add(edge)
                 canvas.add_edge(src, dst)
+        # čítače: akumulují se na místě, klient dostane součet jednou za tik
+        canvas.incr(src, "packets")
+        canvas.incr(src, "bytes", len(pkt))
+        canvas.incr_edge(src, dst, "packets")
         for node_id in (src, dst):
             resolve(node_id)             # FQDN doplní popisek na pozadí
         canvas.flow(src, dst, type=classify(pkt), count=1, interval=0.05)
@@ -110,6 +110,7 @@ class Route:
     def __init__(self):
         self.state = PENDING
         self.path = None
+        self.path_ids = {}   # orientace (True = od local) -> path_id
 
 
 class RouteTable:
@@ -165,6 +166,20 @@ class RouteTable:
         path = route.path
         return path if path[0] == src else list(reversed(path))
 
+    def path_id_for(self, route: Route, src: str) -> str:
+        """Id registrované cesty orientované dle src (canvas.register_path).
+        Opakované volání jen najde hotové id – cesta se validuje jednou
+        a tok nese místo seznamu hopů jen id; zrušenou cestu (odebraná
+        hrana) canvas zaregistruje znovu pod novým id."""
+        with self._lock:
+            path = route.path
+            key = (path[0] == src)
+            path_id = route.path_ids.get(key)
+            if path_id is None or not self._canvas.has_path(path_id):
+                path_id = self._canvas.register_path(self.path_for(route, src))
+                route.path_ids[key] = path_id
+            return path_id
+
     # -- interní --
 
     def _run(self, local: str, remote: str) -> None:
@@ -270,8 +285,8 @@ def make_handler(canvas: vb.Canvas, table: RouteTable, locals_set: set):
                 return
             route = table.get_or_start(local, remote)
             if route.state == READY:
-                canvas.flow(path=table.path_for(route, src), type=proto,
-                            count=1, interval=0.05)  # path_for orientuje dle src
+                canvas.flow(path_id=table.path_id_for(route, src), type=proto,
+                            count=1, interval=0.05)  # orientace dle src
             else:
                 canvas.flow(src, dst, type=proto, count=1, interval=0.05)
         except Exception:
@@ -256,7 +256,10 @@ from scapy.all import Ether as _Ether, IP as _IP, TCP as _TCP, UDP as _UDP
 
 
 def _flow_actions(canvas):
-    return [a for a in canvas.drain_actions() if a["action"] == "flow"]
+    """Akce toků s cestou rozbalenou z registrovaných cest (path_id)."""
+    paths = canvas.snapshot()["paths"]
+    return [{**a, "path": a.get("path") or paths[a["path_id"]]}
+            for a in canvas.drain_actions() if a["action"] == "flow"]
 
 
 def test_handler_flows_along_path_when_ready():
@@ -272,6 +275,22 @@ def test_handler_flows_along_path_when_ready():
     assert flows[-1]["flow_type"] == "http"
 
 
+def test_handler_reuses_registered_path_per_direction():
+    def tracer(remote):
+        return [(1, "10.0.0.1"), (2, "8.8.8.8")]
+
+    c = lr.build_canvas()
+    table = lr.RouteTable(c, tracer=tracer, pool=InlinePool())
+    handler = lr.make_handler(c, table, {"192.168.1.5"})
+    out = _IP(src="192.168.1.5", dst="8.8.8.8") / _TCP(sport=4444, dport=80)
+    back = _IP(src="8.8.8.8", dst="192.168.1.5") / _TCP(sport=80, dport=4444)
+    for pkt in (out, out, back):
+        handler(pkt)
+    flows = [a for a in c.drain_actions() if a["action"] == "flow"]
+    assert flows[0]["path_id"] == flows[1]["path_id"] != flows[2]["path_id"]
+    assert c.snapshot()["paths"][flows[2]["path_id"]][0] == "8.8.8.8"
+
+
 def test_handler_direct_while_pending_then_multihop():
     def tracer(remote):
         return [(1, "10.0.0.1"), (2, "8.8.8.8")]
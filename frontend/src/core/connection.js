@@ -1,4 +1,4 @@
-import { decode, encode, hello } from './protocol.js';
+import { decode, encode, hello, setFilterEvent } from './protocol.js';
 
 /** WebSocket klient: handshake, routing zpráv do store, reconnect s backoffem.
  *  Stavy hlásí přes onStatus('init' | 'close' | 'protocol_mismatch'). */
@@ -10,6 +10,11 @@ export class Connection {
     maxBackoff = 10000,
     onStatus = () => {},
     onAction = () => {},
+    onLeader = () => {},
+    onBinary = () => {},
+    layout = null,
+    viewport = false,
+    filter = null,
   } = {}) {
     this.url = url;
     this.store = store;
@@ -20,6 +25,11 @@ export class Connection {
     this.backoff = minBackoff;
     this.onStatus = onStatus;
     this.onAction = onAction;
+    this.onLeader = onLeader;   // interval s: nahrávej pozice (null = ne)
+    this.onBinary = onBinary;   // binární rámce pozic serverového layoutu
+    this.layout = layout;       // 'server' = žádá o serverový layout v hello
+    this.viewport = viewport;   // true = server posílá jen výřez u kamery
+    this.filter = filter;       // filtr uzlů (set_filter), drží i po reconnectu
     this.stopped = false;   // po protocol_mismatch se už nereconnectuje
     this.ws = null;
   }
@@ -27,11 +37,16 @@ export class Connection {
   connect() {
     const ws = new this.WebSocketImpl(this.url);
     this.ws = ws;
+    ws.binaryType = 'arraybuffer';
     ws.onopen = () => {
       this.backoff = this.minBackoff;
-      ws.send(encode(hello()));
+      ws.send(encode(hello({ layout: this.layout, viewport: this.viewport })));
+      if (this.filter) ws.send(encode(setFilterEvent(this.filter)));
+    };
+    ws.onmessage = (event) => {
+      if (typeof event.data === 'string') this._onMessage(event.data);
+      else this.onBinary(event.data);
     };
-    ws.onmessage = (event) => this._onMessage(event.data);
     ws.onclose = () => {
       if (this.stopped) return;   // mismatch: uživatel už vidí výzvu k F5
       this.onStatus('close');
@@ -51,10 +66,13 @@ export class Connection {
     if (msg.type === 'init') {
       this.store.applyInit(msg);
       this.onStatus('init');
+      this.onLeader(msg.upload_positions ?? null);
     } else if (msg.type === 'patch') {
       if (!this.store.applyPatch(msg)) this.ws.close();  // mezera v seq
     } else if (msg.type === 'action') {
       this.onAction(msg);
+    } else if (msg.type === 'leader') {
+      this.onLeader(msg.interval);
     } else if (msg.type === 'error') {
       console.error('viewbase server:', msg.error);
       if (msg.error === 'protocol_mismatch') {
@@ -64,7 +82,18 @@ export class Connection {
     }
   }
 
+  /** Server pošle nový init jen s uzly vyhovujícími filtru (null = zruš),
+   *  viz clientview.compile_filter. */
+  setFilter(filter) {
+    this.filter = filter;
+    this.send(setFilterEvent(filter));
+  }
+
   send(message) {
     if (this.ws && this.ws.readyState === 1) this.ws.send(encode(message));
   }
+
+  sendBinary(buffer) {
+    if (this.ws && this.ws.readyState === 1) this.ws.send(buffer);
+  }
 }
@@ -1,13 +1,68 @@
 export const PROTOCOL_VERSION = 1;
 
-export function hello() {
-  return { type: 'hello', protocol: PROTOCOL_VERSION };
+/** `layout: 'server'` = slabý klient: pozice počítá server a posílá je
+ *  binárně (decodePositionFrame), lokální fyzika neběží. */
+export function hello({ layout = null, viewport = false } = {}) {
+  const message = { type: 'hello', protocol: PROTOCOL_VERSION };
+  if (layout) message.layout = layout;
+  if (viewport) message.viewport = true;
+  return message;
+}
+
+/** Filtr uzlů pro tohoto klienta: {type, where, all, any, not}; null = zruš. */
+export function setFilterEvent(filter) {
+  return { type: 'event', event: 'set_filter', payload: { filter } };
 }
 
 export function encode(message) {
   return JSON.stringify(message);
 }
 
+/** Binární zpráva s usazenými pozicemi (vedoucí klient → server):
+ *  u32 délka JSON hlavičky {type:'positions', ids}, zarovnání na 4 B
+ *  a Float32 x, y, z po uzlech, vše little-endian (viz protocol.py). */
+export function encodePositions(ids, positions) {
+  const header = new TextEncoder().encode(
+    JSON.stringify({ type: 'positions', ids }));
+  const start = Math.ceil((4 + header.length) / 4) * 4;
+  const count = Math.min(ids.length, Math.floor(positions.length / 3)) * 3;
+  const buffer = new ArrayBuffer(start + count * 4);
+  const view = new DataView(buffer);
+  view.setUint32(0, header.length, true);
+  new Uint8Array(buffer, 4, header.length).set(header);
+  for (let i = 0; i < count; i += 1) {
+    view.setFloat32(start + i * 4, positions[i], true);
+  }
+  return buffer;
+}
+
+/** Rámec serverového layoutu (server → klient, viz layout.PositionStream):
+ *  u32 délka JSON hlavičky {type:'positions', scale, keyframe[, ids]},
+ *  zarovnání na 4 B a Int16 x, y, z po uzlech, little-endian. Keyframe nese
+ *  absolutní kvantované hodnoty, ostatní rámce rozdíly proti minulému.
+ *  `state` ({ids, values}) drží minulý rámec a rámec ho aktualizuje;
+ *  vrací Float32Array pozic (hodnota × scale). */
+export function decodePositionFrame(buffer, state) {
+  const view = new DataView(buffer);
+  const length = view.getUint32(0, true);
+  const header = JSON.parse(new TextDecoder().decode(
+    new Uint8Array(buffer, 4, length)));
+  const start = Math.ceil((4 + length) / 4) * 4;
+  const count = (buffer.byteLength - start) >> 1;
+  if (header.ids) state.ids = header.ids;
+  if (header.keyframe || !state.values || state.values.length !== count) {
+    state.values = new Int32Array(count);
+  }
+  const { values } = state;
+  const positions = new Float32Array(count);
+  for (let i = 0; i < count; i += 1) {
+    const value = view.getInt16(start + i * 2, true);
+    values[i] = header.keyframe ? value : values[i] + value;
+    positions[i] = values[i] * header.scale;
+  }
+  return positions;
+}
+
 export function decode(raw) {
   const message = JSON.parse(raw);
   if (!message || typeof message !== 'object' || !message.type) {
@@ -5,6 +5,8 @@ export class GraphStore {
     this.nodeTypes = {};
     this.flowTypes = {};
     this.flows = [];
+    this.paths = {};          // path_id -> [id, ...] (register_path)
+    this.positions = {};      // id -> [x, y, z] předpočtené serverem
     this.windows = [];
     this.nodes = new Map();   // id -> {id, type, label, meta}
     this.edges = new Map();   // edgeKey -> {source, target, meta}
@@ -32,6 +34,10 @@ export class GraphStore {
     this.nodeTypes = msg.node_types;
     this.flowTypes = msg.flow_types ?? {};
     this.flows = msg.flows ?? [];
+    this.paths = msg.paths ?? {};
+    this.positions = msg.positions ?? {};
+    this.serverLayout = Boolean(msg.server_layout);   // pozice počítá server
+    this.clientId = msg.client_id ?? null;   // adresa pro POST /api/filter
     this.windows = msg.windows ?? [];
     this.nodes.clear();
     this.edges.clear();
@@ -1,4 +1,5 @@
 import { Connection } from './core/connection.js';
+import { encodePositions } from './core/protocol.js';
 import { GraphStore } from './core/store.js';
 import { StatusOverlay } from './core/status.js';
 import { WindowManager } from './render/windows.js';
@@ -85,7 +86,7 @@ function bootstrap() {
 
   store.subscribe((event) => {
     if (event.kind !== 'init') return;
-    renderer.flowController.replayInit(store.flows ?? []);
+    renderer.flowController.replayInit(store.flows ?? [], store.paths ?? {});
     applyTheme(store.config.theme);   // téma (i CSS proměnné oken) nastav dřív
     renderer.setEdgeStyle(store.config.edge_style ?? { style: 'line', elasticity: 0 });
     for (const spec of store.windows ?? []) {
@@ -119,6 +120,8 @@ function bootstrap() {
     highlight: (msg) => applyHighlight(msg.node_id, msg.depth),
     flow: (msg) => renderer.flowController.applyFlow(msg),
     stop_flow: (msg) => renderer.flowController.stopFlow(msg.flow_id),
+    define_path: (msg) => renderer.flowController.definePath(msg.path_id, msg.path),
+    drop_path: (msg) => renderer.flowController.dropPath(msg.path_id),
     set_theme: (msg) => {
       store.config.theme = msg.theme;     // reconnect → init už ponese nové téma
       applyTheme(msg.theme);
@@ -131,8 +134,42 @@ function bootstrap() {
     set_edge_style: (msg) => renderer.setEdgeStyle(msg),
   };
 
-  const wsScheme = location.protocol === 'https:' ? 'wss' : 'ws';
-  const connection = new Connection(`${wsScheme}://${location.host}/ws`, store, {
+  // ws vedle stránky: / -> /ws, /c/<jméno>/ -> /c/<jméno>/ws (více canvasů)
+  const wsUrl = new URL('ws', location.href);
+  wsUrl.protocol = location.protocol === 'https:' ? 'wss:' : 'ws:';
+  // Vedoucí klient (určí ho server) nahrává usazené pozice; další inity je
+  // nesou, takže nové záložky a reconnecty přeskočí zahřívání fyziky.
+  let uploadTimer = null;
+  let uploadedVersion = -1;
+  function setLeader(interval) {
+    clearInterval(uploadTimer);
+    uploadTimer = null;
+    if (!interval) return;
+    uploadTimer = setInterval(() => {
+      const settled = engine.settledSince(uploadedVersion);
+      if (!settled) return;
+      connection.sendBinary(encodePositions(settled.ids, settled.positions));
+      uploadedVersion = settled.version;
+    }, interval * 1000);
+  }
+
+  // ?layout=server: slabé zařízení nechá layout na serveru (bez workeru)
+  // ?viewport=1: server posílá jen uzly v okolí kamery (view_change)
+  const params = new URLSearchParams(location.search);
+  const layout = params.get('layout') === 'server' ? 'server' : null;
+  const viewport = params.get('viewport') === '1';
+  // ?filter={"type":"router"}: jen uzly vyhovující filtru (viz set_filter)
+  let filter = null;
+  try {
+    filter = JSON.parse(params.get('filter') ?? 'null');
+  } catch (err) {
+    console.warn('viewbase: vadný ?filter', err);
+  }
+  const connection = new Connection(wsUrl.href, store, {
+    layout,
+    viewport,
+    filter,
+    onBinary: (data) => engine.applyServerFrame(data),
     onStatus: (state) => {
       if (state === 'init') {
         status.hide();
@@ -147,6 +184,7 @@ function bootstrap() {
       if (handler) handler(msg);
       else console.warn('viewbase: neznámá akce', msg.action);
     },
+    onLeader: setLeader,
   });
 
   connection.connect();
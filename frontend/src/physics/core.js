@@ -3,6 +3,9 @@ import {
 } from 'd3-force-3d';
 
 const SPAWN_JITTER = 10;
+// Init s pozicemi od serveru (precompute_layout) je už usazený – simulace
+// jen dolaďuje; plný ohřev (alpha 1) by rozložení rozházel.
+const SEEDED_ALPHA = 0.1;
 
 function endId(end) {
   return typeof end === 'object' && end !== null ? end.id : end;
@@ -26,15 +29,26 @@ export class PhysicsCore {
       .stop();
   }
 
-  applyInit({ nodes, links }) {
-    this.nodes = nodes.map((n) => ({ id: n.id }));
+  applyInit({ nodes, links, positions = {} }) {
+    let seeded = 0;
+    this.nodes = nodes.map((n) => {
+      const p = positions[n.id];
+      if (!p) return { id: n.id };
+      seeded += 1;
+      return {
+        id: n.id, x: p[0], y: p[1], z: this.dimensions === 3 ? p[2] : 0,
+      };
+    });
     this.byId = new Map(this.nodes.map((n) => [n.id, n]));
     this.links = links.map((l) => ({ source: l.source, target: l.target }));
     this._rebuild();
-    this.sim.alpha(1);
+    const settled = this.nodes.length > 0 && seeded * 2 >= this.nodes.length;
+    this.sim.alpha(settled ? SEEDED_ALPHA : 1);
   }
 
-  applyPatch({ addNodes = [], removeNodes = [], addLinks = [], removeLinks = [] }) {
+  applyPatch({
+    addNodes = [], removeNodes = [], addLinks = [], removeLinks = [], positions = {},
+  }) {
     const removed = new Set(removeNodes);
     if (removed.size) {
       this.nodes = this.nodes.filter((n) => !removed.has(n.id));
@@ -54,7 +68,10 @@ export class PhysicsCore {
     }
     for (const { id } of addNodes) {
       if (this.byId.has(id)) continue;                      // idempotence
-      const node = { id, ...this._spawnPosition(neighborOf.get(id)) };
+      const p = positions[id];                // uzel vstoupil do výřezu
+      const node = p
+        ? { id, x: p[0], y: p[1], z: this.dimensions === 3 ? p[2] : 0 }
+        : { id, ...this._spawnPosition(neighborOf.get(id)) };
       this.nodes.push(node);
       this.byId.set(id, node);
     }
@@ -1,29 +1,77 @@
+import { decodePositionFrame } from '../core/protocol.js';
+
 /** Most mezi GraphStore a fyzikálním workerem. Drží poslední ids + pozice
  *  pro renderer (ids a buffer se mohou krátce lišit délkou – renderer bere
- *  min(ids.length, positions.length / 3)). */
+ *  min(ids.length, positions.length / 3)). Se serverovým layoutem
+ *  (init.server_layout) worker neběží a pozice plní applyServerFrame. */
 export class PhysicsEngine {
-  constructor(store) {
+  constructor(store, { createWorker = PhysicsEngine.createWorker } = {}) {
     this.ids = [];
     this.positions = new Float32Array(0);
-    this.worker = new Worker(new URL('./worker.js', import.meta.url),
+    this.version = 0;        // roste s každým tikem (nahrávání pozic)
+    this.lastTick = 0;       // performance.now() posledního tiku
+    this.createWorker = createWorker;
+    this.worker = null;      // vzniká s prvním initem bez serverového layoutu
+    this.frames = { ids: [], values: null };   // stav delta dekódování
+    store.subscribe((event) => this._onStoreEvent(store, event));
+  }
+
+  static createWorker() {
+    return new Worker(new URL('./worker.js', import.meta.url),
       { type: 'module' });
+  }
+
+  /** Binární rámec serverového layoutu (Connection.onBinary). */
+  applyServerFrame(buffer) {
+    if (this.worker) return;                 // počítáme sami
+    this.positions = decodePositionFrame(buffer, this.frames);
+    this.ids = this.frames.ids;
+    this._ticked();
+  }
+
+  /** Usazené pozice k nahrání na server: fyzika netikla aspoň `quietMs`
+   *  a od nahrání verze `version` se pohnula; jinak null. */
+  settledSince(version, quietMs = 1000) {
+    if (this.version === version || this.ids.length === 0) return null;
+    if (performance.now() - this.lastTick < quietMs) return null;
+    return { ids: this.ids, positions: this.positions, version: this.version };
+  }
+
+  _ticked() {
+    this.version += 1;
+    this.lastTick = performance.now();
+  }
+
+  _startWorker() {
+    this.worker = this.createWorker();
     this.worker.onmessage = ({ data }) => {
       if (data.type === 'index') this.ids = data.ids;
-      else if (data.type === 'tick') this.positions = data.positions;
+      else if (data.type === 'tick') {
+        this.positions = data.positions;
+        this._ticked();
+      }
     };
-    store.subscribe((event) => this._onStoreEvent(store, event));
   }
 
   _onStoreEvent(store, event) {
     if (event.kind === 'init') {
+      if (store.serverLayout) {
+        // slabý klient: worker zastavit, další keyframe přinese ids i pozice
+        this.worker?.terminate();
+        this.worker = null;
+        this.frames = { ids: [], values: null };
+        return;
+      }
+      if (!this.worker) this._startWorker();
       this.worker.postMessage({
         type: 'init',
         dimensions: store.config.dimensions,
         nodes: [...store.nodes.values()].map((n) => ({ id: n.id })),
+        positions: store.positions ?? {},
         links: [...store.edges.values()]
           .map((e) => ({ source: e.source, target: e.target })),
       });
-    } else if (event.kind === 'patch') {
+    } else if (event.kind === 'patch' && this.worker) {
       const p = event.patch;
       this.worker.postMessage({
         type: 'patch',
@@ -31,6 +79,7 @@ export class PhysicsEngine {
         removeNodes: p.remove_nodes,
         addLinks: p.add_edges.map((e) => ({ source: e.source, target: e.target })),
         removeLinks: p.remove_edges,
+        positions: p.positions ?? {},
       });
     }
   }
@@ -72,8 +72,9 @@ export function resolveFlowColor(flow, flowTypeStyle, theme) {
 /** Jeden aktivní tok: drží svůj parametr emise a žijicí částice.
  *  Čistá logika nad časem (now v sekundách) – render řeší FlowLayer. */
 class Flow {
-  constructor(action, now) {
-    this.path = action.path;
+  constructor(action, now, path = action.path) {
+    this.path = path;
+    this.pathId = action.path_id ?? null;
     this.flowType = action.flow_type ?? null;
     this.typeIndex = action.type_index ?? null;
     this.color = action.color ?? null;
@@ -115,13 +116,28 @@ export class FlowController {
     this.now = now;
     this.flows = [];               // jednorázové + trvalé dohromady
     this.persistent = new Map();   // flow_id -> Flow (pro stopFlow / replay)
+    this.paths = new Map();        // path_id -> [id, ...] (define_path)
+    this._lengths = new Map();     // path_id -> délka cesty v tomto snímku
+  }
+
+  /** Cesta registrovaná na serveru (register_path): toky pak nesou jen
+   *  path_id a všechny sdílejí jedno pole uzlů i délku za snímek. */
+  definePath(pathId, path) {
+    this.paths.set(pathId, path);
+  }
+
+  dropPath(pathId) {
+    this.paths.delete(pathId);
   }
 
   /** Idempotentní podle flow_id: server může tentýž trvalý tok doručit
    *  v initu i následnou akcí (connect uprostřed broadcast okna) – starý
-   *  tok se nahradí, nikdy neběží dvakrát. */
+   *  tok se nahradí, nikdy neběží dvakrát. Tok s neznámým path_id
+   *  (cesta už zrušená) se zahodí. */
   applyFlow(action) {
-    const flow = new Flow(action, this.now());
+    const path = action.path ?? this.paths.get(action.path_id);
+    if (!path) return;
+    const flow = new Flow(action, this.now(), path);
     if (flow.flowId !== null) {
       const prev = this.persistent.get(flow.flowId);
       if (prev) this.flows = this.flows.filter((f) => f !== prev);
@@ -137,10 +153,11 @@ export class FlowController {
     this.flows = this.flows.filter((f) => f !== flow);
   }
 
-  replayInit(flowsArray) {
+  replayInit(flowsArray, paths = {}) {
     // reconnect: zahodť staré trvalé toky, nahradť je tím, co nese init
     this.flows = this.flows.filter((f) => f.flowId === null);
     this.persistent.clear();
+    this.paths = new Map(Object.entries(paths));
     for (const action of flowsArray) this.applyFlow(action);
   }
 
@@ -148,6 +165,18 @@ export class FlowController {
     return this.flows.length;
   }
 
+  /** Délka cesty toku; u registrovaných cest jednou za snímek pro všechny
+   *  toky se stejným path_id (cache maže update). */
+  _lengthOf(flow, display) {
+    if (flow.pathId === null) return pathLength(flow.path, display);
+    let len = this._lengths.get(flow.pathId);
+    if (len === undefined) {
+      len = pathLength(flow.path, display);
+      this._lengths.set(flow.pathId, len);
+    }
+    return len;
+  }
+
   /** Efektivní násobek rychlosti: per-flow speed × speed typu toku. */
   _speedOf(flow) {
     const style = this.store.flowTypes?.[flow.flowType] ?? null;
@@ -163,10 +192,11 @@ export class FlowController {
     const now = this.now();
     const baseSpeed = theme?.flow?.baseSpeed ?? 0;
     const display = this._display;
+    this._lengths.clear();              // pozice se mezi snímky hýbou
     for (const flow of this.flows) {
       let travelTime = 0;
       if (baseSpeed > 0 && display) {
-        const len = pathLength(flow.path, display);
+        const len = this._lengthOf(flow, display);
         const v = baseSpeed * this._speedOf(flow);
         travelTime = (len > 0 && v > 0) ? len / v : 0;
       }
@@ -202,7 +232,7 @@ export class FlowController {
     }
     const now = this.now();
     for (const flow of this.flows) {
-      const len = pathLength(flow.path, display);
+      const len = this._lengthOf(flow, display);
       const v = (theme.flow.baseSpeed ?? 0) * this._speedOf(flow);
       const travelTime = (len > 0 && v > 0) ? len / v : 0;
       const style = this.store.flowTypes?.[flow.flowType] ?? null;
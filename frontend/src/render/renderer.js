@@ -430,15 +430,24 @@ export class Renderer {
     return hit.object.userData.ids[hit.instanceId] ?? null;
   }
 
-  /** Stav pohledu pro view_change event; null dokud kamera neexistuje. */
+  /** Stav pohledu pro view_change event; null dokud kamera neexistuje.
+   *  `radius` = poloměr viditelné oblasti v rovině cíle (výřez na serveru). */
   viewState() {
     if (!this.camera || !this.controls) return null;
-    const p = this.camera.position;
+    const c = this.camera;
+    const p = c.position;
     const t = this.controls.target;
+    const half = c.isOrthographicCamera
+      ? (c.top - c.bottom) / 2
+      : p.distanceTo(t) * Math.tan(THREE.MathUtils.degToRad(c.fov / 2));
+    const aspect = c.isOrthographicCamera
+      ? (c.right - c.left) / (c.top - c.bottom)
+      : c.aspect;
     return {
       position: { x: p.x, y: p.y, z: p.z },
       target: { x: t.x, y: t.y, z: t.z },
-      zoom: this.camera.zoom,
+      zoom: c.zoom,
+      radius: (half * Math.hypot(1, aspect)) / c.zoom,
     };
   }
 
@@ -113,4 +113,60 @@ describe('Connection', () => {
     ws.message({ type: 'action', action: 'focus', node_id: 'a' });
     expect(actionsSeen).toEqual([{ type: 'action', action: 'focus', node_id: 'a' }]);
   });
+
+  it('init s upload_positions a zpráva leader volají onLeader', () => {
+    const calls = [];
+    const conn = new Connection('ws://x/ws', store, {
+      WebSocketImpl: FakeWebSocket, schedule, onLeader: (i) => calls.push(i),
+    });
+    conn.connect();
+    const ws = FakeWebSocket.instances.at(-1);
+    ws.open();
+    ws.message(initMsg);                                 // nevedoucí
+    ws.message({ type: 'leader', interval: 10 });        // převzal roli
+    expect(calls).toEqual([null, 10]);
+    const buffer = new ArrayBuffer(8);
+    conn.sendBinary(buffer);
+    expect(ws.sent.at(-1)).toBe(buffer);
+  });
+
+  it('layout server jde v hello a binární rámce do onBinary', () => {
+    const frames = [];
+    const conn = new Connection('ws://x/ws', store, {
+      WebSocketImpl: FakeWebSocket, schedule, layout: 'server',
+      onBinary: (data) => frames.push(data),
+    });
+    conn.connect();
+    const ws = FakeWebSocket.instances.at(-1);
+    ws.open();
+    expect(JSON.parse(ws.sent[0]).layout).toBe('server');
+    expect(ws.binaryType).toBe('arraybuffer');
+    ws.message({ ...initMsg, server_layout: true });
+    expect(store.serverLayout).toBe(true);
+    const buffer = new ArrayBuffer(8);
+    ws.onmessage({ data: buffer });
+    expect(frames).toEqual([buffer]);
+  });
+
+  it('filtr jde po hello i po reconnectu, setFilter ho změní', () => {
+    const conn = new Connection('ws://x/ws', store, {
+      WebSocketImpl: FakeWebSocket, schedule, filter: { type: 'router' },
+    });
+    conn.connect();
+    let ws = FakeWebSocket.instances.at(-1);
+    ws.open();
+    expect(JSON.parse(ws.sent[1])).toEqual({
+      type: 'event', event: 'set_filter', payload: { filter: { type: 'router' } },
+    });
+    ws.message({ ...initMsg, client_id: 'abc' });
+    expect(store.clientId).toBe('abc');
+    conn.setFilter(null);
+    expect(JSON.parse(ws.sent.at(-1)).payload.filter).toBeNull();
+    conn.setFilter({ where: { tenant: 'acme' } });
+    ws.close();
+    scheduled.at(-1).fn();
+    ws = FakeWebSocket.instances.at(-1);
+    ws.open();
+    expect(JSON.parse(ws.sent[1]).payload.filter).toEqual({ where: { tenant: 'acme' } });
+  });
 });
@@ -157,4 +157,37 @@ describe('FlowController', () => {
     fc.replayInit([makeAction({ count: null, flow_id: 'cc' })]);
     expect(fc.activeCount()).toBe(1);   // jen 'cc'
   });
+
+  it('tok s path_id použije cestu z definePath; neznámé id se zahodí', () => {
+    t = 0;
+    const fc = new FlowController(store, { now });
+    fc.definePath('p1', ['a', 'b']);
+    fc.applyFlow(makeAction({ path: undefined, path_id: 'p1' }));
+    expect(fc.flows[0].path).toEqual(['a', 'b']);
+    fc.dropPath('p1');
+    fc.applyFlow(makeAction({ path: undefined, path_id: 'p1' }));
+    expect(fc.activeCount()).toBe(1);
+  });
+
+  it('replayInit převezme registrované cesty z initu', () => {
+    t = 0;
+    const fc = new FlowController(store, { now });
+    fc.definePath('stara', ['x', 'y']);
+    fc.replayInit([], { p2: ['a', 'b'] });
+    expect(fc.paths.has('stara')).toBe(false);
+    fc.applyFlow(makeAction({ path: undefined, path_id: 'p2' }));
+    expect(fc.activeCount()).toBe(1);
+  });
+
+  it('toky se stejným path_id sdílejí délku cesty za snímek', () => {
+    t = 0;
+    const fc = new FlowController(store, { now });
+    fc.setDisplay(displayMap([['a', [0, 0, 0]], ['b', [10, 0, 0]]]));
+    fc.definePath('p', ['a', 'b']);
+    fc.applyFlow(makeAction({ path: undefined, path_id: 'p', count: null, flow_id: 'f1' }));
+    fc.applyFlow(makeAction({ path: undefined, path_id: 'p', count: null, flow_id: 'f2' }));
+    fc.update(0, { flow: { baseSpeed: 1 }, palette: [] });
+    expect(fc._lengths.get('p')).toBe(10);
+    expect(fc._lengths.size).toBe(1);
+  });
 });
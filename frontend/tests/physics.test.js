@@ -1,5 +1,7 @@
 import { describe, expect, it } from 'vitest';
+import { GraphStore } from '../src/core/store.js';
 import { PhysicsCore } from '../src/physics/core.js';
+import { PhysicsEngine } from '../src/physics/engine.js';
 
 describe('PhysicsCore', () => {
   it('init rozmístí uzly a tick vrací Float32Array pozic', () => {
@@ -31,6 +33,14 @@ describe('PhysicsCore', () => {
     expect(core.links).toHaveLength(0);     // kaskáda hran
   });
 
+  it('uzel vstupující do výřezu dostane pozici od serveru', () => {
+    const core = new PhysicsCore({ dimensions: 3 });
+    core.applyInit({ nodes: [{ id: 'a' }], links: [] });
+    core.applyPatch({ addNodes: [{ id: 'b' }], positions: { b: [500, -20, 7] } });
+    const b = core.nodes.find((n) => n.id === 'b');
+    expect([b.x, b.y, b.z]).toEqual([500, -20, 7]);
+  });
+
   it('simulace po vychladnutí přestane tikat a patch ji ohřeje', () => {
     const core = new PhysicsCore({ dimensions: 3 });
     core.applyInit({ nodes: [{ id: 'a' }], links: [] });
@@ -73,4 +83,46 @@ describe('PhysicsCore', () => {
     core.applyPatch({ removeLinks: [['a', 'b c']] });   // jiná (neexistující) hrana
     expect(core.links).toHaveLength(1);                  // původní hrana přežila
   });
+
+  it('init s pozicemi od serveru startuje z nich a jen mírně ohřátý', () => {
+    const core = new PhysicsCore({ dimensions: 3 });
+    core.applyInit({
+      nodes: [{ id: 'a' }, { id: 'b' }],
+      links: [{ source: 'a', target: 'b' }],
+      positions: { a: [100, 0, 5], b: [160, 0, 5] },
+    });
+    expect(core.byId.get('a')).toMatchObject({ x: 100, y: 0, z: 5 });
+    expect(core.sim.alpha()).toBeLessThan(0.5);
+  });
+
+  it('ve 2D se z z předpočtených pozic zahodí', () => {
+    const core = new PhysicsCore({ dimensions: 2 });
+    core.applyInit({ nodes: [{ id: 'a' }], links: [], positions: { a: [1, 2, 3] } });
+    expect(core.byId.get('a').z).toBe(0);
+  });
+});
+
+describe('PhysicsEngine se serverovým layoutem', () => {
+  it('nespouští worker a pozice bere z rámců serveru', () => {
+    const store = new GraphStore();
+    let workers = 0;
+    const engine = new PhysicsEngine(store, { createWorker: () => { workers += 1; } });
+    store.applyInit({
+      seq: 0, config: { dimensions: 3 }, node_types: {}, server_layout: true,
+      nodes: [{ id: 'a' }], edges: [],
+    });
+    const header = new TextEncoder().encode(JSON.stringify(
+      { type: 'positions', scale: 1, keyframe: true, ids: ['a'] }));
+    const start = Math.ceil((4 + header.length) / 4) * 4;
+    const buffer = new ArrayBuffer(start + 6);
+    const view = new DataView(buffer);
+    view.setUint32(0, header.length, true);
+    new Uint8Array(buffer, 4, header.length).set(header);
+    view.setInt16(start, 7, true);
+    engine.applyServerFrame(buffer);
+    expect(workers).toBe(0);
+    expect(engine.ids).toEqual(['a']);
+    expect([...engine.positions]).toEqual([7, 0, 0]);
+    expect(engine.version).toBe(1);
+  });
 });
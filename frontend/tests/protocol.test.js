@@ -0,0 +1,60 @@
+import { describe, expect, it } from 'vitest';
+import { decodePositionFrame, encodePositions, hello } from '../src/core/protocol.js';
+
+describe('encodePositions', () => {
+  it('hlavička s ids, zarovnání na 4 B a Float32 little-endian', () => {
+    const buffer = encodePositions(['a', 'b'], new Float32Array([1, 2, 3, 4, 5, 6]));
+    const view = new DataView(buffer);
+    const length = view.getUint32(0, true);
+    const header = JSON.parse(new TextDecoder().decode(
+      new Uint8Array(buffer, 4, length)));
+    expect(header).toEqual({ type: 'positions', ids: ['a', 'b'] });
+    const start = Math.ceil((4 + length) / 4) * 4;
+    expect(buffer.byteLength).toBe(start + 6 * 4);
+    expect(view.getFloat32(start + 5 * 4, true)).toBe(6);
+  });
+
+  it('kratší buffer pozic (ids napřed) se ořízne na celé uzly', () => {
+    const buffer = encodePositions(['a', 'b'], new Float32Array([1, 2, 3]));
+    const length = new DataView(buffer).getUint32(0, true);
+    expect(buffer.byteLength).toBe(Math.ceil((4 + length) / 4) * 4 + 12);
+  });
+});
+
+/** Rámec jako z layout.PositionStream v Pythonu. */
+function frame(header, values) {
+  const raw = new TextEncoder().encode(JSON.stringify({ type: 'positions', ...header }));
+  const start = Math.ceil((4 + raw.length) / 4) * 4;
+  const buffer = new ArrayBuffer(start + values.length * 2);
+  const view = new DataView(buffer);
+  view.setUint32(0, raw.length, true);
+  new Uint8Array(buffer, 4, raw.length).set(raw);
+  values.forEach((v, i) => view.setInt16(start + i * 2, v, true));
+  return buffer;
+}
+
+describe('decodePositionFrame', () => {
+  it('keyframe nese ids a absolutní hodnoty, delta se přičte', () => {
+    const state = { ids: [], values: null };
+    let positions = decodePositionFrame(
+      frame({ scale: 0.5, keyframe: true, ids: ['a'] }, [2, -4, 0]), state);
+    expect(state.ids).toEqual(['a']);
+    expect([...positions]).toEqual([1, -2, 0]);
+    positions = decodePositionFrame(
+      frame({ scale: 0.5, keyframe: false }, [1, 1, -1]), state);
+    expect(state.ids).toEqual(['a']);
+    expect([...positions]).toEqual([1.5, -1.5, -0.5]);
+  });
+});
+
+describe('hello', () => {
+  it('layout jen na vyžádání', () => {
+    expect(hello()).not.toHaveProperty('layout');
+    expect(hello({ layout: 'server' }).layout).toBe('server');
+  });
+
+  it('viewport jen na vyžádání', () => {
+    expect(hello()).not.toHaveProperty('viewport');
+    expect(hello({ viewport: true }).viewport).toBe(true);
+  });
+});
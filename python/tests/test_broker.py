@@ -0,0 +1,125 @@
+"""Broker, Publisher a Mirror – fan-out proudu canvasu do worker procesů."""
+import threading
+import time
+
+import pytest
+
+from viewbase import Broker, Canvas, Mirror, Publisher
+
+
+def _graph(canvas):
+    state = canvas.snapshot()
+    nodes = sorted((n["id"], n["type"], n["label"], n["meta"])
+                   for n in state["nodes"])
+    edges = sorted((e["source"], e["target"]) for e in state["edges"])
+    return nodes, edges, state["flows"], state["paths"], state["config"]["theme"]
+
+
+def _wait(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return
+        time.sleep(0.01)
+    raise AssertionError("nedočkal jsem se")
+
+
+def _owner():
+    c = Canvas(title="vlastník", dimensions=2)
+    c.define_type("router", shape="box")
+    c.set_theme("cyber")
+    c.add_node("a", type="router", label="R {n}", n=1)
+    c.add_node("b")
+    c.add_edge("a", "b")
+    c.register_path(["b", "a"])
+    return c
+
+
+@pytest.fixture
+def broker(tmp_path):
+    broker = Broker(tmp_path / "vb.sock").start()
+    yield broker
+    broker.stop()
+
+
+def test_mirrors_converge_and_late_worker_starts_from_keyframe(broker):
+    owner = _owner()
+    publisher = Publisher(owner, broker.path, keyframe_every=3)
+    early = Mirror(broker.path)
+    try:
+        _wait(lambda: _graph(early.canvas) == _graph(owner))
+        assert early.canvas.config["dimensions"] == 2
+        assert early.canvas.config["title"] == "vlastník"
+        for i in range(5):
+            owner.add_node(f"n{i}", type="router", n=i)
+            owner.add_edge(f"n{i}", "a")
+            time.sleep(0.05)                    # víc patchů => i keyframy
+        owner.flow(path=["n0", "a", "b"], count=None)
+        owner.incr("a", "n", 2)
+        owner.remove_node("b")                  # zruší i tok a cestu
+        _wait(lambda: _graph(early.canvas) == _graph(owner))
+        late = Mirror(broker.path)
+        try:
+            _wait(lambda: _graph(late.canvas) == _graph(owner))
+            assert late.seq == early.seq == owner.state().seq
+        finally:
+            late.close()
+    finally:
+        early.close()
+        publisher.close()
+        owner.close()
+
+
+def test_events_from_workers_reach_owner_handlers(broker):
+    owner = _owner()
+    clicked = []
+    done = threading.Event()
+
+    @owner.on_click
+    def expand(event):
+        clicked.append(event.node_id)
+        owner.add_node("c")                     # změna se vrátí proudem
+        owner.add_edge("c", event.node_id)
+        done.set()
+
+    publisher = Publisher(owner, broker.path)
+    mirror = Mirror(broker.path)
+    try:
+        _wait(lambda: mirror.seq is not None)
+        mirror.canvas.dispatch_event("node_click", {"node_id": "a",
+                                                    "client_id": "w1"})
+        assert done.wait(5.0)
+        assert clicked == ["a"]
+        _wait(lambda: "c" in {n["id"]
+                              for n in mirror.canvas.snapshot()["nodes"]})
+    finally:
+        mirror.close()
+        publisher.close()
+        owner.close()
+
+
+def test_publisher_and_mirror_survive_broker_restart(tmp_path):
+    path = tmp_path / "vb.sock"
+    broker = Broker(path).start()
+    owner = _owner()
+    publisher = Publisher(owner, path)
+    mirror = Mirror(path)
+    try:
+        _wait(lambda: _graph(mirror.canvas) == _graph(owner))
+        broker.stop()
+        owner.add_node("za výpadku")
+        owner.remove_node("b")
+        time.sleep(0.2)
+        broker = Broker(path).start()           # prázdný: keyframe pošle
+        _wait(lambda: _graph(mirror.canvas) == _graph(owner))   # publisher
+    finally:
+        mirror.close()
+        publisher.close()
+        broker.stop()
+        owner.close()
+
+
+def test_publisher_validates_arguments(tmp_path):
+    c = Canvas()
+    with pytest.raises(ValueError):
+        Publisher(c, tmp_path / "vb.sock", keyframe_every=0)
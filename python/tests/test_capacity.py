@@ -0,0 +1,54 @@
+"""max_nodes – strop počtu uzlů s LRU vyhazováním."""
+import pytest
+
+from viewbase import Canvas
+
+
+def test_max_nodes_must_be_positive_int():
+    for bad in (0, -1, 1.5, True):
+        with pytest.raises(ValueError):
+            Canvas(max_nodes=bad)
+
+
+def test_over_cap_evicts_least_recently_touched():
+    c = Canvas(max_nodes=3)
+    for node_id in "abc":
+        c.add_node(node_id)
+    c.update_node("a", hot=True)          # a je teď nejčerstvější
+    c.add_node("d")
+    assert [n["id"] for n in c.nodes] == ["a", "c", "d"]   # b vyhozen
+
+
+def test_eviction_cascades_edges_and_emits_removals():
+    c = Canvas(max_nodes=2)
+    c.add_node("a")
+    c.add_node("b")
+    c.add_edge("a", "b")
+    c.drain()
+    c.add_node("c")                       # a i b dotčeny hranou, a dřív
+    seq, deltas = c.drain()
+    assert deltas["remove_nodes"] == ["a"]
+    assert deltas["remove_edges"] == [["a", "b"]]
+    assert not c.has_edge("a", "b")
+
+
+def test_eviction_stops_persistent_flow_through_victim():
+    c = Canvas(max_nodes=3)
+    for node_id in "abc":
+        c.add_node(node_id)
+    c.add_edge("a", "b")
+    c.add_edge("b", "c")
+    flow_id = c.flow("a", "c", count=None)
+    c.drain_actions()
+    c.ensure_node("b")
+    c.ensure_node("c")
+    c.add_node("d")                       # vyhodí a → tok a-b-c končí
+    assert c.drain_actions() == [{"action": "stop_flow", "flow_id": flow_id}]
+    assert c.snapshot()["flows"] == []
+
+
+def test_without_cap_nothing_is_evicted():
+    c = Canvas()
+    for i in range(100):
+        c.add_node(f"n{i}")
+    assert len(c.nodes) == 100
@@ -0,0 +1,140 @@
+"""Výřez grafu podle kamery klienta: SpatialGrid, Viewports a server."""
+import math
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from viewbase import Canvas, create_app, protocol
+from viewbase.clientview import SpatialGrid, Viewports
+
+
+def _line(n=10, step=100.0):
+    """Řetěz n0–n1–…; uzel i leží na x = i·step."""
+    c = Canvas()
+    for i in range(n):
+        c.add_node(f"n{i}")
+    for i in range(n - 1):
+        c.add_edge(f"n{i}", f"n{i + 1}")
+    c.set_positions({f"n{i}": (i * step, 0, 0) for i in range(n)})
+    c.drain()
+    return c
+
+
+def _view(x, radius):
+    return {"target": {"x": x, "y": 0, "z": 0}, "radius": radius}
+
+
+def test_grid_query_matches_brute_force():
+    rng = random.Random(3)
+    positions = {f"p{i}": (rng.uniform(-2000, 2000), rng.uniform(-2000, 2000),
+                           rng.uniform(-300, 300)) for i in range(500)}
+    grid = SpatialGrid(positions, cell=150.0)
+    for center, radius in [((0, 0, 0), 400), ((1500, -900, 0), 250),
+                           ((0, 0, 0), 1e5)]:
+        expected = sorted(
+            (math.dist(center, p), node_id)
+            for node_id, p in positions.items()
+            if math.dist(center, p) <= radius)
+        assert grid.query(center, radius) == [i for _, i in expected]
+    assert len(grid.query((0, 0, 0), 1e5, limit=7)) == 7
+
+
+def test_connect_sends_only_nodes_near_default_view():
+    c = _line(30)
+    init = Viewports(c, margin=1.0).connect("tel")
+    assert init["seq"] == 0
+    assert {n["id"] for n in init["nodes"]} == {f"n{i}" for i in range(11)}
+    assert len(init["edges"]) == 10                     # jen mezi viditelnými
+    assert set(init["positions"]) == {f"n{i}" for i in range(11)}
+
+
+def test_move_sends_enter_and_leave():
+    c = _line(10)
+    views = Viewports(c, margin=1.0)
+    views.connect("tel")
+    assert views.move("tel", _view(0, 150)) is not None   # n0, n1
+    patch = views.move("tel", _view(300, 150))            # n2, n3, n4
+    assert patch["seq"] == 2
+    assert patch["remove_nodes"] == ["n0", "n1"]
+    assert patch["remove_edges"] == [["n0", "n1"]]
+    assert {n["id"] for n in patch["add_nodes"]} == {"n2", "n3", "n4"}
+    assert {(e["source"], e["target"]) for e in patch["add_edges"]} == {
+        ("n2", "n3"), ("n3", "n4")}
+    assert patch["positions"]["n4"] == (400.0, 0.0, 0.0)
+    assert views.move("tel", _view(310, 150)) is None     # beze změny
+
+
+def test_move_sees_positions_written_between_moves():
+    c = _line(3)
+    views = Viewports(c, margin=1.0)
+    views.connect("tel")
+    views.move("tel", _view(0, 10))               # jen n0
+    c.set_positions({"n1": (1000.0, 0, 0)})
+    patch = views.move("tel", _view(1000, 10))
+    assert [n["id"] for n in patch["add_nodes"]] == ["n1"]
+    c.add_node("late")
+    c.set_positions({"late": (2000.0, 0, 0)})   # zápis na místě (nesdílené)
+    c.drain()
+    patch = views.move("tel", _view(2001.5, 10))
+    assert [n["id"] for n in patch["add_nodes"]] == ["late"]
+    assert patch["positions"] == {"late": (2000.0, 0.0, 0.0)}
+
+
+def test_move_respects_budget_and_rejects_bad_payload():
+    c = _line(10)
+    views = Viewports(c, max_nodes=3)
+    views.connect("tel")
+    views.move("tel", _view(450, 1e4))                    # n3, n4, n5
+    patch = views.move("tel", _view(0, 1e4))              # 3 nejbližší k 0
+    assert {n["id"] for n in patch["add_nodes"]} == {"n0", "n1", "n2"}
+    assert sorted(patch["remove_nodes"]) == ["n3", "n4", "n5"]
+    with pytest.raises(ValueError):
+        views.move("tel", {"target": {"x": 0}})
+
+
+def test_filter_narrows_patches_to_view():
+    c = _line(10)
+    views = Viewports(c, margin=1.0)
+    views.connect("tel")
+    views.move("tel", _view(0, 150))                      # n0, n1
+    c.update_node("n1", note="blízko")
+    c.update_node("n8", note="daleko")
+    c.add_node("near")
+    c.add_edge("near", "n0")                              # zrodí se u n0
+    c.add_node("far")
+    c.add_edge("far", "n9")
+    c.remove_node("n1")
+    _, deltas = c.drain()
+    patch = views.filter("tel", deltas)
+    assert patch["seq"] == 2
+    assert patch["remove_nodes"] == ["n1"]
+    assert patch["remove_edges"] == [["n0", "n1"]]
+    assert [n["id"] for n in patch["add_nodes"]] == ["near"]
+    assert "near" in patch["positions"]
+    assert patch["update_nodes"] == []                    # n1 odebrán, n8 mimo
+    assert [{e["source"], e["target"]} for e in patch["add_edges"]] == [
+        {"near", "n0"}]
+    c.update_node("n9", note="pořád daleko")
+    assert views.filter("tel", c.drain()[1]) is None
+
+
+def test_viewport_client_over_websocket():
+    c = _line(40)
+    with TestClient(create_app(c, viewport_nodes=5)) as client:
+        with client.websocket_connect("/ws") as ws:
+            ws.send_text(protocol.encode({
+                "type": "hello", "protocol": protocol.PROTOCOL_VERSION,
+                "viewport": True}))
+            init = protocol.decode(ws.receive_text())
+            assert init["seq"] == 0 and init["upload_positions"] is None
+            assert {n["id"] for n in init["nodes"]} == {
+                f"n{i}" for i in range(5)}
+            ws.send_text(protocol.encode({
+                "type": "event", "event": "view_change",
+                "payload": _view(3000, 200)}))
+            patch = protocol.decode(ws.receive_text())
+            assert patch["seq"] == 1
+            assert set(patch["remove_nodes"]) == {f"n{i}" for i in range(5)}
+            assert {n["id"] for n in patch["add_nodes"]} == {
+                "n28", "n29", "n30", "n31", "n32"}
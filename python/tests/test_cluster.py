@@ -0,0 +1,160 @@
+"""Super-uzly shluků: label propagation, agregované hrany, expand/collapse."""
+import random
+
+import pytest
+
+from viewbase import Canvas
+from viewbase.cluster import CLUSTER_PREFIX, ClusterView
+from viewbase.metrics import label_propagation
+
+
+def _two_cliques():
+    c = Canvas()
+    for group in "ab":
+        for i in range(5):
+            c.add_node(f"{group}{i}", kind=group)
+        for i in range(5):
+            for j in range(i + 1, 5):
+                c.add_edge(f"{group}{i}", f"{group}{j}")
+    c.add_edge("a0", "b0", note="most")
+    return c
+
+
+def _expected_view(clusters):
+    """Váhy hran view spočtené znovu od nuly ze zdroje."""
+    base = clusters.base
+    rep = {}
+    for cluster_id, size in clusters.clusters().items():
+        members = clusters.members(cluster_id)
+        visible = clusters.view.has_node(members[0]) and \
+            not clusters.view.has_node(cluster_id)
+        for node_id in members:
+            rep[node_id] = node_id if visible else cluster_id
+    weights = {}
+    for edge in base.edges:
+        a, b = rep[edge["source"]], rep[edge["target"]]
+        if a != b:
+            key = tuple(sorted((a, b)))
+            weights[key] = weights.get(key, 0) + 1
+    return set(rep.values()), weights
+
+
+def _assert_consistent(clusters):
+    nodes, weights = _expected_view(clusters)
+    view = clusters.view
+    assert {n["id"] for n in view.nodes} == nodes
+    got = {(e["source"], e["target"]): e["meta"].get("weight", 1)
+           for e in view.edges}
+    assert got == weights
+
+
+def test_label_propagation_finds_cliques():
+    adjacency = {}
+    for a, b in [("a", "b"), ("b", "c"), ("a", "c"), ("x", "y"), ("y", "z"),
+                 ("x", "z"), ("c", "x")]:
+        adjacency.setdefault(a, set()).add(b)
+        adjacency.setdefault(b, set()).add(a)
+    adjacency["lonely"] = set()
+    labels = label_propagation(adjacency, seed=1)
+    assert labels["a"] == labels["b"] == labels["c"]
+    assert labels["x"] == labels["y"] == labels["z"]
+    assert labels["lonely"] == "lonely"
+
+
+def test_coarse_graph_aggregates_edges():
+    clusters = ClusterView(_two_cliques())
+    view = clusters.view
+    assert len(clusters.clusters()) == 2
+    assert all(n["type"] == "cluster" for n in view.nodes)
+    assert sorted(n["meta"]["size"] for n in view.nodes) == [5, 5]
+    [edge] = view.edges
+    assert edge["meta"] == {"weight": 1}
+    _assert_consistent(clusters)
+
+
+def test_expand_and_collapse_swap_detail():
+    clusters = ClusterView(_two_cliques())
+    cluster_a = clusters.cluster_of("a0")
+    view = clusters.view
+    view.drain()
+    clusters.expand(cluster_a)
+    assert not view.has_node(cluster_a)
+    assert view.node("a1")["meta"] == {"kind": "a"}
+    assert view.has_edge("a0", "a1")
+    assert view.edge("a0", clusters.cluster_of("b0"))["meta"] == {"weight": 1}
+    _seq, deltas = view.drain()                 # detail jde jedním patchem
+    assert len(deltas["add_nodes"]) == 5
+    clusters.expand(clusters.cluster_of("b0"))
+    assert view.edge("a0", "b0")["meta"] == {"note": "most"}
+    _assert_consistent(clusters)
+    clusters.collapse(cluster_a)
+    assert view.has_node(cluster_a) and not view.has_node("a1")
+    _assert_consistent(clusters)
+    with pytest.raises(ValueError):
+        clusters.expand("cluster:neni")
+
+
+def test_incremental_changes_keep_weights():
+    base = _two_cliques()
+    clusters = ClusterView(base)
+    clusters.expand(clusters.cluster_of("b0"))
+    rng = random.Random(3)
+    ids = [f"{g}{i}" for g in "ab" for i in range(5)]
+    for step in range(200):
+        op = rng.random()
+        if op < 0.3:
+            node_id = f"n{step}"
+            base.add_node(node_id)
+            ids.append(node_id)
+            base.add_edge(node_id, rng.choice(ids[:-1]))
+        elif op < 0.6 and len(ids) > 2:
+            a, b = rng.sample(ids, 2)
+            base.ensure_edge(a, b, touched=step)
+        elif op < 0.8:
+            edges = base.edges
+            if edges:
+                edge = rng.choice(edges)
+                base.remove_edge(edge["source"], edge["target"])
+        elif op < 0.9:
+            clusters.refresh()              # ať volba odpovídá zdroji
+            cluster_id = rng.choice(sorted(clusters.clusters()))
+            if clusters.view.has_node(cluster_id):
+                clusters.expand(cluster_id)
+            else:
+                clusters.collapse(cluster_id)
+        elif len(ids) > 3:
+            victim = rng.choice(ids)
+            ids.remove(victim)
+            base.remove_node(victim)
+        if step % 7 == 0:
+            clusters.refresh()
+            _assert_consistent(clusters)
+    clusters.refresh()
+    _assert_consistent(clusters)
+
+
+def test_new_node_joins_neighbour_cluster():
+    base = _two_cliques()
+    clusters = ClusterView(base)
+    base.add_node("new")
+    clusters.refresh()
+    assert clusters.cluster_of("new") == CLUSTER_PREFIX + "new"   # zatím sám
+    base.add_edge("new", "a3")
+    clusters.refresh()
+    assert clusters.cluster_of("new") == clusters.cluster_of("a3")
+    assert clusters.view.node(clusters.cluster_of("a3"))["meta"]["size"] == 6
+    _assert_consistent(clusters)
+
+
+def test_recluster_and_forwarded_actions():
+    base = _two_cliques()
+    clusters = ClusterView(base)
+    clusters.expand(clusters.cluster_of("a0"))
+    base.focus("a2")
+    base.focus("b2")
+    clusters.refresh()
+    assert [a["node_id"] for a in clusters.view.drain_actions()] == \
+        ["a2", clusters.cluster_of("b2")]
+    clusters.recluster()
+    assert clusters.view.has_node("a2")          # rozbalení přežilo
+    _assert_consistent(clusters)
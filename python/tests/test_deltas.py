@@ -76,3 +76,25 @@ def test_batch_holds_deltas_until_exit():
         assert c.drain() is None
     deltas = drain_deltas(c)
     assert len(deltas["add_nodes"]) == 2
+
+
+def test_edge_update_then_remove_in_one_tick_emits_removal():
+    c = Canvas()
+    c.add_node("a")
+    c.add_node("b")
+    c.add_edge("a", "b")
+    c.drain()
+    c.ensure_edge("a", "b", w=2)          # upsert v add_edges…
+    c.remove_edge("a", "b")               # …ale hranu klient už má
+    deltas = drain_deltas(c)
+    assert deltas["remove_edges"] == [["a", "b"]]
+    assert deltas["add_edges"] == []
+    c.add_edge("a", "b", packets=0)
+    c.drain()
+    c.incr_edge("a", "b", "packets")
+    c.remove_edge("a", "b")
+    assert drain_deltas(c)["remove_edges"] == [["a", "b"]]
+    c.add_edge("a", "b")                  # nová hrana odebraná v témž tiku
+    c.incr_edge("a", "b", "packets")      # klientovi nic neposílá
+    c.remove_edge("a", "b")
+    assert c.drain() is None
@@ -0,0 +1,121 @@
+"""Filtry klientů: compile_filter, Filters a set_filter přes WS/REST."""
+import pytest
+from fastapi.testclient import TestClient
+
+from viewbase import Canvas, create_app, protocol
+from viewbase.clientview import Filters, compile_filter
+
+
+def _network():
+    """Dva routery, každý se dvěma hosty tenanta acme/beta."""
+    c = Canvas()
+    c.define_type("router")
+    c.define_type("host")
+    for r in ("r1", "r2"):
+        c.add_node(r, type="router")
+    c.add_edge("r1", "r2")
+    for i, tenant in enumerate(["acme", "beta", "acme", "beta"]):
+        c.add_node(f"h{i}", type="host", tenant=tenant)
+        c.add_edge(f"h{i}", "r1" if i < 2 else "r2")
+    c.add_edge("h0", "h2")
+    c.drain()
+    return c
+
+
+def test_compile_filter():
+    routers = compile_filter({"type": "router"})
+    assert routers("router", {}) and not routers("host", {})
+    acme_hosts = compile_filter({"type": ["host"],
+                                 "where": {"tenant": "acme"}})
+    assert acme_hosts("host", {"tenant": "acme"})
+    assert not acme_hosts("host", {"tenant": "beta"})
+    assert not acme_hosts("host", {})
+    either = compile_filter({"any": [
+        {"type": "router"}, {"not": {"where": {"tenant": ["beta"]}}}]})
+    assert either("router", {"tenant": "beta"}) and either("host", {})
+    assert not either("host", {"tenant": "beta"})
+    assert compile_filter({})("cokoli", {})
+    for bad in ([], {"typ": "router"}, {"where": "acme"}, {"any": {}}):
+        with pytest.raises(ValueError):
+            compile_filter(bad)
+
+
+@pytest.mark.parametrize("indexed", [False, True])
+def test_set_returns_filtered_init(indexed):
+    c = _network()
+    if indexed:
+        c.create_index("tenant")                # kandidáti z indexu
+    filters = Filters(c)
+    init = filters.set("op", {"type": "host", "where": {"tenant": "acme"}})
+    assert init["seq"] == 0
+    assert {n["id"] for n in init["nodes"]} == {"h0", "h2"}
+    assert [{e["source"], e["target"]} for e in init["edges"]] == [
+        {"h0", "h2"}]
+
+
+def test_patch_translated_incrementally():
+    c = _network()
+    filters = Filters(c)
+    filters.set("op", {"where": {"tenant": "acme"}})
+    c.add_node("h4", type="host", tenant="acme")        # vstoupí
+    c.add_edge("h4", "h0")
+    c.add_node("h5", type="host", tenant="beta")        # nevyhovuje
+    c.add_edge("h5", "h4")
+    c.update_node("h2", tenant="beta")                  # odejde
+    c.update_node("h1", tenant="acme")                  # vstoupí i s hranou
+    c.add_edge("h1", "h0")
+    patch = filters.filter("op", c.drain()[1])
+    assert patch["seq"] == 1
+    assert patch["remove_nodes"] == ["h2"]
+    assert {n["id"] for n in patch["add_nodes"]} == {"h4", "h1"}
+    edges = [frozenset((e["source"], e["target"])) for e in patch["add_edges"]]
+    assert sorted(edges, key=sorted) == sorted(
+        [frozenset({"h4", "h0"}), frozenset({"h1", "h0"})], key=sorted)
+    c.update_node("h0", note="x")                       # vyhovuje dál
+    c.update_node("r1", note="x")                       # mimo filtr
+    patch = filters.filter("op", c.drain()[1])
+    assert [n["id"] for n in patch["update_nodes"]] == ["h0"]
+    assert patch["add_nodes"] == [] and patch["remove_nodes"] == []
+    c.remove_node("h4")
+    patch = filters.filter("op", c.drain()[1])
+    assert patch["remove_nodes"] == ["h4"]
+    assert [set(k) for k in patch["remove_edges"]] == [{"h0", "h4"}]
+    c.update_node("h5", note="y")
+    assert filters.filter("op", c.drain()[1]) is None
+
+
+def test_set_filter_over_websocket_and_rest():
+    c = _network()
+    hello = {"type": "hello", "protocol": protocol.PROTOCOL_VERSION}
+    with TestClient(create_app(c)) as client:
+        with client.websocket_connect("/ws") as ws:
+            ws.send_text(protocol.encode(hello))
+            init = protocol.decode(ws.receive_text())
+            assert len(init["nodes"]) == 6 and init["upload_positions"]
+            ws.send_text(protocol.encode({
+                "type": "event", "event": "set_filter",
+                "payload": {"filter": {"type": "router"}}}))
+            init = protocol.decode(ws.receive_text())
+            assert {n["id"] for n in init["nodes"]} == {"r1", "r2"}
+            assert init["upload_positions"] is None     # filtrovaný nevede
+            assert client.post("/api/filter", json={
+                "client_id": init["client_id"],
+                "filter": {"typ": "x"}}).json()["ok"] is False
+            assert client.post("/api/filter", json={
+                "client_id": "nikdo", "filter": {}}).json() == {
+                "ok": False, "error": "neznámý klient"}
+            response = client.post("/api/filter", json={
+                "client_id": init["client_id"],
+                "filter": {"where": {"tenant": "beta"}}})
+            assert response.json() == {"ok": True}
+            init = protocol.decode(ws.receive_text())
+            assert {n["id"] for n in init["nodes"]} == {"h1", "h3"}
+            c.add_node("r3", type="router")
+            c.add_node("h9", type="host", tenant="beta")
+            patch = protocol.decode(ws.receive_text())
+            assert [n["id"] for n in patch["add_nodes"]] == ["h9"]
+            assert patch["seq"] == init["seq"] + 1
+            client.post("/api/filter", json={
+                "client_id": init["client_id"], "filter": None})
+            init = protocol.decode(ws.receive_text())
+            assert len(init["nodes"]) == 8 and init["upload_positions"]
@@ -192,3 +192,30 @@ def test_flow_action_delivered_over_ws():
                     break
             assert msg["action"] == "flow"
             assert msg["path"] == ["a", "b"]
+
+
+def test_component_index_rejects_unreachable_flow_without_bfs(monkeypatch):
+    c = Canvas()
+    for node_id in ("a", "b", "c", "x", "y"):
+        c.add_node(node_id)
+    c.add_edges([("a", "b"), ("b", "c"), ("x", "y")])
+    monkeypatch.setattr(Canvas, "_bidirectional_bfs", None)   # BFS by spadl
+    with pytest.raises(ValueError, match="nevede cesta"):
+        c.flow("a", "y")
+
+
+def test_component_of_tracks_topology():
+    c = Canvas()
+    for node_id in ("a", "b", "c"):
+        c.add_node(node_id)
+    assert len({c.component_of(i) for i in "abc"}) == 3
+    c.add_edges([("a", "b"), ("b", "c")])
+    assert c.component_of("a") == c.component_of("c")
+    c.remove_edge("b", "c")                     # líná přestavba indexu
+    assert c.component_of("a") == c.component_of("b") != c.component_of("c")
+    c.remove_node("b")
+    assert c.component_of("a") != c.component_of("c")
+    with pytest.raises(ValueError):
+        c.component_of("b")
+    c.add_edge("a", "c")
+    assert c.flow("a", "c") is None
@@ -1,4 +1,6 @@
 """add_graph / from_networkx / add_edges – import hotových grafů."""
+import pytest
+
 from viewbase import Canvas
 
 
@@ -78,3 +80,56 @@ def test_add_edges_bulk():
         c.add_node(nid)
     c.add_edges([("a", "b"), ("b", "c")])
     assert len(c.edges) == 2
+
+
+def test_add_graph_into_empty_canvas_is_one_patch():
+    g = FakeGraph([(i, {"n": i}) for i in range(100)],
+                  [(i, i + 1, {}) for i in range(99)])
+    c = Canvas()
+    c.add_graph(g)
+    seq, deltas = c.drain()
+    assert len(deltas["add_nodes"]) == 100
+    assert len(deltas["add_edges"]) == 99
+    assert c.drain() is None
+    c.add_node("x")                             # sousedé/indexy fungují dál
+    c.add_edge("x", "0")
+    c.remove_node("0")
+    assert not c.has_edge("0", "1")
+
+
+def test_add_graph_replace_mode():
+    c = Canvas()
+    c.add_graph(FakeGraph([("a", {}), ("b", {}), ("c", {})],
+                          [("a", "b", {}), ("b", "c", {})]))
+    c.flow("a", "b", count=None)
+    c.drain()
+    c.drain_actions()
+    c.ensure_edge("a", "b", w=1)              # změněná hrana se taky odebere
+    c.add_graph(FakeGraph([("b", {"v": 1}), ("d", {})], [("b", "d", {})]),
+                mode="replace")
+    assert sorted(n["id"] for n in c.nodes) == ["b", "d"]
+    assert c.node("b")["meta"] == {"v": 1}
+    assert [(e["source"], e["target"]) for e in c.edges] == [("b", "d")]
+    assert c.snapshot()["flows"] == []
+    _, deltas = c.drain()
+    assert sorted(deltas["remove_nodes"]) == ["a", "b", "c"]
+    assert sorted(deltas["remove_edges"]) == [["a", "b"], ["b", "c"]]
+    assert sorted(n["id"] for n in deltas["add_nodes"]) == ["b", "d"]
+    assert [a["action"] for a in c.drain_actions()] == ["stop_flow"]
+
+
+def test_add_graph_creates_bare_nodes_for_unknown_endpoints():
+    c = Canvas()
+    c.add_node("a", ip="10.0.0.1")
+    c.drain()
+    c.add_graph(FakeGraph([("b", {"v": 1})], [("a", "b", {}), ("b", "x", {})]))
+    assert c.node("x") == {"id": "x", "type": None, "label": "x", "meta": {}}
+    assert c.node("a")["meta"] == {"ip": "10.0.0.1"}   # existující nedotčen
+    assert c.has_edge("a", "b") and c.has_edge("b", "x")
+    _, deltas = c.drain()
+    assert sorted(n["id"] for n in deltas["add_nodes"]) == ["b", "x"]
+
+
+def test_add_graph_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        Canvas().add_graph(FakeGraph([], []), mode="append")
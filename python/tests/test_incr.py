@@ -0,0 +1,56 @@
+"""incr / incr_edge – čítače v meta s agregovaným vysíláním."""
+import pytest
+
+from viewbase import Canvas
+
+
+def _pair():
+    c = Canvas()
+    c.add_node("a")
+    c.add_node("b")
+    c.add_edge("a", "b")
+    c.drain()
+    return c
+
+
+def test_incr_accumulates_and_emits_one_update_per_drain():
+    c = _pair()
+    for _ in range(1000):
+        c.incr("a", "bytes", 60)
+    assert c.incr("a", "packets") == 1      # chybějící klíč začíná od 0
+    seq, deltas = c.drain()
+    assert deltas["update_nodes"] == [
+        {"id": "a", "type": None, "label": "a",
+         "meta": {"bytes": 60000, "packets": 1}}]
+    assert c.drain() is None
+
+
+def test_incr_edge_is_undirected_and_coalesced():
+    c = _pair()
+    c.incr_edge("a", "b", "packets")
+    c.incr_edge("b", "a", "packets", 2)
+    seq, deltas = c.drain()
+    assert deltas["add_edges"] == [
+        {"source": "a", "target": "b", "meta": {"packets": 3}}]
+
+
+def test_incr_folds_into_pending_add_and_rerenders_label():
+    c = Canvas()
+    c.add_node("a", label="{hits}x", hits=0)
+    c.incr("a", "hits", 2)
+    seq, deltas = c.drain()
+    assert deltas["update_nodes"] == []
+    assert deltas["add_nodes"][0]["label"] == "2x"
+
+
+def test_incr_rejects_missing_entities_and_non_numbers():
+    c = _pair()
+    c.update_node("a", name="Alfa")
+    with pytest.raises(ValueError):
+        c.incr("ghost", "x")
+    with pytest.raises(ValueError):
+        c.incr_edge("a", "ghost", "x")
+    with pytest.raises(ValueError):
+        c.incr("a", "name")                 # není číslo
+    with pytest.raises(ValueError):
+        c.incr("a", "x", "1")
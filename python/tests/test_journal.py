@@ -0,0 +1,125 @@
+"""Journal – žurnál delt, checkpointy a obnova po pádu; subscribe/apply_*."""
+import pytest
+
+from viewbase import Canvas, Journal
+
+
+def _pump(canvas):
+    """Jako broadcast smyčka serveru: nejdřív akce, pak delty."""
+    canvas.drain_actions()
+    canvas.drain()
+
+
+def _session(canvas):
+    canvas.add_node("a", label="uzel {n}", n=1)
+    canvas.add_node("b")
+    canvas.add_edge("a", "b", kind="lan")
+    _pump(canvas)
+    canvas.add_node("c")
+    canvas.add_edge("b", "c")
+    flow_id = canvas.flow(path=["a", "b", "c"], count=None)
+    canvas.set_theme("cyber")
+    _pump(canvas)
+    canvas.incr("a", "n", 5)
+    canvas.remove_edge("a", "b")              # zruší i trvalý tok
+    canvas.set_edge_style("spline", 0.3)
+    _pump(canvas)
+    canvas.flow("b", "c", count=None)
+    _pump(canvas)
+    return flow_id
+
+
+def test_subscribe_sees_drained_stream():
+    c = Canvas()
+    patches, actions = [], []
+    unsubscribe = c.subscribe(on_patch=lambda *a: patches.append(a),
+                              on_actions=lambda *a: actions.append(a))
+    c.add_node("a", label="x {id}")
+    c.focus("a")
+    _pump(c)
+    seq, deltas, labels = patches[0]
+    assert seq == 1 and deltas["add_nodes"][0]["id"] == "a"
+    assert labels == {"a": "x {id}"}
+    assert actions == [(0, [{"action": "focus", "node_id": "a"}])]
+    unsubscribe()
+    c.add_node("b")
+    _pump(c)
+    assert len(patches) == 1
+
+
+def test_apply_patch_mirrors_canvas():
+    src, dst = Canvas(), Canvas()
+    src.subscribe(on_patch=lambda seq, d, labels: dst.apply_patch(d, labels),
+                  on_actions=lambda after, acts: [dst.apply_action(a)
+                                                  for a in acts])
+    _session(src)
+    state = src.snapshot()
+    mirror = dst.snapshot()
+    assert mirror["nodes"] == state["nodes"]
+    assert mirror["edges"] == state["edges"]
+    assert mirror["flows"] == state["flows"]
+    assert mirror["config"]["theme"] == "cyber"
+
+
+def test_apply_patch_edge_update_then_remove_emits_removal():
+    c = Canvas()
+    c.add_node("a")
+    c.add_node("b")
+    c.add_edge("a", "b")
+    c.drain()
+    c.apply_patch({"add_edges": [{"source": "a", "target": "b",
+                                  "meta": {"w": 2}}]})
+    c.remove_edge("a", "b")                 # klient hranu má – odebrat
+    _, deltas = c.drain()
+    assert deltas["remove_edges"] == [["a", "b"]]
+    assert deltas["add_edges"] == []
+
+
+def test_recover_replays_tail(tmp_path):
+    c = Canvas(title="živě")
+    journal = Journal(c, tmp_path / "wal", flush_interval=0.05)
+    _session(c)
+    journal.close()
+    recovered = Journal.recover(tmp_path / "wal")
+    assert recovered.snapshot() == c.snapshot()
+    assert recovered.drain() is None and recovered.drain_actions() == []
+
+
+def test_recover_uses_latest_checkpoint(tmp_path):
+    c = Canvas()
+    journal = Journal(c, tmp_path, checkpoint_every=2)
+    _session(c)
+    journal.close()
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert len([n for n in names if n.startswith("checkpoint-")]) == 1
+    assert Journal.recover(tmp_path).snapshot() == c.snapshot()
+
+
+def test_truncated_tail_is_ignored(tmp_path):
+    c = Canvas()
+    journal = Journal(c, tmp_path)
+    c.add_node("a")
+    _pump(c)
+    expected = c.snapshot()
+    c.add_node("b")
+    _pump(c)
+    journal.close()
+    segment = next(tmp_path.glob("segment-*.log"))
+    data = segment.read_bytes()
+    segment.write_bytes(data[:-7])            # pád uprostřed zápisu
+    assert Journal.recover(tmp_path).snapshot() == expected
+
+    segment.write_bytes(b"{nesmysl}\n" + data)
+    with pytest.raises(ValueError):
+        Journal.recover(tmp_path)
+
+
+def test_new_journal_replaces_directory(tmp_path):
+    old = Canvas()
+    journal = Journal(old, tmp_path)
+    _session(old)
+    journal.close()
+    fresh = Canvas()
+    Journal(fresh, tmp_path).close()
+    assert Journal.recover(tmp_path).snapshot() == fresh.snapshot()
+    assert Journal.recover(tmp_path / "nic").snapshot()["nodes"] == []
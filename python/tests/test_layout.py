@@ -0,0 +1,81 @@
+"""Serverové rozložení (layout.force_layout, Canvas.precompute_layout)."""
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from viewbase import Canvas, layout  # noqa: E402
+
+
+def _ladder(n):
+    ids = [f"n{i}" for i in range(n)]
+    return ids, list(zip(ids, ids[1:]))
+
+
+def _mean(values):
+    values = list(values)
+    return sum(values) / len(values)
+
+
+def test_layout_pulls_neighbours_together():
+    ids, edges = _ladder(40)
+    pos = layout.force_layout(ids, edges, dimensions=2, seed=1)
+    assert set(pos) == set(ids)
+    assert all(p[2] == 0.0 for p in pos.values())          # 2D
+    linked = _mean(math.dist(pos[a], pos[b]) for a, b in edges)
+    anyone = _mean(math.dist(pos[a], pos[b])
+                   for a in ids for b in ids if a < b)
+    assert linked < anyone / 3
+    centre = [_mean(p[axis] for p in pos.values()) for axis in range(3)]
+    assert max(abs(c) for c in centre) < 1.0
+
+
+def test_layout_is_deterministic_and_ignores_dangling_edges():
+    ids, edges = _ladder(10)
+    edges = edges + [("n0", "ghost"), ("n1", "n1")]
+    assert layout.force_layout(ids, edges, seed=3) == \
+        layout.force_layout(ids, edges, seed=3)
+
+
+def test_initial_positions_are_refined_not_scrambled():
+    ids, edges = _ladder(30)
+    first = layout.force_layout(ids, edges, seed=1)
+    again = layout.force_layout(ids, edges, seed=99, initial=first,
+                                iterations=20)
+    moved = _mean(math.dist(first[i], again[i]) for i in ids)
+    assert moved < layout.EDGE_LENGTH
+
+
+def test_barnes_hut_approximates_exact_repulsion():
+    rng = np.random.default_rng(0)
+    pos = rng.uniform(-1000, 1000, (900, 3))
+    exact = layout._exact(pos, pos, 3600.0, same=True)
+    approx = layout._barnes_hut(pos, 3600.0)
+    error = np.linalg.norm(approx - exact, axis=1)
+    assert np.median(error / np.linalg.norm(exact, axis=1)) < 0.1
+
+
+def test_large_graph_uses_barnes_hut(monkeypatch):
+    monkeypatch.setattr(layout, "EXACT_LIMIT", 20)
+    ids, edges = _ladder(200)
+    pos = layout.force_layout(ids, edges, iterations=30)
+    linked = _mean(math.dist(pos[a], pos[b]) for a, b in edges)
+    assert linked < _mean(math.dist(pos[ids[0]], pos[i]) for i in ids)
+
+
+def test_precompute_layout_seeds_init_positions():
+    c = Canvas(dimensions=2)
+    for node_id in "abcd":
+        c.add_node(node_id)
+    c.add_edges([("a", "b"), ("b", "c"), ("c", "d")])
+    assert c.snapshot()["positions"] == {}
+    assert c.precompute_layout(iterations=20) == 4
+    state = c.state()
+    positions = c.snapshot()["positions"]
+    assert set(positions) == set("abcd")
+    c.remove_node("d")                          # pozice jde s uzlem pryč
+    assert set(c.snapshot()["positions"]) == set("abc")
+    assert set(state.positions) == set("abcd")  # zmražený stav nedotčen
+    c.add_node("e")
+    assert "e" not in c.snapshot()["positions"]
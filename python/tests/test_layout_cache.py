@@ -0,0 +1,120 @@
+"""Cache rozložení podle topologie: hash, podobné grafy, LRU, napojení."""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from viewbase import Canvas, LayoutCache, create_app, protocol
+from viewbase.layoutcache import topology_hash
+
+
+def _ring(n, prefix="n", dimensions=3):
+    c = Canvas(dimensions=dimensions)
+    for i in range(n):
+        c.add_node(f"{prefix}{i}")
+    for i in range(n):
+        c.ensure_edge(f"{prefix}{i}", f"{prefix}{(i + 1) % n}")
+    return c
+
+
+def _place(c):
+    c.set_positions({n.id: (i, 2 * i, 3 * i)
+                     for i, n in enumerate(c.state().node_records())})
+
+
+def test_hash_ignores_order_and_direction():
+    assert topology_hash(["a", "b", "c"], [("a", "b"), ("b", "c")]) == \
+        topology_hash(["c", "a", "b"], [("c", "b"), ("b", "a")])
+    assert topology_hash(["a", "b"], [("a", "b")]) != \
+        topology_hash(["a", "b"], [])
+
+
+def test_exact_topology_restores_positions(tmp_path):
+    cache = LayoutCache(tmp_path)
+    first = _ring(50)
+    _place(first)
+    assert cache.store(first.state())
+    second = _ring(50)
+    assert cache.restore(second) == 50
+    assert second.state().positions == first.state().positions
+    # nová instance nad týmž adresářem (restart služby)
+    assert LayoutCache(tmp_path).restore(_ring(50)) == 50
+
+
+def test_near_identical_topology_reuses_common_nodes(tmp_path):
+    cache = LayoutCache(tmp_path)
+    first = _ring(300)
+    _place(first)
+    cache.store(first.state())
+    second = _ring(300)
+    second.add_node("extra")
+    second.ensure_edge("extra", "n0")
+    assert cache.restore(second) == 300            # společné uzly
+    assert "extra" not in second.state().positions
+    assert cache.restore(_ring(300, prefix="m")) == 0   # jiný graf
+
+
+def test_drifting_graph_overwrites_its_entry(tmp_path):
+    cache = LayoutCache(tmp_path, max_entries=2)
+    reference = _ring(300, prefix="m")
+    _place(reference)
+    ref_key = cache.store(reference.state())
+    live = _ring(300)
+    for i in range(5):                              # upload vedoucího klienta
+        live.add_node(f"new{i}")
+        live.ensure_edge(f"new{i}", "n0")
+        _place(live)
+        key = cache.store(live.state())
+    assert len(cache) == 2
+    assert set(json.loads((tmp_path / "index.json").read_text())) == \
+        {ref_key, key}
+    assert sorted(p.name for p in tmp_path.glob("*.json")) == sorted(
+        [f"{ref_key}.json", f"{key}.json", "index.json"])
+    assert cache.restore(_ring(300, prefix="m")) == 300
+
+
+def test_lru_eviction(tmp_path):
+    cache = LayoutCache(tmp_path, max_entries=2)
+    graphs = [_ring(5, prefix=p) for p in "abc"]
+    for c in graphs:
+        _place(c)
+    keys = [cache.store(graphs[0].state()), cache.store(graphs[1].state())]
+    cache.restore(_ring(5, prefix="a"))            # a je teď nejčerstvější
+    cache.store(graphs[2].state())
+    assert len(cache) == 2
+    assert not (tmp_path / f"{keys[1]}.json").exists()
+    assert set(json.loads((tmp_path / "index.json").read_text())) == \
+        {keys[0], cache.store(graphs[2].state())}
+
+
+def test_invalid_arguments(tmp_path):
+    with pytest.raises(ValueError):
+        LayoutCache(tmp_path, max_entries=0)
+    with pytest.raises(ValueError):
+        LayoutCache(tmp_path, min_similarity=0)
+
+
+def test_precompute_layout_uses_cache(tmp_path):
+    pytest.importorskip("numpy")
+    cache = LayoutCache(tmp_path)
+    first = _ring(20)
+    assert first.precompute_layout(iterations=10, cache=cache) == 20
+    assert len(cache) == 1
+    second = _ring(20)
+    assert second.precompute_layout(iterations=10, cache=cache) == 20
+    assert second.state().positions == first.state().positions
+
+
+def test_server_fills_init_from_cache(tmp_path):
+    cache = LayoutCache(tmp_path)
+    first = _ring(10)
+    _place(first)
+    cache.store(first.state())
+    canvas = _ring(10)
+    hello = protocol.encode({"type": "hello",
+                             "protocol": protocol.PROTOCOL_VERSION})
+    with TestClient(create_app(canvas, layout_cache=cache)) as client:
+        with client.websocket_connect("/ws") as ws:
+            ws.send_text(hello)
+            init = protocol.decode(ws.receive_text())
+    assert len(init["positions"]) == 10
@@ -0,0 +1,117 @@
+"""Streamované loadery – edge list, JSONL, CSV a hromadný _ingest."""
+import json
+
+import pytest
+
+import viewbase as vb
+from viewbase import Canvas
+
+
+def test_edgelist_builds_graph_in_chunks(tmp_path):
+    path = tmp_path / "g.edges"
+    path.write_text("# komentář\n"
+                    "a b\n"
+                    "b c 2.5\n"
+                    'c d {"kind": "lan", "color": "#ff0000"}  # páteř\n'
+                    "d e 1 # jednička\n"
+                    "\n"
+                    "b a\n"                     # duplicitní hrana = merge
+                    "d d\n")                    # self-loop se přeskočí
+    c = Canvas()
+    patches, progress = [], []
+    c.subscribe(on_patch=lambda seq, deltas, labels: patches.append(deltas))
+
+    def on_progress(done, total):
+        progress.append((done, total))
+        c.drain()                               # jako broadcast mezi dávkami
+
+    assert vb.load_edgelist(path, c, chunk_size=2,
+                            progress=on_progress) is c
+    assert sorted(n["id"] for n in c.nodes) == ["a", "b", "c", "d", "e"]
+    assert c.edge("b", "c")["meta"] == {"weight": 2.5}
+    assert c.edge("c", "d")["meta"] == {"kind": "lan", "color": "#ff0000"}
+    assert c.edge("d", "e")["meta"] == {"weight": 1}
+    assert len(c.edges) == 4
+    assert len(patches) >= 2                    # klienti vidí růst
+    assert progress[-1] == (path.stat().st_size, path.stat().st_size)
+
+
+def test_edgelist_rejects_bad_lines(tmp_path):
+    path = tmp_path / "g.edges"
+    path.write_text("a\n")
+    with pytest.raises(ValueError, match=":1:"):
+        vb.load_edgelist(path)
+    path.write_text("a b {nesmysl}\n")
+    with pytest.raises(ValueError):
+        vb.load_edgelist(path)
+    path.write_text('a b {"w": 1} navíc\n')
+    with pytest.raises(ValueError):
+        vb.load_edgelist(path)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 50_000])
+def test_jsonl_nodes_edges_and_merge(tmp_path, chunk_size):
+    path = tmp_path / "g.jsonl"
+    records = [
+        {"source": "r1", "target": "h1", "kind": "lan"},   # hrana před uzly
+        {"id": "r1", "type": "router", "label": "R {ip}", "ip": "10.0.0.1"},
+        {"id": "h1", "meta": {"ip": "10.0.0.2"}},
+        {"id": "h1", "os": "linux"},
+    ]
+    path.write_text("\n".join(json.dumps(r) for r in records) + "\n")
+    c = Canvas()
+    c.add_node("h1", cpu=4)                     # existující uzel se sloučí
+    vb.load_jsonl(path, c, chunk_size=chunk_size)
+    assert c.node("r1") == {"id": "r1", "type": "router", "label": "R 10.0.0.1",
+                            "meta": {"ip": "10.0.0.1"}}
+    assert c.node("h1")["meta"] == {"cpu": 4, "ip": "10.0.0.2", "os": "linux"}
+    assert c.edge("h1", "r1")["meta"] == {"kind": "lan"}
+    assert "router" in c.snapshot()["node_types"]
+    assert [n["id"] for n in c.select(type="router")] == ["r1"]
+
+
+def test_jsonl_conflicting_duplicate_is_error(tmp_path):
+    path = tmp_path / "g.jsonl"
+    path.write_text('{"id": "a", "type": "x"}\n{"id": "a", "type": "y"}\n')
+    with pytest.raises(ValueError):
+        vb.load_jsonl(path)
+    path.write_text('{"name": "a"}\n')
+    with pytest.raises(ValueError, match="'id'"):
+        vb.load_jsonl(path)
+
+
+def test_csv_mixed_nodes_and_edges(tmp_path):
+    path = tmp_path / "g.csv"
+    path.write_text("id,type,source,target,ip,weight\n"
+                    "a,host,,,10.0.0.1,\n"
+                    ",,a,b,,3\n"
+                    "b,,,,10.0.0.2,\n")
+    c = vb.load_csv(path, chunk_size=1)
+    assert c.node("a") == {"id": "a", "type": "host", "label": "a",
+                           "meta": {"ip": "10.0.0.1"}}
+    assert c.node("b")["meta"] == {"ip": "10.0.0.2"}
+    assert c.edge("a", "b")["meta"] == {"weight": 3}
+
+
+def test_csv_keeps_identifier_like_numbers_as_text(tmp_path):
+    path = tmp_path / "g.csv"
+    path.write_text("id,zip,agent,code,ratio,count\n"
+                    "a,01234,007,1e5,0.5,12\n")
+    meta = vb.load_csv(path).node("a")["meta"]
+    assert meta == {"zip": "01234", "agent": "007", "code": "1e5",
+                    "ratio": 0.5, "count": 12}
+
+
+def test_csv_requires_known_header(tmp_path):
+    path = tmp_path / "g.csv"
+    path.write_text("name,ip\nx,1\n")
+    with pytest.raises(ValueError):
+        vb.load_csv(path)
+
+
+def test_ingest_respects_max_nodes():
+    c = Canvas(max_nodes=3)
+    c._ingest([], [(f"n{i}", f"n{i + 1}", {}) for i in range(10)])
+    assert len(c.nodes) == 3
+    assert all(c.has_node(e["source"]) and c.has_node(e["target"])
+               for e in c.edges)
@@ -0,0 +1,98 @@
+"""track_metrics – odvozené atributy (stupeň, komponenty, centrality)."""
+import pytest
+
+from viewbase import Canvas
+from viewbase.metrics import UnionFind, betweenness, pagerank
+
+
+def _path(c, *ids):
+    for node_id in ids:
+        c.ensure_node(node_id)
+    for a, b in zip(ids, ids[1:]):
+        c.add_edge(a, b)
+
+
+def test_degree_follows_every_edge_change():
+    c = Canvas()
+    c.add_node("a")
+    c.track_metrics("degree")
+    assert c.node("a")["meta"] == {"degree": 0}
+    _path(c, "a", "b", "c")
+    assert [c.node(i)["meta"]["degree"] for i in "abc"] == [1, 2, 1]
+    c.remove_node("c")
+    assert c.node("b")["meta"]["degree"] == 1
+    c.node_label("spojení: {degree}")
+    assert c.node("b")["label"] == "spojení: 1"
+    c.drain()
+    c.remove_edge("a", "b")
+    _, deltas = c.drain()
+    assert sorted(n["id"] for n in deltas["update_nodes"]) == ["a", "b"]
+
+
+def test_style_is_derived_from_metrics():
+    c = Canvas()
+    c.track_metrics("degree", style=lambda m: {"size": 1 + m["degree"]})
+    _path(c, "hub", "x")
+    c.add_node("y")
+    c.add_edge("hub", "y")
+    assert c.node("hub")["meta"] == {"degree": 2, "size": 3}
+    assert c.node("y")["meta"]["size"] == 2
+
+
+def test_sync_keeps_derived_attributes():
+    c = Canvas()
+    c.track_metrics("degree")
+    c.sync([{"id": "a", "os": "linux"}, "b"], [("a", "b")])
+    c.sync([{"id": "a", "os": "bsd"}, "b"], [("a", "b")])
+    assert c.node("a")["meta"] == {"os": "bsd", "degree": 1}
+
+
+def test_heavy_metrics_refresh_only_after_topology_change():
+    c = Canvas()
+    c.track_metrics("component", "pagerank", "betweenness", samples=None)
+    assert [t["name"] for t in c._tasks] == ["metrics"]
+    _path(c, "a", "b", "c")
+    _path(c, "x", "y")
+    assert c.refresh_metrics() is True
+    assert c.refresh_metrics() is False          # beze změny nic
+    meta = {i: c.node(i)["meta"] for i in "abcxy"}
+    assert [meta[i]["component"] for i in "abcxy"] == [0, 0, 0, 1, 1]
+    assert meta["b"]["betweenness"] > meta["a"]["betweenness"] == 0
+    assert meta["b"]["pagerank"] > meta["a"]["pagerank"]
+    c.remove_edge("a", "b")                      # union-find se přestaví
+    c.drain()
+    assert c.refresh_metrics() is True
+    _, deltas = c.drain()
+    assert c.node("a")["meta"]["component"] == 2
+    assert "a" in [n["id"] for n in deltas["update_nodes"]]
+
+
+def test_track_metrics_validation():
+    c = Canvas()
+    with pytest.raises(ValueError, match="neznámá"):
+        c.track_metrics("closeness")
+    with pytest.raises(ValueError):
+        c.track_metrics()
+    c.track_metrics("degree")
+    with pytest.raises(ValueError):
+        c.track_metrics("degree")
+    assert c.refresh_metrics() is False          # jen stupeň: nic na pozadí
+
+
+def test_union_find():
+    uf = UnionFind.build([("a", "b"), ("c", "d")])
+    assert uf.connected("a", "b") and not uf.connected("a", "c")
+    uf.union("b", "d")
+    assert uf.connected("a", "c")
+    assert uf.find("lonely") == "lonely"
+    uf.discard("a")                              # není singleton – zůstane
+    assert uf.connected("a", "d")
+
+
+def test_centralities_match_reference_values():
+    star = {"c": ["l1", "l2", "l3"], "l1": ["c"], "l2": ["c"], "l3": ["c"]}
+    ranks = pagerank(star)
+    assert sum(ranks.values()) == pytest.approx(1.0)
+    # střed: c = 0.15/4 + 0.85·(1 − c) → c = 0.8875 / 1.85
+    assert ranks["c"] == pytest.approx(0.8875 / 1.85, abs=1e-5)
+    assert betweenness(star) == {"c": 1.0, "l1": 0.0, "l2": 0.0, "l3": 0.0}
@@ -0,0 +1,84 @@
+"""Více canvasů v jednom procesu: /c/<jméno>/ws, líné vytváření."""
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from viewbase import Canvas, create_app, protocol
+from viewbase.server import _quiet
+
+HELLO = protocol.encode({"type": "hello",
+                         "protocol": protocol.PROTOCOL_VERSION})
+
+
+def _init(ws):
+    ws.send_text(HELLO)
+    return protocol.decode(ws.receive_text())
+
+
+def test_named_canvases_have_separate_clients():
+    a, b = Canvas(), Canvas()
+    a.add_node("jen-a")
+    b.add_node("jen-b")
+    a.drain()
+    b.drain()
+    with TestClient(create_app(canvases={"a": a, "b": b})) as client:
+        with client.websocket_connect("/c/a/ws") as wa, \
+                client.websocket_connect("/c/b/ws") as wb:
+            assert [n["id"] for n in _init(wa)["nodes"]] == ["jen-a"]
+            assert [n["id"] for n in _init(wb)["nodes"]] == ["jen-b"]
+            b.add_node("nový-b")
+            patch = protocol.decode(wb.receive_text())
+            assert [n["id"] for n in patch["add_nodes"]] == ["nový-b"]
+            a.add_node("nový-a")                # klient a vidí jen svůj
+            patch = protocol.decode(wa.receive_text())
+            assert [n["id"] for n in patch["add_nodes"]] == ["nový-a"]
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect("/c/c/ws") as ws:
+                ws.receive_text()
+        assert client.post("/c/c/api/event", json={
+            "event": "x"}).json()["ok"] is False
+
+
+def test_factory_creates_lazily_and_app_closes_owned():
+    created = {}
+
+    def factory(name):
+        if name.startswith("zakázaný"):
+            return None
+        canvas = created[name] = Canvas()
+        canvas.add_node(f"{name}-uzel")
+        return canvas
+
+    root = Canvas()
+    with TestClient(create_app(root, canvases=factory)) as client:
+        assert created == {}                    # nic předem
+        with client.websocket_connect("/c/t1/ws") as ws:
+            assert [n["id"] for n in _init(ws)["nodes"]] == ["t1-uzel"]
+        with client.websocket_connect("/c/t1/ws") as ws:
+            _init(ws)
+        assert list(created) == ["t1"]          # týž canvas i podruhé
+        with client.websocket_connect("/ws") as ws:
+            assert _init(ws)["nodes"] == []     # kořenový canvas zůstává
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect("/c/zakázaný/ws") as ws:
+                ws.receive_text()
+        response = client.get("/c/t2", follow_redirects=False)
+        assert response.headers["location"] == "/c/t2/"
+    assert created["t1"]._closed                # aplikace zavřela svůj
+    assert not root._closed
+
+
+def test_quiet_canvas_is_skipped():
+    c = Canvas()
+    assert _quiet(c)
+    c.add_node("a")
+    assert not _quiet(c)
+    c.drain()
+    assert _quiet(c)
+
+
+def test_create_app_requires_canvas():
+    with pytest.raises(ValueError):
+        create_app()
+    with pytest.raises(ValueError):
+        create_app(canvases={"s mezerou": Canvas()})
@@ -0,0 +1,105 @@
+"""register_path: cesty toků validované jednou, toky je odkazují id."""
+import pytest
+
+from viewbase import Canvas, Journal, protocol
+
+
+def _chain(*ids):
+    c = Canvas()
+    for node_id in ids:
+        c.add_node(node_id)
+    c.add_edges(list(zip(ids, ids[1:])))
+    return c
+
+
+def test_register_path_dedupes_and_emits_define_path():
+    c = _chain("a", "b", "c")
+    c.drain_actions()
+    path_id = c.register_path(["a", "b", "c"])
+    assert c.register_path(["a", "b", "c"]) == path_id
+    assert c.register_path(["c", "b", "a"]) != path_id     # směr toku se liší
+    actions = c.drain_actions()
+    assert actions[0] == {"action": "define_path", "path_id": path_id,
+                          "path": ["a", "b", "c"]}
+    assert len(actions) == 2
+    assert c.snapshot()["paths"][path_id] == ["a", "b", "c"]
+
+
+def test_register_path_validates_edges():
+    c = _chain("a", "b", "c")
+    with pytest.raises(ValueError, match="neexistuje"):
+        c.register_path(["a", "c"])
+
+
+def test_flow_by_path_id_sends_only_the_id():
+    c = _chain("a", "b", "c")
+    path_id = c.register_path(["a", "b", "c"])
+    c.drain_actions()
+    c.flow(path_id=path_id, count=1)
+    flow_id = c.flow(path_id=path_id, count=None)
+    once, persistent = c.drain_actions()
+    assert once["path_id"] == path_id and "path" not in once
+    assert persistent["flow_id"] == flow_id
+    # init nese i celou cestu – klient bez define_path tok přesto zobrazí
+    assert c.snapshot()["flows"][0]["path"] == ["a", "b", "c"]
+    with pytest.raises(ValueError):
+        c.flow("a", "c", path_id=path_id)
+
+
+def test_removed_edge_drops_path_and_its_flows():
+    c = _chain("a", "b", "c", "d")
+    path_id = c.register_path(["a", "b", "c"])
+    other = c.register_path(["c", "d"])
+    c.flow(path_id=path_id, count=None)
+    c.drain_actions()
+    c.remove_edge("b", "c")
+    kinds = [a["action"] for a in c.drain_actions()]
+    assert sorted(kinds) == ["drop_path", "stop_flow"]
+    assert list(c.snapshot()["paths"]) == [other]
+    with pytest.raises(ValueError, match="neexistuje"):
+        c.flow(path_id=path_id)
+    c.add_edge("b", "c")                        # znovu platí, nové id
+    assert c.register_path(["a", "b", "c"]) != path_id
+
+
+def test_apply_action_mirrors_registered_paths():
+    c = _chain("a", "b", "c")
+    mirror = _chain("a", "b", "c")
+    path_id = c.register_path(["a", "b", "c"])
+    c.flow(path_id=path_id, count=None)
+    c.remove_node("c")
+    for action in c.drain_actions():
+        if protocol.is_state_action(action) or action["action"] == "flow":
+            mirror.apply_action(action)
+            if action["action"] == "flow":
+                assert mirror.snapshot()["paths"] == {path_id: ["a", "b", "c"]}
+                assert mirror.snapshot()["flows"][0]["path"] == ["a", "b", "c"]
+    mirror.remove_node("c")
+    assert mirror.snapshot()["paths"] == {}
+    assert mirror.snapshot()["flows"] == []
+
+
+def test_registered_paths_survive_save_load_and_journal(tmp_path):
+    c = _chain("a", "b", "c")
+    path_id = c.register_path(["a", "b"])
+    c.save(tmp_path / "g.vbs")
+    assert Canvas.load(tmp_path / "g.vbs").snapshot()["paths"] == {
+        path_id: ["a", "b"]}
+
+    journal = Journal(c, tmp_path / "j")
+    later = c.register_path(["b", "c"])
+    c.drain()
+    c.drain_actions()
+    journal.close()
+    recovered = Journal.recover(tmp_path / "j")
+    assert recovered.snapshot()["paths"] == {path_id: ["a", "b"],
+                                             later: ["b", "c"]}
+    recovered.flow(path_id=later)
+
+
+def test_has_path():
+    c = _chain("a", "b")
+    path_id = c.register_path(["a", "b"])
+    assert c.has_path(path_id)
+    c.remove_edge("a", "b")
+    assert not c.has_path(path_id)
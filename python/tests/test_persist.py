@@ -0,0 +1,92 @@
+"""save/load – binární sloupcový snapshot na disku."""
+import pytest
+
+from viewbase import Canvas
+
+
+def _rich():
+    c = Canvas(title="Síť", dimensions=2, theme="cyber")
+    c.define_type("router", shape="box", color="#05ffa1")
+    c.define_flow_type("dns", color="#ffd166")
+    c.node_label("{name}")
+    c.detail_window(rows=[("IP", "ip")])
+    c.set_edge_style("spline", 0.4)
+    c.add_node("r1", type="router", name="Páteř", ip="10.0.0.1")
+    c.add_node("h1", label="host {ip}", ip="10.0.0.2", tags=["a", 1])
+    c.add_node("h2", ip="10.0.0.3", nested={"x": None, "y": 2.5})
+    c.add_edge("r1", "h1", kind="lan")
+    c.add_edge("r1", "h2")
+    c.flow("h1", "h2", type="dns", count=None)
+    c.drain()
+    return c
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_save_load_roundtrip(tmp_path, compress):
+    c = _rich()
+    path = tmp_path / "graf.vbs"
+    c.save(path, compress=compress)
+    loaded = Canvas.load(path)
+    assert loaded.snapshot() == c.snapshot()
+    assert loaded.drain() is None             # načtení nevyrábí delty
+    loaded.add_edge("h1", "h2")               # indexy/sousedé fungují dál
+    assert loaded.select(type="router")[0]["id"] == "r1"
+    loaded.remove_node("r1")
+    assert loaded.snapshot()["edges"] == [
+        {"source": "h1", "target": "h2", "meta": {}}]
+
+
+def test_load_respects_canvas_kwargs(tmp_path):
+    c = Canvas()
+    for i in range(10):
+        c.add_node(f"n{i}")
+    c.save(tmp_path / "g.vbs")
+    loaded = Canvas.load(tmp_path / "g.vbs", max_nodes=4)
+    assert [n["id"] for n in loaded.nodes] == ["n6", "n7", "n8", "n9"]
+    assert loaded.config["title"] == "viewbase"
+    renamed = Canvas.load(tmp_path / "g.vbs", title="x", theme="cyber")
+    assert renamed.config["title"] == "x"     # explicitní kwargs vyhrají
+    assert renamed.config["theme"] == Canvas(theme="cyber").config["theme"]
+
+
+def test_load_eviction_drops_flows_without_deltas(tmp_path):
+    c = Canvas()
+    for node_id in "abcd":
+        c.add_node(node_id)
+    for source, target in ("ab", "bc", "cd"):
+        c.add_edge(source, target)
+    c.flow("a", "c", count=None)              # vede přes vyhozené a, b
+    c.flow("c", "d", count=None)
+    c.register_path(["a", "b"])
+    c.save(tmp_path / "g.vbs")
+    loaded = Canvas.load(tmp_path / "g.vbs", max_nodes=2)
+    state = loaded.snapshot()
+    assert [n["id"] for n in state["nodes"]] == ["c", "d"]
+    assert [f["path"] for f in state["flows"]] == [["c", "d"]]
+    assert state["paths"] == {}
+    assert loaded.drain() is None             # klienti a, b nikdy neviděli
+    assert loaded.drain_actions() == []
+
+
+def test_load_eviction_drops_positions_and_saves_again(tmp_path):
+    c = Canvas()
+    for node_id in "abc":
+        c.add_node(node_id)
+    c.set_positions({"a": (1, 0, 0), "b": (2, 0, 0), "c": (3, 0, 0)})
+    c.save(tmp_path / "g.vbs")
+    loaded = Canvas.load(tmp_path / "g.vbs", max_nodes=2)
+    assert set(loaded.snapshot()["positions"]) == {"b", "c"}
+    loaded.save(tmp_path / "h.vbs")
+    assert Canvas.load(tmp_path / "h.vbs").snapshot() == loaded.snapshot()
+
+
+def test_empty_canvas_roundtrip(tmp_path):
+    Canvas().save(tmp_path / "e.vbs")
+    assert Canvas.load(tmp_path / "e.vbs").nodes == []
+
+
+def test_load_rejects_foreign_file(tmp_path):
+    path = tmp_path / "x.vbs"
+    path.write_bytes(b"not a snapshot at all")
+    with pytest.raises(ValueError):
+        Canvas.load(path)
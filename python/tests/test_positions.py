@@ -0,0 +1,121 @@
+"""Pozice uzlů od vedoucího klienta: set_positions, init, save/load, server."""
+import json
+import math
+import struct
+import time
+from array import array
+
+import pytest
+from fastapi.testclient import TestClient
+
+from viewbase import Canvas, create_app, protocol
+
+
+def _frame(positions):
+    header = json.dumps({"type": "positions",
+                         "ids": list(positions)}).encode()
+    head = struct.pack("<I", len(header)) + header
+    head += b"\0" * (-len(head) % 4)
+    return head + array("f", [c for p in positions.values()
+                              for c in p]).tobytes()
+
+
+def _hello():
+    return protocol.encode({"type": "hello",
+                            "protocol": protocol.PROTOCOL_VERSION})
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "nedočkal jsem se"
+        time.sleep(0.01)
+
+
+def test_set_positions_skips_unknown_and_invalid():
+    c = Canvas(dimensions=2)
+    for node_id in "abc":
+        c.add_node(node_id)
+    taken = c.set_positions({"a": (1.04, 2, 9), "b": (math.nan, 0),
+                             "x": (0, 0), "c": [5, 6]})
+    assert taken == 2
+    assert c.snapshot()["positions"] == {"a": (1.0, 2.0, 0.0),
+                                         "c": (5.0, 6.0, 0.0)}
+
+
+def test_new_node_spawns_near_positioned_neighbour():
+    c = Canvas()
+    c.add_node("hub")
+    c.set_positions({"hub": (100, 200, 300)})
+    c.add_node("leaf")
+    assert "leaf" not in c.snapshot()["positions"]
+    c.add_edge("leaf", "hub")
+    x, y, z = c.snapshot()["positions"]["leaf"]
+    assert math.dist((x, y, z), (100, 200, 300)) < 20
+
+
+def test_positions_survive_save_load(tmp_path):
+    c = Canvas()
+    for node_id in "abc":
+        c.add_node(node_id)
+    c.set_positions({"a": (1.5, -2, 3), "c": (0, 0, 7.25)})
+    c.save(tmp_path / "g.vbs")
+    loaded = Canvas.load(tmp_path / "g.vbs")
+    assert loaded.snapshot()["positions"] == {"a": (1.5, -2.0, 3.0),
+                                              "c": (0.0, 0.0, 7.2)}
+
+
+def test_topology_and_positions_versions():
+    c = Canvas()
+    topology, positions = c.topology_version, c.positions_version
+    c.add_node("a")
+    c.add_node("b")
+    assert c.topology_version > topology
+    topology = c.topology_version
+    c.set_positions({"a": (1, 2, 3)})
+    assert c.positions_version > positions
+    assert c.topology_version == topology      # pozice graf nemění
+    positions = c.positions_version
+    c.remove_node("a")
+    assert c.topology_version > topology
+    assert c.positions_version > positions
+
+
+def test_decode_positions_rejects_malformed_frames():
+    ids, coords = protocol.decode_positions(_frame({"a": (1, 2, 3)}))
+    assert ids == ["a"] and list(coords) == [1, 2, 3]
+    with pytest.raises(ValueError):
+        protocol.decode_positions(b"\x01")
+    with pytest.raises(ValueError):
+        protocol.decode_positions(_frame({"a": (1, 2, 3)})[:-4])
+    bad = json.dumps([1]).encode()
+    with pytest.raises(ValueError):
+        protocol.decode_positions(struct.pack("<I", len(bad)) + bad)
+
+
+def test_leader_uploads_positions_into_next_init():
+    canvas = Canvas()
+    for node_id in "ab":
+        canvas.add_node(node_id)
+    with TestClient(create_app(canvas)) as client:
+        with client.websocket_connect("/ws") as first:
+            first.send_text(_hello())
+            assert protocol.decode(first.receive_text())["upload_positions"]
+            with client.websocket_connect("/ws") as second:
+                second.send_text(_hello())
+                init = protocol.decode(second.receive_text())
+                assert init["upload_positions"] is None
+                second.send_bytes(_frame({"a": (9, 9, 9)}))   # nevedoucí
+                first.send_bytes(_frame({"a": (1, 2, 3), "b": (4, 5, 6)}))
+                _wait_for(lambda: len(canvas.state().positions) == 2)
+                assert canvas.state().positions["a"] == (1.0, 2.0, 3.0)
+                first.close()
+                message = protocol.decode(second.receive_text())
+                assert message == protocol.leader_message(
+                    message["interval"])
+        with client.websocket_connect("/ws") as third:
+            third.send_text(_hello())
+            init = protocol.decode(third.receive_text())
+            assert init["positions"] == {"a": [1.0, 2.0, 3.0],
+                                         "b": [4.0, 5.0, 6.0]}
+            assert init["upload_positions"]     # ostatní odešli → vede
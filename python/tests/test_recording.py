@@ -0,0 +1,125 @@
+"""Recorder/Replay – záznam relace s keyframy, převíjení a přehrávání."""
+import json
+import threading
+import time
+
+import pytest
+
+from viewbase import Canvas, Recorder, Replay
+
+
+def _graph(state):
+    return state["nodes"], state["edges"], state["flows"], state["paths"]
+
+
+def _record(path, **kwargs):
+    """Nahraj krátkou relaci; vrátí stav grafu po každém patchi podle seq."""
+    c = Canvas()
+    c.define_type("router", shape="box")
+    c.set_theme("cyber")
+    recorder = Recorder(c, path, **kwargs)
+    states = {0: _graph(c.snapshot())}
+
+    def pump():
+        time.sleep(0.002)                     # rozlišitelné časy patchů
+        c.drain_actions()
+        c.drain()
+        states[c.state().seq] = _graph(c.snapshot())
+
+    c.add_node("a", type="router", label="R {n}", n=1)
+    c.add_node("b")
+    c.add_edge("a", "b")
+    c.register_path(["b", "a"])
+    pump()
+    c.add_node("c")
+    c.add_edge("b", "c")
+    c.flow(path=["a", "b", "c"], count=None)
+    c.focus("c")
+    pump()
+    c.incr("a", "n", 2)
+    c.remove_node("b")                        # zruší hrany i trvalý tok
+    c.set_edge_style("spline", 0.5)
+    pump()
+    recorder.close()
+    return states
+
+
+def _patch_times(path):
+    with open(path, "rb") as fh:
+        records = [json.loads(line) for line in fh][1:]
+    return {r["seq"]: r["t"] for r in records if "seq" in r}
+
+
+@pytest.mark.parametrize("keyframe_every", [3600.0, 1e-9])
+def test_seek_reconstructs_each_patch(tmp_path, keyframe_every):
+    path = tmp_path / "relace.jsonl"
+    states = _record(path, keyframe_every=keyframe_every)
+    replay = Replay(path)
+    for seq, t in _patch_times(path).items():
+        replay.seek(t)
+        assert _graph(replay.canvas.snapshot()) == states[seq]
+    replay.seek(0)
+    assert _graph(replay.canvas.snapshot()) == states[0]
+    assert replay.canvas.snapshot()["node_types"] == {"router": {"shape": "box"}}
+    replay.seek(replay.duration)
+    snapshot = replay.canvas.snapshot()
+    assert _graph(snapshot) == states[3]
+    assert snapshot["config"]["edge_style"]["style"] == "spline"
+    assert snapshot["nodes"][0]["label"] == "R 3"
+
+
+def test_keyframes_are_indexed(tmp_path):
+    path = tmp_path / "relace.jsonl"
+    _record(path, keyframe_every=1e-9)
+    index = (tmp_path / "relace.jsonl.idx").read_text().splitlines()
+    assert len(index) == 4                    # start + po každém patchi
+    with open(path, "rb") as fh:
+        for line in index:
+            t, offset = json.loads(line)
+            fh.seek(offset)
+            assert json.loads(fh.readline())["t"] == t
+
+
+def test_missing_index_is_rebuilt(tmp_path):
+    path = tmp_path / "relace.jsonl"
+    states = _record(path, keyframe_every=1e-9)
+    (tmp_path / "relace.jsonl.idx").unlink()
+    replay = Replay(path)
+    replay.seek(replay.duration)
+    assert _graph(replay.canvas.snapshot()) == states[3]
+
+
+def test_play_applies_everything_into_given_canvas(tmp_path):
+    path = tmp_path / "relace.jsonl"
+    states = _record(path)
+    target = Canvas()
+    replay = Replay(path, target)
+    target.drain_actions()
+    replay.play(speed=1e6)
+    assert replay.position == replay.duration
+    assert _graph(target.snapshot()) == states[3]
+    kinds = [a["action"] for a in target.drain_actions()]
+    assert "focus" in kinds and "flow" in kinds   # i jednorázové akce
+
+
+def test_stop_interrupts_play(tmp_path):
+    path = tmp_path / "relace.jsonl"
+    _record(path)
+    replay = Replay(path)
+    replay.duration = 3600.0                  # umělá pauza před koncem
+    with open(path, "ab") as fh:
+        fh.write(b'{"t":3600.0,"actions":[]}\n')
+    replay.seek(replay.duration - 1800)
+    worker = threading.Thread(target=replay.play)
+    worker.start()
+    replay.stop()
+    worker.join(timeout=5)
+    assert not worker.is_alive()
+    assert replay.position < 3600.0
+
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / "cizi.jsonl"
+    path.write_text('{"x": 1}\n')
+    with pytest.raises(ValueError):
+        Replay(path)
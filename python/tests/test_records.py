@@ -0,0 +1,54 @@
+"""Kompaktní záznamy uzlů/hran – __slots__ a internované řetězce."""
+import gc
+
+from viewbase import Canvas
+from viewbase.records import gc_paused
+
+
+def test_records_have_no_instance_dict():
+    c = Canvas()
+    c.add_node("a", ip="10.0.0.1")
+    c.add_node("b")
+    c.add_edge("a", "b", kind="lan")
+    assert not hasattr(c._nodes["a"], "__dict__")
+    assert not hasattr(c._edges[("a", "b")], "__dict__")
+
+
+def test_ids_types_and_meta_keys_are_shared():
+    c = Canvas()
+    c.define_type("host")
+    key_a = "".join(["i", "p"])            # dva různé objekty "ip"
+    key_b = "".join(["i", "p"])
+    c.add_node("".join(["n", "1"]), type="".join(["ho", "st"]), **{key_a: 1})
+    c.add_node("n2", type="host", **{key_b: 2})
+    c.add_edge("n1", "n2")
+    n1, n2 = c._nodes["n1"], c._nodes["n2"]
+    assert n1.type is n2.type
+    assert next(iter(n1.meta)) is next(iter(n2.meta))
+    source, _ = next(iter(c._edges))
+    assert source is n1.id                 # klíč hrany sdílí id uzlu
+
+
+def test_public_reads_unchanged():
+    c = Canvas()
+    c.add_node("a", label="{x}", x=1)
+    assert c.node("a") == {"id": "a", "type": None, "label": "1",
+                           "meta": {"x": 1}}
+
+
+def test_gc_pause_overlapping_exits_restore_gc_once():
+    assert gc.isenabled()
+    first, second = gc_paused(), gc_paused()
+    first.__enter__()
+    second.__enter__()                     # druhé vlákno uprostřed pauzy
+    first.__exit__(None, None, None)       # první skončí dřív
+    assert not gc.isenabled()              # druhé pořád staví záznamy
+    second.__exit__(None, None, None)
+    assert gc.isenabled()
+    gc.disable()
+    try:
+        with gc_paused():
+            pass
+        assert not gc.isenabled()          # vypnutý GC se nezapne
+    finally:
+        gc.enable()
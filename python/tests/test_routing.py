@@ -0,0 +1,114 @@
+"""Směrování toků: cache cest, obousměrné BFS a vážená cesta (Dijkstra)."""
+import pytest
+
+from viewbase import Canvas
+
+
+def _canvas(edges, **meta):
+    c = Canvas()
+    for node_id in sorted({n for e in edges for n in e[:2]}):
+        c.add_node(node_id)
+    for source, target, *rest in edges:
+        c.add_edge(source, target, **(rest[0] if rest else {}))
+    return c
+
+
+def _path(c):
+    return c.drain_actions()[-1]["path"]
+
+
+def test_bidirectional_bfs_finds_shortest_path():
+    # dlouhá okružní cesta a-b-c-d-e vs. zkratka a-x-e
+    c = _canvas([("a", "b"), ("b", "c"), ("c", "d"), ("d", "e"),
+                 ("a", "x"), ("x", "e")])
+    c.flow("a", "e")
+    assert _path(c) == ["a", "x", "e"]
+    c.flow("e", "a")
+    assert _path(c) == ["e", "x", "a"]
+    c.flow("a", "b")
+    assert _path(c) == ["a", "b"]
+
+
+def test_bidirectional_bfs_on_long_chain():
+    ids = [f"n{i}" for i in range(50)]
+    c = _canvas(list(zip(ids, ids[1:])))
+    c.flow("n0", "n49")
+    assert _path(c) == ids
+
+
+def test_repeated_flow_uses_cache_until_topology_changes(monkeypatch):
+    c = _canvas([("a", "b"), ("b", "c"), ("c", "d")])
+    calls = []
+    search = Canvas._bidirectional_bfs
+    monkeypatch.setattr(Canvas, "_bidirectional_bfs",
+                        lambda self, s, t: calls.append(1) or search(self, s, t))
+    c.flow("a", "d")
+    c.flow("a", "d")
+    assert len(calls) == 1
+    c.add_edge("a", "d")                        # nová zkratka zneplatní cache
+    c.flow("a", "d")
+    assert len(calls) == 2
+    assert _path(c) == ["a", "d"]
+    c.remove_edge("a", "d")
+    c.flow("a", "d")
+    assert _path(c) == ["a", "b", "c", "d"]
+
+
+def test_cached_route_is_not_shared_with_actions():
+    c = _canvas([("a", "b"), ("b", "c")])
+    c.flow("a", "c")
+    _path(c).append("zz")
+    c.flow("a", "c")
+    assert _path(c) == ["a", "b", "c"]
+
+
+def test_weighted_flow_follows_cheapest_path():
+    c = _canvas([("a", "x", {"latency": 50}), ("x", "d", {"latency": 50}),
+                 ("a", "b", {"latency": 1}), ("b", "c", {"latency": 1}),
+                 ("c", "d", {"latency": 1})])
+    c.flow("a", "d")
+    assert _path(c) == ["a", "x", "d"]           # nejméně skoků
+    c.flow("a", "d", weight="latency")
+    assert _path(c) == ["a", "b", "c", "d"]      # nejnižší součet vah
+    c.ensure_edge("b", "c", latency=500)        # změna meta zneplatní váženou cache
+    c.flow("a", "d", weight="latency")
+    assert _path(c) == ["a", "x", "d"]
+
+
+def test_weighted_cache_survives_unrelated_edge_counters(monkeypatch):
+    c = _canvas([("a", "x", {"latency": 50}), ("x", "d", {"latency": 50}),
+                 ("a", "b", {"latency": 1}), ("b", "d", {"latency": 1})])
+    calls = []
+    search = Canvas._dijkstra
+    monkeypatch.setattr(Canvas, "_dijkstra", lambda self, s, t, w:
+                        calls.append(1) or search(self, s, t, w))
+    c.flow("a", "d", weight="latency")
+    for _ in range(3):
+        c.incr_edge("a", "b", "packets")        # čítač mimo váhu
+        c.ensure_edge("b", "d", bytes=1500)
+        c.flow("a", "d", weight="latency")
+    assert len(calls) == 1
+    c.incr_edge("a", "b", "latency", 500)       # váha se změnila
+    c.flow("a", "d", weight="latency")
+    assert len(calls) == 2 and _path(c) == ["a", "x", "d"]
+    c.apply_patch({"add_edges": [{"source": "a", "target": "b",
+                                  "meta": {"latency": 1}}]})
+    c.flow("a", "d", weight="latency")
+    assert len(calls) == 3 and _path(c) == ["a", "b", "d"]
+
+
+def test_weighted_flow_missing_key_counts_as_one():
+    c = _canvas([("a", "b"), ("b", "c"), ("a", "c", {"cost": 5})])
+    c.flow("a", "c", weight="cost")
+    assert _path(c) == ["a", "b", "c"]
+
+
+def test_weighted_flow_rejects_bad_weights():
+    c = _canvas([("a", "b", {"cost": -1})])
+    with pytest.raises(ValueError, match="nezáporné"):
+        c.flow("a", "b", weight="cost")
+    c.ensure_edge("a", "b", cost="levně")
+    with pytest.raises(ValueError, match="nezáporné"):
+        c.flow("a", "b", weight="cost")
+    with pytest.raises(ValueError, match="weight"):
+        c.flow(path=["a", "b"], weight="cost")
@@ -0,0 +1,61 @@
+"""select() a sekundární indexy (create_index)."""
+import pytest
+
+from viewbase import Canvas
+
+
+def _net(indexed: bool) -> Canvas:
+    c = Canvas()
+    c.define_type("router")
+    c.define_type("host")
+    if indexed:
+        c.create_index("status")
+    c.add_node("r1", type="router", status="busy")
+    c.add_node("r2", type="router", status="idle")
+    c.add_node("h1", type="host", status="busy")
+    c.add_node("x", tags=["a"])
+    return c
+
+
+def ids(nodes):
+    return sorted(n["id"] for n in nodes)
+
+
+@pytest.mark.parametrize("indexed", [False, True])
+def test_select_by_type_and_where(indexed):
+    c = _net(indexed)
+    assert ids(c.select(type="router")) == ["r1", "r2"]
+    assert ids(c.select(where={"status": "busy"})) == ["h1", "r1"]
+    assert ids(c.select(type="router", where={"status": "busy"})) == ["r1"]
+    assert ids(c.select(where={"tags": ["a"]})) == ["x"]   # nehashovatelné
+    assert ids(c.select()) == ["h1", "r1", "r2", "x"]
+
+
+@pytest.mark.parametrize("indexed", [False, True])
+def test_indexes_follow_update_incr_and_remove(indexed):
+    c = _net(indexed)
+    c.update_node("r2", status="busy")
+    c.ensure_node("r1", status="idle")
+    assert ids(c.select(where={"status": "busy"})) == ["h1", "r2"]
+    c.remove_node("h1")
+    assert ids(c.select(where={"status": "busy"})) == ["r2"]
+    c.incr("r1", "hops")
+    c.incr("r1", "hops")
+    assert ids(c.select(where={"hops": 2})) == ["r1"]
+
+
+def test_index_created_late_covers_existing_nodes():
+    c = _net(False)
+    c.create_index("status", types=True)
+    assert c._index.candidates("router", {}) == ["r1", "r2"]
+    assert ids(c.select(type="router", where={"status": "busy"})) == ["r1"]
+    c.create_index("hops")
+    c.incr("r2", "hops", 3)
+    assert c._index.candidates(None, {"hops": 3}) == ["r2"]
+
+
+def test_select_returns_copies():
+    c = _net(True)
+    (node,) = c.select(type="host")
+    node["meta"]["status"] = "hacked"
+    assert c.node("h1")["meta"]["status"] == "busy"
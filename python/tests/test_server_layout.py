@@ -0,0 +1,82 @@
+"""Serverový layout pro slabé klienty: PositionStream a proudění rámců."""
+import json
+import struct
+
+import pytest
+from fastapi.testclient import TestClient
+
+np = pytest.importorskip("numpy")
+
+from viewbase import Canvas, create_app, protocol  # noqa: E402
+from viewbase.layout import PositionStream  # noqa: E402
+
+
+def _decode(frame, last=None):
+    """Dekódování rámce jako na klientovi: (hlavička, absolutní Int16)."""
+    (length,) = struct.unpack_from("<I", frame)
+    header = json.loads(frame[4:4 + length])
+    start = (4 + length + 3) // 4 * 4
+    values = np.frombuffer(frame[start:], dtype="<i2").astype(np.int64)
+    if not header["keyframe"]:
+        values = last + values
+    return header, values
+
+
+def test_stream_keyframe_then_deltas():
+    stream = PositionStream()
+    ids = ["a", "b"]
+    coords = np.array([[10.0, -20.0, 0.0], [300.0, 5.5, -7.0]])
+    header, q = _decode(stream.encode(ids, coords))
+    assert header["keyframe"] and header["ids"] == ids
+    assert np.allclose(q.reshape(-1, 3) * header["scale"], coords,
+                       atol=header["scale"])
+    assert stream.encode(ids, coords) is None           # nic se nepohnulo
+    moved = coords + [[1.0, 0.0, 0.0], [0.0, -2.0, 0.0]]
+    frame = stream.encode(ids, moved)
+    delta, q2 = _decode(frame, q)
+    assert not delta["keyframe"] and "ids" not in delta
+    assert np.allclose(q2.reshape(-1, 3) * header["scale"], moved,
+                       atol=header["scale"])
+    assert len(frame) < 200                             # 2 B na složku
+
+
+def test_stream_keyframe_on_growth_and_new_ids():
+    stream = PositionStream()
+    stream.encode(["a"], [[1.0, 1.0, 1.0]])
+    header, _ = _decode(stream.encode(["a"], [[1e4, 0.0, 0.0]]))
+    assert header["keyframe"] and "ids" not in header   # přetečení Int16
+    header, _ = _decode(stream.encode(["a", "b"], [[0, 0, 0], [1, 1, 1]]))
+    assert header["keyframe"] and header["ids"] == ["a", "b"]
+
+
+def test_server_layout_client_receives_frames():
+    canvas = Canvas()
+    for i in range(6):
+        canvas.add_node(f"n{i}")
+    for i in range(6):
+        canvas.ensure_edge(f"n{i}", f"n{(i + 1) % 6}")
+    hello = {"type": "hello", "protocol": protocol.PROTOCOL_VERSION}
+    with TestClient(create_app(canvas, layout_rate=20.0)) as client:
+        with client.websocket_connect("/ws") as ws:
+            ws.send_text(protocol.encode({**hello, "layout": "server"}))
+            init = protocol.decode(ws.receive_text())
+            assert init["server_layout"] is True
+            assert init["upload_positions"] is None     # nevede, nemá fyziku
+            message = ws.receive()
+            while "bytes" not in message:               # patche mezi tím
+                message = ws.receive()
+            header, values = _decode(message["bytes"])
+            assert header["keyframe"]
+            assert sorted(header["ids"]) == [f"n{i}" for i in range(6)]
+            assert len(values) == 18
+        assert len(canvas.state().positions) == 6       # sdílí i inity
+        with client.websocket_connect("/ws") as ws:
+            ws.send_text(protocol.encode(hello))
+            init = protocol.decode(ws.receive_text())
+            assert init["server_layout"] is False
+            assert init["upload_positions"]
+
+
+def test_create_app_rejects_bad_rate():
+    with pytest.raises(ValueError):
+        create_app(Canvas(), layout_rate=0)
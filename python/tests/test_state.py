@@ -0,0 +1,44 @@
+"""state() – O(1) neměnné verze stavu (copy-on-write snapshoty)."""
+from viewbase import Canvas, CanvasState
+
+
+def _graph():
+    c = Canvas(title="T")
+    c.add_node("a", label="{v}", v=1)
+    c.add_node("b")
+    c.add_edge("a", "b", w=1)
+    return c
+
+
+def test_state_is_o1_handle_sharing_containers():
+    c = _graph()
+    state = c.state()
+    assert isinstance(state, CanvasState)
+    assert state._nodes is c._nodes          # žádná kopie při vydání
+    assert len(state) == 2
+
+
+def test_state_unaffected_by_later_mutations():
+    c = _graph()
+    c.drain()
+    state = c.state()
+    c.update_node("a", v=2)
+    c.incr_edge("a", "b", "w")
+    c.add_node("c")
+    c.remove_node("b")
+    c.node_label("x{v}")
+    c.set_theme("cyber")
+    snap = state.as_dict()
+    assert snap["seq"] == 1
+    assert snap["config"]["theme"] == "modern"
+    assert snap["nodes"] == [
+        {"id": "a", "type": None, "label": "1", "meta": {"v": 1}},
+        {"id": "b", "type": None, "label": "b", "meta": {}}]
+    assert snap["edges"] == [{"source": "a", "target": "b", "meta": {"w": 1}}]
+    assert [n["id"] for n in c.nodes] == ["a", "c"]
+    assert c.node("a")["meta"] == {"v": 2}
+
+
+def test_snapshot_matches_state_dict():
+    c = _graph()
+    assert c.snapshot() == c.state().as_dict()
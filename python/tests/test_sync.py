@@ -0,0 +1,82 @@
+"""sync() – deklarativní srovnání s úplným stavem a minimální diff."""
+import pytest
+
+from viewbase import Canvas
+
+
+def _inventory(version):
+    nodes = [{"id": "r1", "type": "router", "meta": {"ip": "10.0.0.1"}},
+             {"id": "h1", "ip": "10.0.0.2", "os": "linux"},
+             "h2"]
+    edges = [("r1", "h1"), {"source": "r1", "target": "h2", "vlan": 10}]
+    if version == 2:
+        nodes[1] = {"id": "h1", "ip": "10.0.0.2", "os": "bsd"}
+        nodes[2] = "h3"
+        edges[1] = ("h3", "r1", {"vlan": 20})
+    return nodes, edges
+
+
+def test_first_sync_adds_everything_in_one_patch():
+    c = Canvas()
+    c.sync(*_inventory(1))
+    seq, deltas = c.drain()
+    assert [n["id"] for n in deltas["add_nodes"]] == ["r1", "h1", "h2"]
+    assert len(deltas["add_edges"]) == 2
+    assert c.node("h1")["meta"] == {"ip": "10.0.0.2", "os": "linux"}
+    assert c.edge("h2", "r1")["meta"] == {"vlan": 10}
+    assert c.node("r1")["type"] == "router"
+
+
+def test_unchanged_sync_emits_nothing():
+    c = Canvas()
+    c.sync(*_inventory(1))
+    c.drain()
+    c.sync(*_inventory(1))
+    assert c.drain() is None
+
+
+def test_sync_emits_minimal_diff():
+    c = Canvas()
+    c.sync(*_inventory(1))
+    c.drain()
+    c.sync(*_inventory(2))
+    _, deltas = c.drain()
+    assert deltas["remove_nodes"] == ["h2"]
+    assert deltas["remove_edges"] == [["h2", "r1"]]
+    assert [n["id"] for n in deltas["add_nodes"]] == ["h3"]
+    assert [n["id"] for n in deltas["update_nodes"]] == ["h1"]
+    assert deltas["add_edges"] == [
+        {"source": "h3", "target": "r1", "meta": {"vlan": 20}}]
+
+
+def test_sync_replaces_meta_type_and_label():
+    c = Canvas()
+    c.add_node("a", label="x {n}", n=1, stale=True)
+    c.drain()
+    c.sync([{"id": "a", "type": "host", "meta": {"n": 2}}])
+    _, deltas = c.drain()
+    assert deltas["update_nodes"] == [
+        {"id": "a", "type": "host", "label": "a", "meta": {"n": 2}}]
+
+
+def test_outside_change_invalidates_cached_digest():
+    c = Canvas()
+    c.sync(*_inventory(1))
+    c.update_node("h1", os="windows")            # změna mimo sync
+    c.incr_edge("r1", "h2", "vlan", 1)
+    c.drain()
+    c.sync(*_inventory(1))
+    _, deltas = c.drain()
+    assert c.node("h1")["meta"]["os"] == "linux"
+    assert [n["id"] for n in deltas["update_nodes"]] == ["h1"]
+    assert c.edge("r1", "h2")["meta"] == {"vlan": 10}
+
+
+def test_edge_to_unknown_node_is_rejected_before_changes():
+    c = Canvas()
+    c.add_node("keep")
+    with pytest.raises(ValueError, match="'ghost'"):
+        c.sync(["a"], [("a", "ghost")])
+    assert c.has_node("keep") and not c.has_node("a")
+    with pytest.raises(ValueError):
+        c.sync([{"name": "a"}])
@@ -0,0 +1,64 @@
+"""Read-only pohledy (node_view/edge_view) a stránkované iter_nodes/iter_edges."""
+import pytest
+
+from viewbase import Canvas
+
+
+def _graph(n=5):
+    c = Canvas()
+    for i in range(n):
+        c.add_node(f"n{i}", label="{v}", v=i)
+    for i in range(n - 1):
+        c.add_edge(f"n{i}", f"n{i + 1}", w=i)
+    return c
+
+
+def test_node_view_is_read_only_mapping():
+    c = _graph()
+    view = c.node_view("n1")
+    assert dict(view) == c.node("n1")
+    assert view["label"] == "1" and view.meta["v"] == 1
+    with pytest.raises(TypeError):
+        view.meta["v"] = 5
+    assert c.node_view("ghost") is None
+    assert c.edge_view("n1", "n0")["meta"] == {"w": 0}
+
+
+def test_view_stays_consistent_across_mutations():
+    c = _graph()
+    view = c.node_view("n1")
+    edge = c.edge_view("n0", "n1")
+    c.update_node("n1", v=99)
+    c.incr("n1", "hits")
+    c.incr_edge("n0", "n1", "w", 10)
+    assert view["meta"] == {"v": 1}          # copy-on-write: starý stav
+    assert view["label"] == "1"
+    assert edge["meta"] == {"w": 0}
+    assert c.node("n1")["meta"] == {"v": 99, "hits": 1}
+    assert c.edge("n0", "n1")["meta"] == {"w": 10}
+
+
+def test_iter_nodes_pages_and_is_consistent_snapshot():
+    c = _graph(5)
+    pages = c.iter_nodes(batch=2)
+    c.add_node("early")                       # stav je zmražený už voláním
+    first = next(pages)
+    assert [v.id for v in first] == ["n0", "n1"]
+    c.add_node("late")                        # mutace uprostřed iterace
+    c.remove_node("n4")
+    c.update_node("n2", v=-1)
+    rest = [v for page in pages for v in page]
+    assert [v.id for v in rest] == ["n2", "n3", "n4"]
+    assert rest[0].meta["v"] == 2
+    assert c.has_node("late") and not c.has_node("n4")
+    with pytest.raises(ValueError):
+        c.iter_nodes(batch=0)                 # chyba hned, ne až při next
+
+
+def test_iter_edges_pages():
+    c = _graph(5)
+    pages = list(c.iter_edges(batch=3))
+    assert [len(p) for p in pages] == [3, 1]
+    assert pages[0][0]["source"] == "n0"
+    with pytest.raises(ValueError):
+        c.iter_edges(batch=0)
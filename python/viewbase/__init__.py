@@ -1,9 +1,20 @@
 """viewbase – živá 2D/3D force-graph vizualizace ovládaná z Pythonu."""
 from . import protocol
+from .broker import Broker, Mirror, Publisher
 from .canvas import Canvas
+from .cluster import ClusterView
 from .controls import ControlWindow, TerminalWindow
+from .journal import Journal
+from .layoutcache import LayoutCache
+from .loaders import load_csv, load_edgelist, load_jsonl
+from .records import EdgeView, NodeView
+from .recording import Recorder, Replay
 from .server import ServerHandle, create_app, serve
+from .snapshot import CanvasState
 
-__all__ = ["Canvas", "ControlWindow", "TerminalWindow", "ServerHandle",
-           "create_app", "serve", "protocol"]
+__all__ = ["Broker", "Canvas", "CanvasState", "ClusterView", "ControlWindow",
+           "TerminalWindow", "Journal", "LayoutCache", "Mirror", "NodeView",
+           "EdgeView", "Publisher", "Recorder", "Replay", "ServerHandle",
+           "create_app", "serve", "load_csv", "load_edgelist", "load_jsonl",
+           "protocol"]
 __version__ = "0.1.0"
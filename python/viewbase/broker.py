@@ -0,0 +1,474 @@
+"""Lokální broker pro horizontální fan-out přes více worker procesů.
+
+Jeden uvicorn proces zvládne jen pár stovek diváků rušného canvasu.
+Vlastník canvasu proto proud jen publikuje (`Publisher`) do lokálního
+brokeru na Unix socketu a N bezstavových workerů (`Mirror` + vb.serve
+na vlastním portu) si ho odebírá do zrcadlového canvasu, který servírují
+WebSocket klientům jako každý jiný::
+
+    python -m viewbase.broker /tmp/vb.sock                # broker
+    vb.Publisher(canvas, "/tmp/vb.sock")                   # vlastník
+    vb.serve(vb.Mirror("/tmp/vb.sock").canvas, port=8081)  # worker × N
+
+Rámec na socketu = u32 délka (big-endian) + druh (1 B) + JSON:
+``K`` keyframe (úplný stav, recording._keyframe), ``P`` patch
+``{"seq", "deltas", "labels"}``, ``A`` akce ``{"after", "actions"}``,
+``E`` event od diváka ``{"event", "payload"}`` (worker → vlastník).
+První rámec spojení je role: ``pub`` nebo ``sub``.
+
+Broker drží poslední keyframe a rámce po něm; nový worker je dostane
+hned po připojení, pak živý proud. Keyframe posílá vlastník při každém
+(re)connectu a po `keyframe_every` patchích, takže paměť brokeru je
+omezená. Pomalý worker, kterému přeteče fronta, se odpojí – po reconnectu
+začne znovu od keyframu. Eventy diváků (kliky, terminál, view_change) jdou
+přes broker vlastníkovi, jeho handlery mutují originál a změna se vrátí
+proudem. Okna (open_window, terminal_append) se nepřenášejí – jejich
+callbacky žijí ve vlastníkovi; pozice ze zrcadel se nevrací."""
+from __future__ import annotations
+
+import asyncio
+import atexit
+import json
+import logging
+import os
+import queue
+import select
+import socket
+import struct
+import sys
+import threading
+from typing import Any
+
+from .canvas import Canvas
+from .protocol import WINDOW_ACTIONS
+from .recording import _keyframe, _load_keyframe
+
+logger = logging.getLogger("viewbase")
+
+DRAIN_INTERVAL = 1 / 30     # tik publisheru, který canvas sám drénuje
+SUBSCRIBER_QUEUE = 1024     # rámců ve frontě workeru, než ho broker odpojí
+RECONNECT_INTERVAL = 0.5    # s mezi pokusy o spojení s brokerem
+ACTION_FLUSH = 0.2          # s ticha, po kterém zrcadlo pustí odložené akce
+_HEADER = struct.Struct(">I")
+_STOP = object()
+
+
+def _frame(kind: bytes, payload: Any) -> bytes:
+    body = kind + json.dumps(payload, separators=(",", ":"),
+                             ensure_ascii=False).encode()
+    return _HEADER.pack(len(body)) + body
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    data = bytearray()
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise ConnectionError("broker zavřel spojení")
+        data += chunk
+    return bytes(data)
+
+
+def _recv_frame(sock: socket.socket) -> tuple[bytes, Any]:
+    (length,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    body = _recv_exact(sock, length)
+    return body[:1], json.loads(body[1:])
+
+
+def _connect(path: str, role: bytes) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        sock.sendall(_HEADER.pack(len(role)) + role)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+# ---- broker ------------------------------------------------------------
+
+class Broker:
+    """Relé mezi publisherem a workery na Unix socketu `path`. `start()`
+    ho pustí v daemon vlákně (vše v jednom procesu, testy), samostatně
+    ``python -m viewbase.broker PATH``. Nový publisher nahradí starého."""
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = os.fspath(path)
+        self._keyframe: bytes | None = None
+        self._log: list[bytes] = []
+        self._subscribers: dict[asyncio.Queue, asyncio.StreamWriter] = {}
+        self._publisher: asyncio.StreamWriter | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stopped: asyncio.Event | None = None
+        self._thread: threading.Thread | None = None
+
+    async def serve_forever(self) -> None:
+        """Poslouchej do stop(); starý socket na `path` se nahradí."""
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        server = await asyncio.start_unix_server(self._handle, path=self.path)
+        try:
+            await self._stopped.wait()
+        finally:
+            server.close()
+            for writer in [*self._subscribers.values(), self._publisher]:
+                if writer is not None:
+                    writer.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def start(self) -> "Broker":
+        """Spusť broker v daemon vlákně; vrátí se, až socket poslouchá."""
+        self._thread = threading.Thread(
+            target=asyncio.run, args=(self.serve_forever(),), daemon=True,
+            name="viewbase-broker")
+        self._thread.start()
+        for _ in range(500):
+            if os.path.exists(self.path) and self._stopped is not None:
+                return self
+            self._thread.join(0.01)
+        raise RuntimeError(f"Broker na {self.path} nenastartoval")
+
+    def stop(self) -> None:
+        """Zastav broker spuštěný přes start() a smaž socket."""
+        if self._loop is not None and self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None:
+            self._thread.join(5.0)
+
+    @staticmethod
+    async def _read(reader: asyncio.StreamReader) -> bytes:
+        (length,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+        return await reader.readexactly(length)
+
+    async def _handle(self, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        try:
+            role = await self._read(reader)
+            if role == b"pub":
+                await self._serve_publisher(reader, writer)
+            elif role == b"sub":
+                await self._serve_subscriber(reader, writer)
+            else:
+                logger.warning("Broker: neznámá role %r", role[:16])
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_publisher(self, reader: asyncio.StreamReader,
+                               writer: asyncio.StreamWriter) -> None:
+        if self._publisher is not None:
+            self._publisher.close()
+        self._publisher = writer
+        try:
+            while True:
+                body = await self._read(reader)
+                frame = _HEADER.pack(len(body)) + body
+                if body[:1] == b"K":
+                    self._keyframe, self._log = frame, []
+                else:
+                    self._log.append(frame)
+                for frames in list(self._subscribers):
+                    try:
+                        frames.put_nowait(frame)
+                    except asyncio.QueueFull:
+                        # pomalý worker: odpojit, po reconnectu od keyframu
+                        logger.warning("Broker: odpojuji pomalého odběratele")
+                        self._subscribers.pop(frames).close()
+        finally:
+            if self._publisher is writer:
+                self._publisher = None
+
+    async def _serve_subscriber(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter) -> None:
+        frames: asyncio.Queue = asyncio.Queue(SUBSCRIBER_QUEUE)
+        if self._keyframe is not None:
+            writer.writelines([self._keyframe, *self._log])
+        self._subscribers[frames] = writer
+        upstream = asyncio.ensure_future(self._forward_events(reader))
+        try:
+            while frames in self._subscribers and not upstream.done():
+                try:
+                    frame = await asyncio.wait_for(frames.get(), 0.5)
+                except asyncio.TimeoutError:
+                    continue
+                writer.write(frame)
+                await writer.drain()
+        finally:
+            self._subscribers.pop(frames, None)
+            upstream.cancel()
+
+    async def _forward_events(self, reader: asyncio.StreamReader) -> None:
+        """Eventy diváků od workeru -> publisher (bez publisheru se zahodí)."""
+        try:
+            while True:
+                body = await self._read(reader)
+                if body[:1] == b"E" and self._publisher is not None:
+                    self._publisher.write(_HEADER.pack(len(body)) + body)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+
+
+# ---- vlastník canvasu --------------------------------------------------
+
+class Publisher:
+    """Publikuj vydrénovaný proud `canvas` do brokeru na `path`. Posluchač
+    jen zařadí do fronty, kódování a odesílání běží ve vlastním vlákně;
+    po každém (re)connectu jde čerstvý keyframe, další po `keyframe_every`
+    patchích. `drain=True` canvas drénuje sám (vlastník bez vlastního
+    serveru); servíruje-li ho vlastník i přes vb.serve, předej
+    `drain=False` – drénovat smí jen jeden. Eventy od workerů předá
+    `canvas.dispatch_event`."""
+
+    def __init__(self, canvas: Canvas, path: str | os.PathLike, *,
+                 keyframe_every: int = 500, drain: bool = True) -> None:
+        if keyframe_every <= 0:
+            raise ValueError("keyframe_every musí být kladné")
+        self.canvas = canvas
+        self.path = os.fspath(path)
+        self._keyframe_every = keyframe_every
+        self._since_keyframe = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        self._closed = False
+        self._sock: socket.socket | None = None
+        self._unsubscribe = canvas.subscribe(on_patch=self._on_patch,
+                                             on_actions=self._on_actions)
+        self._threads = [threading.Thread(target=self._run, daemon=True,
+                                          name="viewbase-publisher")]
+        if drain:
+            self._threads.append(threading.Thread(
+                target=self._drain_loop, daemon=True,
+                name="viewbase-publisher-drain"))
+        for thread in self._threads:
+            thread.start()
+        atexit.register(self.close)
+
+    # ---- posluchači (pod zámkem canvasu – jen fronta) --------------------
+
+    def _on_patch(self, seq: int, deltas: dict[str, list],
+                  labels: dict[str, str]) -> None:
+        self._queue.put((b"P", {"seq": seq, "deltas": deltas,
+                                "labels": labels}))
+        self._since_keyframe += 1
+        if self._since_keyframe >= self._keyframe_every:
+            # hned po drain: stav = přesně po patchi seq
+            self._since_keyframe = 0
+            self._queue.put((b"K", self.canvas.state()))
+
+    def _on_actions(self, after: int, actions: list[dict[str, Any]]) -> None:
+        published = [a for a in actions
+                     if a.get("action") not in WINDOW_ACTIONS]
+        if published:
+            self._queue.put((b"A", {"after": after, "actions": published}))
+
+    # ---- vlákna ----------------------------------------------------------
+
+    def _drain_loop(self) -> None:
+        while not self._stop.wait(DRAIN_INTERVAL):
+            self.canvas.drain_actions()     # akce před deltami jako server
+            self.canvas.drain()
+
+    def _connect(self) -> socket.socket | None:
+        """Spoj se s brokerem a pošli keyframe; frontu zahoď pod zámkem
+        canvasu, aby mezi keyframem a dalším patchem nic nechybělo."""
+        try:
+            sock = _connect(self.path, b"pub")
+        except OSError:
+            with self.canvas._lock:
+                self._clear_queue()
+            return None
+        with self.canvas._lock:
+            self._clear_queue()
+            state = self.canvas.state()
+            self._since_keyframe = 0
+        try:
+            sock.sendall(_frame(b"K", _keyframe(state)))
+        except OSError:
+            sock.close()
+            return None
+        threading.Thread(target=self._read_events, args=(sock,), daemon=True,
+                         name="viewbase-publisher-events").start()
+        return sock
+
+    def _clear_queue(self) -> None:
+        while True:
+            try:
+                if self._queue.get_nowait() is _STOP:
+                    self._queue.put(_STOP)
+                    return
+            except queue.Empty:
+                return
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if self._sock is None:
+                self._sock = self._connect()
+                if self._sock is None:
+                    self._stop.wait(RECONNECT_INTERVAL)
+                    continue
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            kind, payload = item
+            if kind == b"K":
+                payload = _keyframe(payload)
+            try:
+                self._sock.sendall(_frame(kind, payload))
+            except OSError:
+                logger.warning("Spojení s brokerem %s spadlo, obnovuji",
+                               self.path)
+                self._sock.close()
+                self._sock = None
+        if self._sock is not None:
+            self._sock.close()
+
+    def _read_events(self, sock: socket.socket) -> None:
+        try:
+            while True:
+                kind, payload = _recv_frame(sock)
+                if kind == b"E":
+                    self.canvas.dispatch_event(payload["event"],
+                                               payload.get("payload") or {})
+        except (OSError, ConnectionError, ValueError):
+            return
+
+    def close(self) -> None:
+        """Odhlas se z canvasu, odešli frontu a zavři spojení. Idempotentní
+        (registrováno i v atexit)."""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self._unsubscribe()
+        self._queue.put(_STOP)
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+
+# ---- worker ------------------------------------------------------------
+
+class _MirrorCanvas(Canvas):
+    """Zrcadlový canvas: eventy diváků posílá vlastníkovi přes broker."""
+
+    def __init__(self, mirror: "Mirror", **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._mirror = mirror
+
+    def dispatch_event(self, name: str, payload: dict[str, Any]) -> None:
+        self._mirror._send_event(name, payload)
+        super().dispatch_event(name, payload)
+
+
+class Mirror:
+    """Worker: odebírej proud z brokeru na `path` do zrcadlového canvasu
+    `self.canvas`, který servíruj přes vb.serve / create_app. Keyframe se
+    aplikuje rozdílem (jako seek záznamu), patche upsertem; akce čekají,
+    až dorazí patch, na který odkazují. Po výpadku se sám připojí znovu
+    a srovná se podle keyframu."""
+
+    def __init__(self, path: str | os.PathLike, **canvas_kwargs: Any) -> None:
+        self.path = os.fspath(path)
+        self.canvas: Canvas = _MirrorCanvas(self, **canvas_kwargs)
+        self.seq: int | None = None     # seq vlastníka posledního patche
+        self.connected = threading.Event()
+        self._deferred: list[dict[str, Any]] = []
+        self._sock: socket.socket | None = None
+        self._send_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="viewbase-mirror")
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                sock = _connect(self.path, b"sub")
+            except OSError:
+                self._stop.wait(RECONNECT_INTERVAL)
+                continue
+            with self._send_lock:
+                self._sock = sock
+            self.connected.set()
+            try:
+                while not self._stop.is_set():
+                    if not select.select([sock], [], [], ACTION_FLUSH)[0]:
+                        self._flush_deferred(None)
+                        continue
+                    self._apply(*_recv_frame(sock))
+            except (OSError, ConnectionError, ValueError):
+                if not self._stop.is_set():
+                    logger.warning("Spojení s brokerem %s spadlo, obnovuji",
+                                   self.path)
+            finally:
+                self.connected.clear()
+                with self._send_lock:
+                    self._sock = None
+                sock.close()
+
+    def _apply(self, kind: bytes, payload: dict[str, Any]) -> None:
+        try:
+            if kind == b"K":
+                self._deferred = []
+                _load_keyframe(self.canvas, payload)
+                with self.canvas._lock:
+                    self.canvas.config.update(payload["config"])
+                self.seq = payload["seq"]
+            elif kind == b"P":
+                self.canvas.apply_patch(payload["deltas"], payload.get("labels"))
+                self.seq = payload["seq"]
+                self._flush_deferred(self.seq)
+            elif kind == b"A":
+                self._deferred.append(payload)
+                if self.seq is not None and payload["after"] < self.seq:
+                    self._flush_deferred(self.seq)
+        except ValueError:
+            logger.exception("Rámec brokeru %r nelze aplikovat", kind)
+
+    def _flush_deferred(self, seq: int | None) -> None:
+        """Aplikuj odložené akce s `after < seq` (None = všechny)."""
+        ready = [r for r in self._deferred if seq is None or r["after"] < seq]
+        self._deferred = [r for r in self._deferred if r not in ready]
+        for record in ready:
+            for action in record["actions"]:
+                try:
+                    self.canvas.apply_action(action)
+                except ValueError:
+                    logger.exception("Akci %r nelze aplikovat", action)
+
+    def _send_event(self, name: str, payload: dict[str, Any]) -> None:
+        frame = _frame(b"E", {"event": name, "payload": payload})
+        with self._send_lock:
+            if self._sock is None:
+                logger.warning("Event '%s' zahozen: broker nedostupný", name)
+                return
+            try:
+                self._sock.sendall(frame)
+            except OSError:
+                logger.warning("Event '%s' zahozen: broker nedostupný", name)
+
+    def close(self) -> None:
+        """Odpoj se od brokeru. Canvas zavírá ten, kdo ho servíruje."""
+        self._stop.set()
+        with self._send_lock:
+            if self._sock is not None:
+                try:
+                    self._sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        self._thread.join()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("použití: python -m viewbase.broker CESTA_K_SOCKETU")
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(Broker(sys.argv[1]).serve_forever())
+    except KeyboardInterrupt:
+        pass
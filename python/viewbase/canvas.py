@@ -1,21 +1,35 @@
 """Canvas – zdroj pravdy grafu a veřejné API knihovny."""
 from __future__ import annotations
 
+import heapq
+import itertools
+import json
 import logging
-import re
+import math
+import random
 import threading
 import types
 import uuid
-from collections import deque
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Any, Callable, Iterator
+from typing import (TYPE_CHECKING, Any, Callable, Iterable, Iterator, Mapping,
+                    Sequence)
 
+from . import persist
 from .controls import ControlWindow, TerminalWindow, validate_values
+from .index import NodeIndex
+from .layout import force_layout
+from .metrics import (METRICS, UnionFind, betweenness, component_labels,
+                      pagerank)
+from .records import (EdgeRecord, EdgeView, NodeRecord, NodeView,
+                      gc_paused, interned_meta, render_label)
+from .snapshot import CanvasState
 
-logger = logging.getLogger("viewbase")
+if TYPE_CHECKING:
+    from .layoutcache import LayoutCache
 
-_LABEL_KEY = re.compile(r"\{([^{}]+)\}")
+logger = logging.getLogger("viewbase")
 
 BUILTIN_THEMES = ("modern", "cyber")
 QUALITIES = ("low", "high", "auto")
@@ -34,21 +48,83 @@ def _validated_theme(theme: Any) -> Any:
     raise ValueError("theme musí být název vestavěného tématu nebo dict")
 
 
+_SPAWN_JITTER = 10.0       # = SPAWN_JITTER ve frontend/src/physics/core.js
+_ROUTE_CACHE_SIZE = 4096   # strop cache cest toků (pak se celá zahodí)
+_KEEP = object()   # apply_patch: ponech label šablonu existujícího uzlu
+
+
+def _digest(*content: Any) -> int:
+    """Otisk obsahu entity pro sync() – kanonický JSON (seřazené klíče),
+    nehashovatelné i ne-JSON hodnoty projdou přes repr."""
+    return hash(json.dumps(content, sort_keys=True, default=repr))
+
+
+def _node_spec(spec: Any) -> tuple[str, str | None, str | None,
+                                   dict[str, Any]]:
+    if isinstance(spec, str):
+        return spec, None, None, {}
+    if not isinstance(spec, dict) or "id" not in spec:
+        raise ValueError(f"sync: uzel musí být id nebo dict s 'id': {spec!r}")
+    meta = spec.get("meta", {k: v for k, v in spec.items()
+                             if k not in ("id", "type", "label")})
+    return str(spec["id"]), spec.get("type"), spec.get("label"), dict(meta)
+
+
+def _edge_spec(spec: Any) -> tuple[str, str, dict[str, Any]]:
+    if isinstance(spec, dict):
+        if "source" not in spec or "target" not in spec:
+            raise ValueError(
+                f"sync: hrana potřebuje 'source' a 'target': {spec!r}")
+        meta = spec.get("meta", {k: v for k, v in spec.items()
+                                 if k not in ("source", "target")})
+        return str(spec["source"]), str(spec["target"]), dict(meta)
+    if not isinstance(spec, (tuple, list)) or len(spec) not in (2, 3):
+        raise ValueError(
+            f"sync: hrana musí být (source, target[, meta]): {spec!r}")
+    return str(spec[0]), str(spec[1]), dict(spec[2]) if len(spec) == 3 else {}
+
+
+def _incremented(meta: dict[str, Any], key: str, delta: float) -> float:
+    """meta[key] += delta na místě (chybějící klíč = 0); vrátí novou hodnotu."""
+    if isinstance(delta, bool) or not isinstance(delta, (int, float)):
+        raise ValueError("incr: delta musí být číslo")
+    current = meta.get(key, 0)
+    if isinstance(current, bool) or not isinstance(current, (int, float)):
+        raise ValueError(f"incr: meta klíč '{key}' není číslo")
+    meta[key] = current + delta
+    return meta[key]
+
+
 def _edge_key(source: str, target: str) -> tuple[str, str]:
     """Neorientovaná hrana má kanonický klíč: lexikograficky seřazenou dvojici."""
     return (source, target) if source <= target else (target, source)
 
 
+def _pages(records: Iterable[Any], batch: int,
+           view: Callable[[Any], Any]) -> Iterator[list[Any]]:
+    """Stránky po `batch` pohledech nad zmraženými záznamy (iter_nodes/edges)."""
+    records = iter(records)
+    while page := list(itertools.islice(records, batch)):
+        yield [view(r) for r in page]
+
+
 class Canvas:
-    """Thread-safe model grafu. Mutace se hromadí jako delty pro server."""
+    """Thread-safe model grafu. Mutace se hromadí jako delty pro server.
+
+    `max_nodes` je tvrdý strop počtu uzlů (dashboardy, živý odposlech): nad
+    ním se vyhazují nejdéle nedotčené uzly (LRU) i s hranami a toky."""
 
     def __init__(self, *, title: str = "viewbase", dimensions: int = 3,
                  theme: Any = "modern", highlight_neighbors: int = 1,
-                 quality: str = "auto"):
+                 quality: str = "auto", max_nodes: int | None = None):
         if dimensions not in (2, 3):
             raise ValueError("dimensions musí být 2 nebo 3")
         if quality not in QUALITIES:
             raise ValueError(f"quality musí být jedno z {QUALITIES}")
+        if max_nodes is not None and (
+                not isinstance(max_nodes, int) or isinstance(max_nodes, bool)
+                or max_nodes <= 0):
+            raise ValueError("max_nodes musí být kladné celé číslo nebo None")
         self.config = {
             "title": title,
             "dimensions": dimensions,
@@ -60,11 +136,56 @@ class Canvas:
             "edge_style": {"style": "line", "elasticity": 0.0},
         }
         self._lock = threading.RLock()
-        self._nodes: dict[str, dict[str, Any]] = {}
-        self._edges: dict[tuple[str, str], dict[str, Any]] = {}
+        self._nodes: dict[str, NodeRecord] = {}
+        self._edges: dict[tuple[str, str], EdgeRecord] = {}
+        # Copy-on-write: vydané pohledy drží zmražené záznamy (starší epocha)
+        # a případně i celé kontejnery (*_shared) – ty se před mutací klonují.
+        self._epoch = 0
+        self._nodes_shared = False
+        self._edges_shared = False
+        # id -> sousedé (kaskády, BFS); množina vzniká až s první hranou –
+        # prázdný set stojí víc než celý záznam uzlu
+        self._adjacency: dict[str, set[str]] = {}
+        # Verze topologie (roste s každou změnou uzlů/hran – přepočet metrik)
+        # a union-find komponent; None = zastaralý po odebrání hrany či
+        # hromadném vložení, přestaví se líně až při dotazu.
+        self._topology = 0
+        self._components: UnionFind | None = UnionFind()
+        # Pozice uzlů do initu (precompute_layout): id -> (x, y, z). Sdílí
+        # se se state() jako kontejnery uzlů – před zápisem se klonuje.
+        self._positions: dict[str, tuple[float, float, float]] = {}
+        self._positions_shared = False
+        # Verze pozic – roste s každým zápisem (cache výřezů klientů); zápis
+        # do nesdíleného slovníku probíhá na místě, identita nestačí.
+        self._positions_version = 0
+        # Cache cest toků: (source, target, weight) -> (verze, cesta). Platí,
+        # dokud se nezmění topologie; vážené cesty i do změny klíče `weight`
+        # v meta hran. Revize se vedou jen pro klíče dotazované jako váha –
+        # čítače (incr_edge na packets/bytes) cache nezneplatní.
+        self._routes: dict[tuple[str, str, str | None],
+                           tuple[tuple[int, int], list[str]]] = {}
+        self._weight_revisions: dict[str, int] = {}
+        # track_metrics(): sledované metriky, styl, publikovaná verze
+        self._metrics: dict[str, Any] | None = None
+        self._derived_keys: set[str] = set()    # sync/apply_patch je zachová
+        # Strop počtu uzlů: LRU pořadí „naposledy dotčených" uzlů vedle _nodes
+        # (_nodes drží pořadí přidání pro snapshot, to se měnit nesmí).
+        self._max_nodes = max_nodes
+        self._lru: OrderedDict[str, None] | None = (
+            OrderedDict() if max_nodes is not None else None)
+        self._index = NodeIndex()      # sekundární indexy pro select()
+        # sync(): otisk obsahu posledně synchronizovaných entit; jakákoli
+        # jiná změna entity ho zahodí (_mark_*_updated, odebrání)
+        self._node_digests: dict[str, int] = {}
+        self._edge_digests: dict[tuple[str, str], int] = {}
         self._node_types: dict[str, dict[str, Any]] = {}
         self._flow_types: dict[str, dict[str, Any]] = {}
         self._flows: dict[str, dict[str, Any]] = {}   # flow_id -> trvalý tok (do init)
+        # register_path(): path_id -> cesta, cesta -> path_id (deduplikace)
+        # a hrana -> path_id cest přes ni (zrušení při odebrání hrany)
+        self._paths: dict[str, list[str]] = {}
+        self._path_ids: dict[tuple[str, ...], str] = {}
+        self._path_edges: dict[tuple[str, str], set[str]] = {}
         self._windows: dict[str, ControlWindow] = {}
         self._window_callbacks: dict[str, Any] = {}
         self._window_live: dict[str, bool] = {}   # window_id -> live režim
@@ -78,6 +199,8 @@ class Canvas:
             max_workers=4, thread_name_prefix="viewbase-handler")
         self._actions: list[dict[str, Any]] = []
         self._closed = False
+        self._patch_listeners: list[Callable[..., None]] = []
+        self._action_listeners: list[Callable[..., None]] = []
         self._node_label_template: str | None = None
         self._tasks: list[dict[str, Any]] = []      # every() úlohy
         self._tasks_stop: threading.Event | None = None   # None = neběží
@@ -86,11 +209,13 @@ class Canvas:
 
     @staticmethod
     def _empty_pending() -> dict[str, dict]:
+        # Jen značky „dotčeno" – payload se sestaví až v drain() z aktuálního
+        # stavu, takže N změn téže entity za tik = jeden payload.
         return {
-            "add_nodes": {},      # id -> payload
-            "update_nodes": {},   # id -> payload
+            "add_nodes": {},      # id -> True
+            "update_nodes": {},   # id -> True
             "remove_nodes": {},   # id -> True
-            "add_edges": {},      # key -> payload
+            "add_edges": {},      # key -> True nová / False změněná hrana
             "remove_edges": {},   # key -> True
         }
 
@@ -158,10 +283,15 @@ class Canvas:
         return list(self._flow_types).index(name)
 
     def _resolve_flow_path(self, source: str | None, target: str | None,
-                           path: list[str] | None) -> list[str]:
+                           path: list[str] | None,
+                           weight: str | None = None) -> list[str]:
         """Sestav cestu toku. `path=[...]` = přesná cesta (každá sousední dvojice
         musí být existující hrana). Jen `(source, target)` = knihovna **sama najde
-        nejkratší cestu** po hranách (BFS) — stačí zadat konce A→C, mezikroky ne."""
+        nejkratší cestu** po hranách (BFS) — stačí zadat konce A→C, mezikroky ne.
+        S `weight` je to nejlevnější cesta podle meta klíče hran (Dijkstra)."""
+        if path is not None and weight is not None:
+            raise ValueError("flow: weight platí jen pro hledání cesty"
+                             " (source, target), ne pro path=[...]")
         if path is not None:
             resolved = list(path)
             if len(resolved) < 2:
@@ -175,36 +305,117 @@ class Canvas:
                         f"flow: hrana {a}-{b} neexistuje - tok jede jen po hranach")
             return resolved
         if source is not None and target is not None:
-            return self._shortest_path(source, target)
+            return self._shortest_path(source, target, weight)
         raise ValueError("flow vyzaduje bud (source, target), nebo path=[...]")
 
-    def _shortest_path(self, source: str, target: str) -> list[str]:
-        """BFS nejkratší cesta po hranách source→target (zadávají se jen konce).
+    def _shortest_path(self, source: str, target: str,
+                       weight: str | None = None) -> list[str]:
+        """Nejkratší cesta po hranách source→target (zadávají se jen konce).
 
-        Hrany jsou neorientované. Vyhodí ValueError, když uzel neexistuje nebo
-        cesta nevede."""
+        Hrany jsou neorientované. Opakovaný dotaz na stejné konce jde z cache,
+        dokud se nezmění topologie (vážený i klíč `weight` v meta hran); jinak
+        obousměrné BFS, resp. Dijkstra přes meta klíč `weight`. Vyhodí
+        ValueError, když uzel neexistuje nebo cesta nevede. Vrací novou kopii seznamu."""
         for node_id in (source, target):
             if node_id not in self._nodes:
                 raise ValueError(f"flow: uzel '{node_id}' neexistuje")
         if source == target:
             raise ValueError("flow: source a target musi byt ruzne")
-        adjacency: dict[str, list[str]] = {}
-        for a, b in self._edges:
-            adjacency.setdefault(a, []).append(b)
-            adjacency.setdefault(b, []).append(a)
+        if not self._component_index().connected(source, target):
+            # fragmentovaný graf: odmítnutí v O(α) místo BFS celé komponenty
+            raise ValueError(
+                f"flow: mezi '{source}' a '{target}' nevede cesta")
+        key = (source, target, weight)
+        version = (self._topology, 0 if weight is None
+                   else self._weight_revisions.setdefault(weight, 0))
+        cached = self._routes.get(key)
+        if cached is not None and cached[0] == version:
+            return list(cached[1])
+        if weight is None:
+            route = self._bidirectional_bfs(source, target)
+        else:
+            route = self._dijkstra(source, target, weight)
+        if route is None:
+            raise ValueError(
+                f"flow: mezi '{source}' a '{target}' nevede cesta")
+        if len(self._routes) >= _ROUTE_CACHE_SIZE:
+            self._routes.clear()        # zastaralé verze se jinak nečistí
+        self._routes[key] = (version, route)
+        return list(route)
+
+    def _bidirectional_bfs(self, source: str, target: str) -> list[str] | None:
+        """BFS ze dvou konců zároveň; rozšiřuje se vždy menší fronta po celých
+        vrstvách. Na grafech s velkým větvením projde řádově √ uzlů
+        jednosměrného BFS."""
+        adjacency = self._adjacency
+        prev: dict[str, str | None] = {source: None}
+        succ: dict[str, str | None] = {target: None}
+        front, back = [source], [target]
+        meet: str | None = None
+        while front and back and meet is None:
+            if len(front) > len(back):
+                front, back, prev, succ = back, front, succ, prev
+            layer: list[str] = []
+            for node in front:
+                for neighbor in adjacency.get(node, ()):
+                    if neighbor in prev:
+                        continue
+                    prev[neighbor] = node
+                    if neighbor in succ:
+                        meet = neighbor
+                        break
+                    layer.append(neighbor)
+                if meet is not None:
+                    break
+            front = layer
+        if meet is None:
+            return None
+        if source not in prev:                  # strany jsou prohozené
+            prev, succ = succ, prev
+        route: list[str] = []
+        node: str | None = meet
+        while node is not None:
+            route.append(node)
+            node = prev[node]
+        route.reverse()
+        node = succ[meet]
+        while node is not None:
+            route.append(node)
+            node = succ[node]
+        return route
+
+    def _dijkstra(self, source: str, target: str,
+                  weight: str) -> list[str] | None:
+        """Nejlevnější cesta podle meta `weight` hran (chybějící klíč = 1).
+        Záporná nebo nečíselná váha je chyba – Dijkstra by lhal."""
+        adjacency, edges = self._adjacency, self._edges
+        dist = {source: 0.0}
         prev: dict[str, str | None] = {source: None}
-        queue = deque([source])
-        while queue:
-            node = queue.popleft()
+        done: set[str] = set()
+        heap = [(0.0, source)]
+        while heap:
+            cost, node = heapq.heappop(heap)
+            if node in done:
+                continue
             if node == target:
                 break
+            done.add(node)
             for neighbor in adjacency.get(node, ()):
-                if neighbor not in prev:
+                if neighbor in done:
+                    continue
+                w = edges[_edge_key(node, neighbor)].meta.get(weight, 1)
+                if (not isinstance(w, (int, float)) or isinstance(w, bool)
+                        or w < 0):
+                    raise ValueError(
+                        f"flow: váha '{weight}' hrany {node}-{neighbor}"
+                        f" musí být nezáporné číslo, ne {w!r}")
+                candidate = cost + w
+                if candidate < dist.get(neighbor, math.inf):
+                    dist[neighbor] = candidate
                     prev[neighbor] = node
-                    queue.append(neighbor)
+                    heapq.heappush(heap, (candidate, neighbor))
         if target not in prev:
-            raise ValueError(
-                f"flow: mezi '{source}' a '{target}' nevede cesta")
+            return None
         route: list[str] = []
         node: str | None = target
         while node is not None:
@@ -213,24 +424,77 @@ class Canvas:
         route.reverse()
         return route
 
+    def register_path(self, path: list[str]) -> str:
+        """Zaregistruj cestu toku jednou a posílej toky jen s jejím id:
+        ``flow(path_id=...)`` cestu znovu nevaliduje a klientům neposílá
+        seznam uzlů (cachují ho podle id). Stejná cesta vrátí stejné id.
+        Cesta zanikne s odebráním kterékoli její hrany (akce drop_path);
+        toky s neplatným id pak vyhodí ValueError."""
+        with self._lock:
+            path_id = self._path_ids.get(tuple(path))
+            if path_id is not None:
+                return path_id
+            resolved = self._resolve_flow_path(None, None, path)
+            path_id = uuid.uuid4().hex[:8]
+            self._define_path_locked(path_id, resolved)
+            self._actions.append(
+                {"action": "define_path", "path_id": path_id,
+                 "path": resolved})
+            return path_id
+
+    def _define_path_locked(self, path_id: str, path: list[str]) -> None:
+        self._paths[path_id] = path
+        self._path_ids[tuple(path)] = path_id
+        for a, b in zip(path, path[1:]):
+            self._path_edges.setdefault(_edge_key(a, b), set()).add(path_id)
+
+    def _drop_path_locked(self, path_id: str) -> None:
+        path = self._paths.pop(path_id)
+        del self._path_ids[tuple(path)]
+        for a, b in zip(path, path[1:]):
+            ids = self._path_edges.get(_edge_key(a, b))
+            if ids is not None:
+                ids.discard(path_id)
+                if not ids:
+                    del self._path_edges[_edge_key(a, b)]
+        self._actions.append({"action": "drop_path", "path_id": path_id})
+
     def flow(self, source: str | None = None, target: str | None = None, *,
              path: list[str] | None = None, type: str | None = None,
              count: int | None = 1, interval: float = 0.2, speed: float = 1.0,
-             color: str | None = None, size: float | None = None) -> str | None:
+             color: str | None = None, size: float | None = None,
+             weight: str | None = None,
+             path_id: str | None = None) -> str | None:
         """Vysli tok castic po hrane/ceste (source -> target nebo path=[...]).
 
         `count=N` je jednorazovy (fire-and-forget; server tok neudrzi, vraci
         None). `count=None` je trvaly: vraci `flow_id`, tok je v `init` a prezije
         reconnect; zastaves ho `stop_flow(flow_id)`. `interval` je rozestup castic
-        v sekundach, `speed` nasobek vychozi rychlosti tematu."""
+        v sekundach, `speed` nasobek vychozi rychlosti tematu. `weight="latency"`
+        vede tok nejlevnejsi cestou podle meta klice hran misto nejmene skoku.
+        `path_id` z register_path nahrazuje path (bez validace a bez seznamu
+        uzlu v akci)."""
         with self._lock:
             if type is not None and type not in self._flow_types:
                 raise ValueError(
                     f"Neznam typ toku '{type}' - nejdriv define_flow_type")
-            resolved = self._resolve_flow_path(source, target, path)
+            if path_id is not None:
+                if source is not None or target is not None \
+                        or path is not None or weight is not None:
+                    raise ValueError(
+                        "flow: path_id nejde kombinovat se source/target/path")
+                if path_id not in self._paths:
+                    raise ValueError(f"flow: cesta '{path_id}' neexistuje"
+                                     " (zrušena odebráním hrany?)")
+                resolved = self._paths[path_id]
+                route: dict[str, Any] = {"path_id": path_id}
+            else:
+                resolved = self._resolve_flow_path(source, target, path, weight)
+                route = {"path": resolved}
+            self._touch(*resolved)
             payload = {
                 "action": "flow",
-                "path": resolved,
+                **route,
                 "flow_type": type,
                 "type_index": self._flow_type_index(type),
                 "count": count,
@@ -242,8 +506,10 @@ class Canvas:
             if count is None:
                 flow_id = uuid.uuid4().hex[:8]
                 payload["flow_id"] = flow_id
-                self._flows[flow_id] = {k: v for k, v in payload.items()
-                                        if k != "action"}
+                # init nese i celou cestu – trvalý tok přežije drop_path
+                self._flows[flow_id] = {
+                    **{k: v for k, v in payload.items() if k != "action"},
+                    "path": list(resolved)}
                 self._actions.append(payload)
                 return flow_id
             self._actions.append(payload)
@@ -365,10 +631,17 @@ class Canvas:
             if type is not None and type not in self._node_types:
                 raise ValueError(
                     f"Neznámý typ uzlu '{type}' – nejdřív zavolej define_type")
-            node = {"id": node_id, "type": type,
-                    "label_template": label, "meta": dict(meta)}
-            self._nodes[node_id] = node
-            self._pending["add_nodes"][node_id] = self._public_node(node)
+            node = NodeRecord(node_id, type, label, interned_meta(meta),
+                              self._epoch)
+            node_id = node.id                      # internované id všude dál
+            self._writable_nodes()[node_id] = node
+            self._index.add(node)
+            self._pending["add_nodes"][node_id] = True
+            self._topology += 1
+            if self._metrics is not None:
+                self._derive_locked(node_id)
+            self._touch(node_id)
+            self._evict_locked()
 
     def ensure_node(self, node_id: str, *, type: str | None = None,
                     label: str | None = None, **meta: Any) -> None:
@@ -385,23 +658,23 @@ class Canvas:
             if node is None:
                 self._add_node(node_id, type, label, meta)
                 return
-            if type is not None and type != node["type"]:
+            if type is not None and type != node.type:
                 raise ValueError(
-                    f"ensure_node: uzel '{node_id}' má typ {node['type']!r},"
+                    f"ensure_node: uzel '{node_id}' má typ {node.type!r},"
                     f" změna na {type!r} přijde až v Plánu 2b")
-            if label is not None and label != node["label_template"]:
+            if label is not None and label != node.label_template:
                 raise ValueError(
                     f"ensure_node: uzel '{node_id}' má jinou label šablonu –"
                     " změna přijde až v Plánu 2b")
-            merged = {**node["meta"], **meta}
-            if merged == node["meta"]:
+            self._touch(node_id)
+            merged = {**node.meta, **interned_meta(meta)}
+            if merged == node.meta:
                 return
-            node["meta"] = merged
-            payload = self._public_node(node)
-            if node_id in self._pending["add_nodes"]:
-                self._pending["add_nodes"][node_id] = payload
-            else:
-                self._pending["update_nodes"][node_id] = payload
+            self._index.remove_meta(node)
+            node = self._own_node(node_id)
+            node.meta = merged
+            self._index.add_meta(node)
+            self._mark_node_updated(node_id)
 
     def update_node(self, node_id: str, **meta: Any) -> None:
         with self._lock:
@@ -413,24 +686,96 @@ class Canvas:
                         f"update_node neumí měnit '{reserved}' – label šablona"
                         " a typ se zadávají v add_node (změna za běhu přijde"
                         " v Plánu 2b)")
-            node = self._nodes[node_id]
-            node["meta"].update(meta)
-            payload = self._public_node(node)
-            if node_id in self._pending["add_nodes"]:
-                self._pending["add_nodes"][node_id] = payload
-            else:
-                self._pending["update_nodes"][node_id] = payload
+            node = self._own_node(node_id)
+            self._index.remove_meta(node)
+            node.meta.update(interned_meta(meta))
+            self._index.add_meta(node)
+            self._touch(node_id)
+            self._mark_node_updated(node_id)
+
+    def incr(self, node_id: str, key: str, delta: float = 1) -> float:
+        """Přičti `delta` k číselnému meta klíči uzlu (chybějící = 0) a vrať
+        novou hodnotu. Čítače na vysoké frekvenci (bajty, pakety): hodnota se
+        akumuluje na místě a klientům odejde nejvýš jednou za broadcast tik."""
+        with self._lock:
+            node = self._nodes.get(node_id)
+            if node is None:
+                raise ValueError(f"Uzel '{node_id}' neexistuje")
+            if key in ("label", "type"):
+                raise ValueError(f"incr neumí měnit '{key}'")
+            indexed = key in self._index.by_meta
+            if indexed:
+                self._index.remove_meta(node)
+            node = self._own_node(node_id)
+            value = _incremented(node.meta, key, delta)
+            if indexed:
+                self._index.add_meta(node)
+            self._touch(node_id)
+            self._mark_node_updated(node_id)
+            return value
+
+    def _mark_node_updated(self, node_id: str) -> None:
+        """Změna uzlu už čekající na add_nodes se složí do něj."""
+        self._node_digests.pop(node_id, None)
+        if node_id not in self._pending["add_nodes"]:
+            self._pending["update_nodes"][node_id] = True
+
+    def _mark_edge_updated(self, key: tuple[str, str],
+                           changed: Iterable[str]) -> None:
+        """Změna meta hrany (klíče `changed`) odejde jako upsert v add_edges
+        (značka False = existující hrana – její odebrání v témž tiku musí do
+        remove_edges). Zneplatní jen vážené cesty přes změněné klíče."""
+        self._edge_digests.pop(key, None)
+        revisions = self._weight_revisions
+        for meta_key in changed:
+            if meta_key in revisions:
+                revisions[meta_key] += 1
+        self._pending["add_edges"].setdefault(key, False)
 
     def remove_node(self, node_id: str) -> None:
         with self._lock:
             if node_id not in self._nodes:
                 raise ValueError(f"Uzel '{node_id}' neexistuje")
-            for key in [k for k in self._edges if node_id in k]:
-                self._remove_edge_locked(key)
-            del self._nodes[node_id]
-            self._pending["update_nodes"].pop(node_id, None)
-            if self._pending["add_nodes"].pop(node_id, None) is None:
-                self._pending["remove_nodes"][node_id] = True
+            self._remove_node_locked(node_id)
+
+    def _remove_node_locked(self, node_id: str) -> None:
+        """Odeber uzel i s hranami (přes index sousedů – O(stupeň), ne O(E))."""
+        for neighbor in list(self._adjacency.get(node_id, ())):
+            self._remove_edge_locked(_edge_key(node_id, neighbor))
+        self._index.remove(self._writable_nodes().pop(node_id))
+        self._adjacency.pop(node_id, None)
+        if node_id in self._positions:
+            self._writable_positions().pop(node_id)
+        self._topology += 1
+        if self._components is not None:
+            self._components.discard(node_id)
+        self._node_digests.pop(node_id, None)
+        if self._lru is not None:
+            self._lru.pop(node_id, None)
+        self._pending["update_nodes"].pop(node_id, None)
+        if self._pending["add_nodes"].pop(node_id, None) is None:
+            self._pending["remove_nodes"][node_id] = True
+
+    # ---- strop uzlů (LRU) ----------------------------------------------
+
+    def _touch(self, *node_ids: str) -> None:
+        """Označ uzly jako naposledy dotčené (konec LRU fronty). O(1)."""
+        if self._lru is None:
+            return
+        for node_id in node_ids:
+            self._lru[node_id] = None
+            self._lru.move_to_end(node_id)
+
+    def _evict_locked(self) -> None:
+        """Nad stropem max_nodes vyhoď nejdéle nedotčené uzly (i s hranami
+        a trvalými toky přes ně). Amortizovaně O(1) na přidaný uzel."""
+        if self._lru is None:
+            return
+        while len(self._nodes) > self._max_nodes:
+            victim, _ = self._lru.popitem(last=False)
+            logger.debug("max_nodes=%d: vyhazuji uzel '%s'",
+                         self._max_nodes, victim)
+            self._remove_node_locked(victim)
 
     # ---- hrany ---------------------------------------------------------
 
@@ -445,12 +790,24 @@ class Canvas:
                     f"Hrana {source}–{target}: oba uzly musí existovat")
             if source == target:
                 raise ValueError("Hrana nesmí vést z uzlu do něj samého")
-            key = _edge_key(source, target)
+            # klíč z internovaných id záznamů – tuple sdílí řetězce s uzly
+            key = _edge_key(self._nodes[source].id, self._nodes[target].id)
             if key in self._edges:
                 raise ValueError(f"Hrana {key[0]}–{key[1]} už existuje")
-            edge = {"source": key[0], "target": key[1], "meta": dict(meta)}
-            self._edges[key] = edge
-            self._pending["add_edges"][key] = self._public_edge(edge)
+            edge = EdgeRecord(key[0], key[1], interned_meta(meta), self._epoch)
+            self._writable_edges()[key] = edge
+            self._adjacency.setdefault(key[0], set()).add(key[1])
+            self._adjacency.setdefault(key[1], set()).add(key[0])
+            self._pending["add_edges"][key] = True
+            self._topology += 1
+            if self._components is not None:
+                self._components.union(*key)
+            if self._metrics is not None:
+                self._derive_locked(key[0])
+                self._derive_locked(key[1])
+            if self._positions:
+                self._spawn_near_locked(*key)
+            self._touch(source, target)
 
     def ensure_edge(self, source: str, target: str, **meta: Any) -> None:
         """Idempotentní add_edge: neexistující hranu založí, existující
@@ -465,12 +822,27 @@ class Canvas:
             if edge is None:
                 self._add_edge(source, target, meta)
                 return
-            merged = {**edge["meta"], **meta}
-            if merged == edge["meta"]:
+            self._touch(source, target)
+            merged = {**edge.meta, **interned_meta(meta)}
+            if merged == edge.meta:
                 return
-            edge["meta"] = merged
             key = _edge_key(source, target)
-            self._pending["add_edges"][key] = self._public_edge(edge)
+            self._own_edge(key).meta = merged
+            self._mark_edge_updated(key, meta)
+
+    def incr_edge(self, source: str, target: str, key: str,
+                  delta: float = 1) -> float:
+        """Hranová obdoba incr: čítač v meta hrany (neorientovaně), klientům
+        odejde agregovaně jako upsert v add_edges, nejvýš jednou za tik."""
+        with self._lock:
+            edge_key = _edge_key(source, target)
+            edge = self._edges.get(edge_key)
+            if edge is None:
+                raise ValueError(f"Hrana {source}–{target} neexistuje")
+            value = _incremented(self._own_edge(edge_key).meta, key, delta)
+            self._touch(source, target)
+            self._mark_edge_updated(edge_key, (key,))
+            return value
 
     def remove_edge(self, source: str, target: str) -> None:
         with self._lock:
@@ -480,10 +852,21 @@ class Canvas:
             self._remove_edge_locked(key)
 
     def _remove_edge_locked(self, key: tuple[str, str]) -> None:
-        del self._edges[key]
-        if self._pending["add_edges"].pop(key, None) is None:
+        del self._writable_edges()[key]
+        self._edge_digests.pop(key, None)
+        self._adjacency[key[0]].discard(key[1])
+        self._adjacency[key[1]].discard(key[0])
+        # jen hranu založenou v témž tiku klient nezná; změněnou (False) má
+        if self._pending["add_edges"].pop(key, None) is not True:
             self._pending["remove_edges"][key] = True
+        self._topology += 1
+        self._components = None            # union-find odebrání neumí
+        if self._metrics is not None:
+            self._derive_locked(key[0])
+            self._derive_locked(key[1])
         self._invalidate_flows_locked(key)
+        for path_id in list(self._path_edges.get(key, ())):
+            self._drop_path_locked(path_id)
 
     def _invalidate_flows_locked(self, edge_key: tuple[str, str]) -> None:
         """Zruš trvalé toky, jejichž cesta vede přes odstraněnou hranu.
@@ -506,29 +889,197 @@ class Canvas:
                 self.add_edge(source, target)
 
     def add_graph(self, graph, *, type_attr: str | None = None,
-                  label: str | None = None) -> None:
+                  label: str | None = None, mode: str = "merge") -> None:
         """Importuj graf ve stylu networkx – duck-typing přes
         graph.nodes(data=True) a graph.edges(data=True), závislost na
         networkx nevzniká. Id uzlů se převádí str(), atributy jdou do meta.
         `type_attr` vybere meta klíč jako typ uzlu (neznámé typy se
         auto-registrují prázdným stylem), `label` je šablona popisku pro
-        importované uzly. Self-loops se přeskočí s warningem; opakovaný
-        import je díky ensure_* idempotentní."""
-        with self._lock, self.batch():
+        importované uzly. Self-loops se přeskočí s warningem.
+
+        `mode="merge"` (default) je idempotentní jako ensure_*;
+        `mode="replace"` nejdřív celý graf canvasu zahodí (i trvalé toky).
+        Nové uzly a hrany – celý import do prázdného canvasu – jdou hromadnou
+        cestou bez porovnávání meta; vše odejde klientům jedním patchem.
+
+        Konec hrany, který v graph.nodes chybí (networkx takový graf
+        nevyrobí, duck-typed zdroj ano), vznikne jako holý uzel bez typu
+        a meta – stejně jako ve streamovaných loaderech; add_graph tu dřív
+        hlásil ValueError."""
+        if mode not in ("merge", "replace"):
+            raise ValueError("mode musí být 'merge' nebo 'replace'")
+
+        def nodes():
             for node_id, data in graph.nodes(data=True):
-                meta = dict(data)
                 node_type = None
-                if type_attr is not None and type_attr in meta:
-                    node_type = str(meta.pop(type_attr))
-                    if node_type not in self._node_types:
-                        self.define_type(node_type)
-                self._ensure_node(str(node_id), node_type, label, meta)
-            for a, b, data in graph.edges(data=True):
-                sa, sb = str(a), str(b)
-                if sa == sb:
-                    logger.warning("add_graph: self-loop '%s' přeskočen", sa)
+                if type_attr is not None and type_attr in data:
+                    data = dict(data)
+                    node_type = str(data.pop(type_attr))
+                yield str(node_id), node_type, label, data
+
+        # meta se nekopíruje – _ingest si ji internuje do vlastního dictu
+        edges = ((str(a), str(b), data)
+                 for a, b, data in graph.edges(data=True))
+        with self._lock, self.batch():
+            if mode == "replace":
+                self._clear_graph_locked()
+            self._ingest(nodes(), edges)
+
+    def _clear_graph_locked(self) -> None:
+        """Odeber všechny uzly, hrany a trvalé toky najednou – O(N + E) bez
+        kaskády per uzel (sousedé, invalidace toků po hranách)."""
+        pending = self._pending
+        for key in self._edges:
+            if pending["add_edges"].pop(key, None) is not True:
+                pending["remove_edges"][key] = True
+        for node_id in self._nodes:
+            pending["update_nodes"].pop(node_id, None)
+            if pending["add_nodes"].pop(node_id, None) is None:
+                pending["remove_nodes"][node_id] = True
+        for flow_id in self._flows:
+            self._actions.append({"action": "stop_flow", "flow_id": flow_id})
+        self._flows = {}
+        for path_id in self._paths:
+            self._actions.append({"action": "drop_path", "path_id": path_id})
+        self._paths, self._path_ids, self._path_edges = {}, {}, {}
+        self._nodes, self._edges = {}, {}
+        self._nodes_shared = self._edges_shared = False
+        self._positions, self._positions_shared = {}, False
+        self._positions_version += 1
+        self._adjacency = {}
+        self._topology += 1
+        self._components = UnionFind()
+        self._index.clear()
+        self._node_digests, self._edge_digests = {}, {}
+        if self._lru is not None:
+            self._lru.clear()
+
+    def _ingest(self, nodes: Iterable[tuple[str, str | None, str | None,
+                                            dict[str, Any]]],
+                edges: Iterable[tuple[str, str, dict[str, Any]]],
+                bare: set[str] | None = None) -> None:
+        """Hromadný idempotentní import jedné dávky (add_graph, loaders):
+        nové uzly a hrany vzniknou rovnou jako záznamy přes
+        _bulk_insert_locked, existující se sloučí jako ensure_*. Chybějící
+        konce hran se založí holé, neznámé typy se auto-registrují prázdným
+        stylem, self-loops se přeskočí s warningem. Dávka = jeden batch
+        (jeden patch). `bare` = id holých konců založených dřívějšími
+        dávkami téhož importu (doplňuje se); jejich pozdější řádek ještě
+        smí nastavit typ a label šablonu."""
+        with self._lock, self.batch(), gc_paused():
+            fresh: dict[str, NodeRecord] = {}
+            for node_id, type, label, meta in nodes:
+                if type is not None and type not in self._node_types:
+                    self._node_types[type] = {}
+                if node_id in self._nodes:
+                    if bare is not None and node_id in bare:
+                        bare.discard(node_id)
+                        self._fill_bare_node_locked(node_id, type, label, meta)
+                    else:
+                        self._ensure_node(node_id, type, label, meta)
+                    continue
+                node = fresh.get(node_id)
+                if node is None:
+                    fresh[node_id] = NodeRecord(node_id, type, label,
+                                                interned_meta(meta),
+                                                self._epoch)
+                elif (type is not None and type != node.type) or \
+                        (label is not None and label != node.label_template):
+                    raise ValueError(
+                        f"Uzel '{node_id}' je v importu dvakrát s jiným typem"
+                        " nebo label šablonou")
+                else:
+                    node.meta.update(interned_meta(meta))
+            fresh_edges: dict[tuple[str, str], EdgeRecord] = {}
+            known, new = self._nodes.get, fresh.get
+            for source, target, meta in edges:
+                if source == target:
+                    logger.warning("import: self-loop '%s' přeskočen", source)
+                    continue
+                a = known(source) or new(source)
+                if a is None:
+                    a = fresh[source] = NodeRecord(source, None, None, {},
+                                                   self._epoch)
+                    if bare is not None:
+                        bare.add(source)
+                b = known(target) or new(target)
+                if b is None:
+                    b = fresh[target] = NodeRecord(target, None, None, {},
+                                                   self._epoch)
+                    if bare is not None:
+                        bare.add(target)
+                # klíč z internovaných id záznamů (viz _add_edge)
+                key = _edge_key(a.id, b.id)
+                edge = fresh_edges.get(key)
+                if edge is not None:
+                    edge.meta.update(interned_meta(meta))
+                elif key in self._edges:
+                    self._ensure_edge(source, target, meta)
+                else:
+                    fresh_edges[key] = EdgeRecord(key[0], key[1],
+                                                  interned_meta(meta),
+                                                  self._epoch)
+            self._bulk_insert_locked(list(fresh.values()),
+                                     list(fresh_edges.values()), announce=True)
+
+    def _fill_bare_node_locked(self, node_id: str, type: str | None,
+                               label: str | None,
+                               meta: dict[str, Any]) -> None:
+        """Holý konec hrany z dřívější dávky importu dostal vlastní řádek:
+        převezme typ, label šablonu i meta (klientům jako update)."""
+        node = self._own_node(node_id)
+        self._index.remove(node)
+        node.type, node.label_template = type, label
+        node.meta.update(interned_meta(meta))
+        self._index.add(node)
+        self._touch(node_id)
+        self._mark_node_updated(node_id)
+
+    def sync(self, nodes: Iterable[Any], edges: Iterable[Any] = ()) -> None:
+        """Deklarativně srovnej canvas s úplným požadovaným stavem:
+        uzly a hrany navíc odeber, chybějící přidej, změněné přepiš (meta
+        celá, typ i label šablona). Uzel je id, nebo dict ``id`` [+ ``type``,
+        ``label``, ``meta`` / zbylé klíče jako meta]; hrana je (source,
+        target[, meta]) nebo dict ``source``, ``target`` [+ meta]. Otisk
+        obsahu se u entity cachuje, takže opakovaný sync (inventura každých
+        10 s) porovná jen otisky a klientům odejdou jen skutečné změny –
+        vše jedním patchem. Hrana na uzel mimo `nodes` je chyba (ValueError
+        před jakoukoli změnou)."""
+        want_nodes = {}
+        for spec in nodes:
+            node_id, type, label, meta = _node_spec(spec)
+            want_nodes[node_id] = (type, label, meta)
+        want_edges = {}
+        for spec in edges:
+            source, target, meta = _edge_spec(spec)
+            for end in (source, target):
+                if end not in want_nodes:
+                    raise ValueError(
+                        f"sync: hrana {source}–{target} vede na uzel '{end}',"
+                        " který v nodes není")
+            if source == target:
+                logger.warning("sync: self-loop '%s' přeskočen", source)
+                continue
+            want_edges[_edge_key(source, target)] = meta
+        with self._lock, self.batch():
+            for key in [k for k in self._edges if k not in want_edges]:
+                self._remove_edge_locked(key)
+            for node_id in [i for i in self._nodes if i not in want_nodes]:
+                self._remove_node_locked(node_id)
+            digests = self._node_digests
+            for node_id, (type, label, meta) in want_nodes.items():
+                digest = _digest(type, label, meta)
+                if digests.get(node_id) == digest and node_id in self._nodes:
                     continue
-                self._ensure_edge(sa, sb, dict(data))
+                self._upsert_node_locked(node_id, type, label, meta)
+                digests[node_id] = digest
+            digests = self._edge_digests
+            for key, meta in want_edges.items():
+                digest = _digest(meta)
+                if digests.get(key) == digest and key in self._edges:
+                    continue
+                self._upsert_edge_locked(key[0], key[1], meta)
+                digests[key] = digest
 
     @classmethod
     def from_networkx(cls, graph, *, type_attr: str | None = None,
@@ -539,6 +1090,101 @@ class Canvas:
         canvas.add_graph(graph, type_attr=type_attr, label=label)
         return canvas
 
+    # ---- uložení na disk ------------------------------------------------
+
+    def save(self, path, *, compress: bool = False) -> None:
+        """Ulož stav (graf, config, typy, trvalé toky) do kompaktního
+        binárního sloupcového souboru; `compress=True` = zlib per sekce.
+        Stav se zmrazí v O(1), zápis běží mimo zámek. Formát viz persist."""
+        persist.save(self, path, compress=compress)
+
+    @classmethod
+    def load(cls, path, **canvas_kwargs) -> "Canvas":
+        """Canvas ze souboru uloženého `save` – bez validace per uzel,
+        indexy se staví hromadně. `canvas_kwargs` (např. max_nodes, title)
+        jdou do konstruktoru a mají přednost; zbytek configu a `seq` se
+        převezmou ze souboru. Meta se ukládá jako JSON, takže neprojde
+        přesně: n-tice se vrátí jako seznamy, číselné klíče slovníků jako
+        řetězce."""
+        return persist.load(cls, path, **canvas_kwargs)
+
+    def _restore(self, header: dict[str, Any], nodes: list[NodeRecord],
+                 edges: list[EdgeRecord],
+                 positions: dict[str, tuple[float, float, float]] | None = None,
+                 keep: Iterable[str] = ()) -> None:
+        """Převezmi stav načtený persist.load do čerstvého canvasu. Klíče
+        configu z `keep` (explicitní kwargs konstruktoru) mají přednost před
+        souborem. Strop max_nodes se uplatní až po obnově toků, cest a pozic,
+        aby je vyhození uzlů zneplatnilo; klienti canvas ještě neviděli,
+        takže delty ani akce z vyhazování se nezařadí."""
+        with self._lock:
+            keep = set(keep)
+            self.config.update({key: value
+                                for key, value in header["config"].items()
+                                if key not in keep})
+            self._node_types = {n: dict(s)
+                                for n, s in header["node_types"].items()}
+            self._flow_types = {n: dict(s)
+                                for n, s in header["flow_types"].items()}
+            self._node_label_template = header["node_label"]
+            self._seq = header["seq"]
+            self._bulk_insert_locked(nodes, edges, announce=False, evict=False)
+            self._flows = {f["flow_id"]: dict(f) for f in header["flows"]}
+            for path_id, path in header.get("paths", {}).items():
+                self._define_path_locked(path_id, list(path))
+            if positions:
+                self._positions = positions
+                self._positions_shared = False
+                self._positions_version += 1
+            self._evict_locked()
+            self._pending = self._empty_pending()
+            self._actions = []
+
+    def _bulk_insert_locked(self, nodes: list[NodeRecord],
+                            edges: list[EdgeRecord], *, announce: bool,
+                            evict: bool = True) -> None:
+        """Hromadné vložení hotových záznamů bez validace a idempotence
+        (volající ručí za unikátní id a existující konce hran). Udržuje
+        indexy, sousedy i LRU; `announce` = zařadit add delty klientům,
+        `evict=False` = strop max_nodes uplatní volající sám."""
+        nodes_w = self._writable_nodes()
+        edges_w = self._writable_edges()
+        adjacency = self._adjacency
+        pending_nodes = self._pending["add_nodes"]
+        pending_edges = self._pending["add_edges"]
+        indexed = self._index.by_type is not None or self._index.by_meta
+        for node in nodes:
+            node.epoch = self._epoch
+            nodes_w[node.id] = node
+            if indexed:
+                self._index.add(node)
+            if announce:
+                pending_nodes[node.id] = True
+        if self._lru is not None:
+            self._touch(*(node.id for node in nodes))
+        for edge in edges:
+            edge.epoch = self._epoch
+            key = (edge.source, edge.target)
+            edges_w[key] = edge
+            adjacency.setdefault(key[0], set()).add(key[1])
+            adjacency.setdefault(key[1], set()).add(key[0])
+            if announce:
+                pending_edges[key] = True
+        self._topology += 1
+        if edges:
+            self._components = None        # přestaví se až při dotazu
+        if self._positions:
+            for edge in edges:
+                self._spawn_near_locked(edge.source, edge.target)
+        if self._metrics is not None:
+            touched = dict.fromkeys(node.id for node in nodes)
+            for edge in edges:
+                touched[edge.source] = touched[edge.target] = None
+            for node_id in touched:
+                self._derive_locked(node_id)
+        if evict:
+            self._evict_locked()
+
     # ---- čtení ---------------------------------------------------------
 
     def has_node(self, node_id: str) -> bool:
@@ -549,6 +1195,237 @@ class Canvas:
         with self._lock:
             return _edge_key(source, target) in self._edges
 
+    def has_path(self, path_id: str) -> bool:
+        """Platí ještě cesta z register_path (žádná její hrana nezmizela)?"""
+        with self._lock:
+            return path_id in self._paths
+
+    def create_index(self, *meta_keys: str, types: bool = True) -> None:
+        """Zapni sekundární indexy pro select(): index podle typu uzlu
+        (`types`) a hash indexy podle zadaných meta klíčů. Naplní se hned
+        z existujících uzlů a dál se udržují inkrementálně. Opakované volání
+        jen přidá další klíče."""
+        with self._lock:
+            self._index.enable(self._nodes.values(), types=types,
+                               meta_keys=meta_keys)
+
+    def select(self, type: str | None = None,
+               where: dict[str, Any] | None = None) -> list[dict[str, Any]]:
+        """Kopie uzlů daného typu, jejichž meta odpovídá všem dvojicím
+        `where` (rovnost) – např. ``select(type="router",
+        where={"status": "busy"})``. S indexy (create_index) se prochází jen
+        kandidáti z nejmenšího indexu, bez nich celý graf."""
+        where = dict(where or {})
+        with self._lock:
+            ids = self._index.candidates(type, where)
+            candidates = (self._nodes.values() if ids is None
+                          else (self._nodes[i] for i in ids))
+            return [self._public_node(n) for n in candidates
+                    if (type is None or n.type == type)
+                    and all(k in n.meta and n.meta[k] == v
+                            for k, v in where.items())]
+
+    # ---- komponenty souvislosti ----------------------------------------
+
+    def component_of(self, node_id: str) -> str:
+        """Reprezentant komponenty souvislosti uzlu v O(α): dva uzly jsou
+        spojené cestou, právě když mají stejného reprezentanta. Je to id
+        některého uzlu komponenty a platí do další změny topologie."""
+        with self._lock:
+            self._require_node(node_id)
+            return self._component_index().find(node_id)
+
+    def _component_index(self) -> UnionFind:
+        """Union-find komponent. Přidání hrany ho udržuje inkrementálně;
+        po odebrání hrany či hromadném vložení se přestaví z hran
+        v O(E α) až tady, při prvním dotazu."""
+        if self._components is None:
+            self._components = UnionFind.build(self._edges)
+        return self._components
+
+    # ---- rozložení -----------------------------------------------------
+
+    def precompute_layout(self, *, iterations: int = 100, seed: int = 0,
+                          cache: LayoutCache | None = None) -> int:
+        """Spočítej rozložení grafu na serveru (layout.force_layout, NumPy
+        Barnes–Hut) a pošli ho klientům v initu – nová záložka otevře graf
+        už usazený místo zahřívání fyziky od nuly. Počítá se mimo zámek nad
+        zmraženým stavem; uzly s pozicí z ní startují (opakované volání
+        jen doladí). Uzly přidané během výpočtu pozici nedostanou, odebrané
+        se zahodí. Vrací počet umístěných uzlů. Potřebuje numpy.
+
+        S `cache` (layoutcache.LayoutCache) se nejdřív převezmou pozice
+        uložené pro shodnou či podobnou topologii; je-li umístěno vše,
+        výpočet odpadá, jinak je jen doladí. Výsledek se do cache uloží."""
+        if cache is not None:
+            cache.restore(self)
+            state = self.state()
+            if state.positions and len(state.positions) == len(state):
+                return len(state.positions)
+        placed = self._compute_layout(iterations, seed)
+        if cache is not None:
+            cache.store(self.state())
+        return placed
+
+    def _compute_layout(self, iterations: int, seed: int) -> int:
+        state = self.state()
+        positions = force_layout(
+            [n.id for n in state.node_records()],
+            [(e.source, e.target) for e in state.edge_records()],
+            dimensions=state.config["dimensions"], iterations=iterations,
+            seed=seed, initial=state.positions)
+        with self._lock:
+            target = self._writable_positions()
+            placed = 0
+            for node_id, position in positions.items():
+                if node_id in self._nodes:
+                    target[node_id] = position
+                    placed += 1
+            return placed
+
+    def set_positions(self, positions: Mapping[str, Sequence[float]]) -> int:
+        """Převezmi usazené pozice uzlů {id: (x, y[, z])} – typicky od
+        vedoucího klienta (server je sám nahrává, viz serve) nebo z vlastního
+        zdroje. Dostanou je i další inity, takže nové záložky a reconnecty
+        přeskočí zahřívání fyziky; uloží se se save(). Neznámá id a
+        nekonečné souřadnice se přeskočí. Vrací počet převzatých pozic."""
+        flat = self.config["dimensions"] == 2
+        with self._lock:
+            target = self._writable_positions()
+            taken = 0
+            for node_id, coords in positions.items():
+                if node_id not in self._nodes:
+                    continue
+                x, y, *rest = coords
+                z = 0.0 if flat or not rest else rest[0]
+                if not all(map(math.isfinite, (x, y, z))):
+                    continue
+                target[node_id] = (round(float(x), 1), round(float(y), 1),
+                                   round(float(z), 1))
+                taken += 1
+            return taken
+
+    def _spawn_near_locked(self, a: str, b: str) -> None:
+        """Nová hrana mezi umístěným a neumístěným uzlem: neumístěný dostane
+        pozici poblíž souseda (jako _spawnPosition klientské fyziky), aby
+        ho příští init neposlal bez pozice na náhodné místo."""
+        positions = self._positions
+        if (a in positions) == (b in positions):
+            return
+        near, new = (a, b) if a in positions else (b, a)
+        x, y, z = positions[near]
+        jitter = _SPAWN_JITTER
+        self._writable_positions()[new] = (
+            round(x + random.uniform(-jitter, jitter), 1),
+            round(y + random.uniform(-jitter, jitter), 1),
+            0.0 if self.config["dimensions"] == 2
+            else round(z + random.uniform(-jitter, jitter), 1))
+
+    # ---- odvozené metriky -----------------------------------------------
+
+    def track_metrics(self, *names: str, interval: float = 2.0,
+                      style: Callable[[dict[str, Any]], dict[str, Any]]
+                      | None = None, samples: int | None = 256) -> None:
+        """Zapni odvozené atributy uzlů v meta: "degree" (stupeň, drží se
+        v O(1) při každé změně hrany), "component" (číslo komponenty
+        souvislosti, 0 = největší), "pagerank" a "betweenness" (odhad ze
+        `samples` zdrojů, None = přesně). Komponenty a centrality se
+        přepočítají na pozadí – every úloha nejvýš jednou za `interval`
+        sekund a jen po změně topologie, nad zmraženým stavem; bez serveru
+        je přepočítá refresh_metrics(). Atributy jsou běžná meta, fungují
+        v label šablonách ("{degree}"), select() i detailu; `style(meta)`
+        z nich vrátí meta stylu (size, color) při každé jejich změně.
+        Volej jednou, před serve()."""
+        unknown = [name for name in names if name not in METRICS]
+        if not names or unknown:
+            raise ValueError(f"track_metrics: neznámá metrika {unknown}"
+                             f" – dostupné jsou {', '.join(METRICS)}")
+        with self._lock:
+            if self._metrics is not None:
+                raise ValueError("track_metrics už je zapnuté")
+            self._metrics = {"names": frozenset(names), "style": style,
+                             "samples": samples, "published": None}
+            self._derived_keys.update(names)
+            with self.batch():
+                for node_id in list(self._nodes):
+                    self._derive_locked(node_id)
+        if set(names) - {"degree"}:
+            self.every(interval, name="metrics")(self.refresh_metrics)
+
+    def refresh_metrics(self) -> bool:
+        """Přepočítej komponenty, PageRank a betweenness, pokud se od
+        minula změnila topologie, a publikuj změněné hodnoty jedním
+        patchem. Výpočet běží mimo zámek nad CanvasState. Vrátí, zda se
+        přepočítávalo."""
+        with self._lock:
+            metrics = self._metrics
+            if metrics is None:
+                return False
+            heavy = metrics["names"] - {"degree"}
+            version = self._topology
+            if not heavy or metrics["published"] == version:
+                return False
+            state = self.state()
+            uf = None
+            if "component" in heavy and self._components is not None:
+                uf = self._components.copy()
+        node_ids = [node.id for node in state.node_records()]
+        values: dict[str, dict[str, Any]] = {i: {} for i in node_ids}
+        rebuilt = None
+        if "component" in heavy:
+            if uf is None:
+                uf = rebuilt = UnionFind.build(
+                    (e.source, e.target) for e in state.edge_records())
+            for node_id, label in component_labels(node_ids, uf).items():
+                values[node_id]["component"] = label
+        if heavy & {"pagerank", "betweenness"}:
+            adjacency: dict[str, list[str]] = {i: [] for i in node_ids}
+            for edge in state.edge_records():
+                adjacency[edge.source].append(edge.target)
+                adjacency[edge.target].append(edge.source)
+            if "pagerank" in heavy:
+                for node_id, rank in pagerank(adjacency).items():
+                    values[node_id]["pagerank"] = round(rank, 6)
+            if "betweenness" in heavy:
+                for node_id, score in betweenness(
+                        adjacency, samples=metrics["samples"]).items():
+                    values[node_id]["betweenness"] = round(score, 6)
+        with self._lock, self.batch():
+            for node_id, derived in values.items():
+                self._derive_locked(node_id, derived)
+            if rebuilt is not None and self._components is None \
+                    and self._topology == version:
+                self._components = rebuilt   # líná přestavba hotová na pozadí
+            metrics["published"] = version
+        return True
+
+    def _derive_locked(self, node_id: str,
+                       values: dict[str, Any] | None = None) -> None:
+        """Zapiš do meta uzlu odvozené atributy – stupeň, `values`
+        z refresh_metrics a z nich odvozený styl; patch jen při změně.
+        LRU se nedotkne (nejde o aktivitu uzlu)."""
+        node = self._nodes.get(node_id)
+        if node is None:
+            return
+        metrics = self._metrics
+        derived = dict(values) if values else {}
+        if "degree" in metrics["names"]:
+            derived["degree"] = len(self._adjacency.get(node_id, ()))
+        if metrics["style"] is not None:
+            styled = metrics["style"]({**node.meta, **derived}) or {}
+            self._derived_keys.update(styled)
+            derived.update(styled)
+        meta = node.meta
+        changed = {k: v for k, v in derived.items()
+                   if k not in meta or meta[k] != v}
+        if not changed:
+            return
+        self._index.remove_meta(node)
+        node = self._own_node(node_id)
+        node.meta.update(interned_meta(changed))
+        self._index.add_meta(node)
+        self._mark_node_updated(node_id)
+
     def node(self, node_id: str) -> dict[str, Any] | None:
         """Veřejná kopie uzlu {'id','type','label','meta'} s vyrenderovaným
         popiskem; None když neexistuje. Mutace návratu stav neovlivní."""
@@ -563,6 +1440,97 @@ class Canvas:
             edge = self._edges.get(_edge_key(source, target))
             return self._public_edge(edge) if edge else None
 
+    def node_view(self, node_id: str) -> NodeView | None:
+        """Read-only pohled na uzel bez kopie meta (mapping jako node());
+        popisek se vyrenderuje až při čtení. None když neexistuje."""
+        with self._lock:
+            node = self._nodes.get(node_id)
+            if node is None:
+                return None
+            self._freeze_records()
+            return NodeView(node, self._node_label_template)
+
+    def edge_view(self, source: str, target: str) -> EdgeView | None:
+        """Read-only pohled na hranu bez kopie meta; None když neexistuje."""
+        with self._lock:
+            edge = self._edges.get(_edge_key(source, target))
+            if edge is None:
+                return None
+            self._freeze_records()
+            return EdgeView(edge)
+
+    def iter_nodes(self, batch: int = 10_000) -> Iterator[list[NodeView]]:
+        """Stránkované čtení všech uzlů: iterátor seznamů až `batch`
+        read-only pohledů. Zámek se drží jen na O(1) zmražení stavu – stránky
+        se pak čtou ze zmraženého grafu bez zámku, konzistentně k okamžiku
+        volání (ne až prvního next), zatímco producenti dál mutují. Vadný
+        `batch` selže hned při volání."""
+        if batch <= 0:
+            raise ValueError("batch musí být kladný")
+        with self._lock:
+            nodes, _ = self._freeze_all()
+            template = self._node_label_template
+        return _pages(nodes.values(), batch,
+                      lambda n: NodeView(n, template))
+
+    def iter_edges(self, batch: int = 10_000) -> Iterator[list[EdgeView]]:
+        """Stránkované čtení všech hran (viz iter_nodes)."""
+        if batch <= 0:
+            raise ValueError("batch musí být kladný")
+        with self._lock:
+            _, edges = self._freeze_all()
+        return _pages(edges.values(), batch, EdgeView)
+
+    # ---- copy-on-write -------------------------------------------------
+
+    def _freeze_records(self) -> None:
+        """Zmraz všechny existující záznamy v O(1): posun epochy. Záznam ze
+        starší epochy se před příští mutací naklonuje (_own_node/_own_edge)."""
+        self._epoch += 1
+
+    def _freeze_all(self) -> tuple[dict[str, NodeRecord],
+                                   dict[tuple[str, str], EdgeRecord]]:
+        """Zmraz záznamy i kontejnery a vrať je. Příští vložení/odebrání
+        nejdřív kontejner zkopíruje (jednou za zmražení, jen ukazatele)."""
+        self._freeze_records()
+        self._nodes_shared = self._edges_shared = True
+        self._positions_shared = True
+        return self._nodes, self._edges
+
+    def _writable_positions(self) -> dict[str, tuple[float, float, float]]:
+        self._positions_version += 1
+        if self._positions_shared:
+            self._positions = dict(self._positions)
+            self._positions_shared = False
+        return self._positions
+
+    def _writable_nodes(self) -> dict[str, NodeRecord]:
+        if self._nodes_shared:
+            self._nodes = dict(self._nodes)
+            self._nodes_shared = False
+        return self._nodes
+
+    def _writable_edges(self) -> dict[tuple[str, str], EdgeRecord]:
+        if self._edges_shared:
+            self._edges = dict(self._edges)
+            self._edges_shared = False
+        return self._edges
+
+    def _own_node(self, node_id: str) -> NodeRecord:
+        """Záznam uzlu, který smí mutovat (zmražený se nejdřív naklonuje)."""
+        node = self._nodes[node_id]
+        if node.epoch != self._epoch:
+            node = node.clone(self._epoch)
+            self._writable_nodes()[node_id] = node
+        return node
+
+    def _own_edge(self, key: tuple[str, str]) -> EdgeRecord:
+        edge = self._edges[key]
+        if edge.epoch != self._epoch:
+            edge = edge.clone(self._epoch)
+            self._writable_edges()[key] = edge
+        return edge
+
     @property
     def nodes(self) -> list[dict[str, Any]]:
         """Kopie všech uzlů (jako v snapshot); pořadí = pořadí přidání."""
@@ -575,54 +1543,61 @@ class Canvas:
         with self._lock:
             return [self._public_edge(e) for e in self._edges.values()]
 
-    # ---- labely --------------------------------------------------------
+    @property
+    def topology_version(self) -> int:
+        """Verze topologie: roste s každou změnou množiny uzlů či hran.
+        Levná kontrola „změnil se graf?“ pro cache nad canvasem."""
+        return self._topology
 
-    def _render_label(self, node: dict[str, Any]) -> str:
-        template = node["label_template"]
-        if template is None:                       # bez per-node šablony
-            template = self._node_label_template   # zkus celocanvasovou
-        if template is None:
-            return node["id"]
+    @property
+    def positions_version(self) -> int:
+        """Verze pozic: roste s každou změnou pozic uzlů (set_positions,
+        layout, odebrání uzlu)."""
+        return self._positions_version
 
-        def substitute(match: re.Match[str]) -> str:
-            key = match.group(1)
-            if key in node["meta"]:
-                return str(node["meta"][key])
-            logger.warning(
-                "Uzel '%s': klíč '%s' z label šablony chybí v metadatech",
-                node["id"], key)
-            return ""
+    # ---- labely --------------------------------------------------------
 
-        return _LABEL_KEY.sub(substitute, template)
+    def _render_label(self, node: NodeRecord) -> str:
+        return render_label(node, self._node_label_template)
 
-    def _public_node(self, node: dict[str, Any]) -> dict[str, Any]:
-        return {"id": node["id"], "type": node["type"],
-                "label": self._render_label(node), "meta": dict(node["meta"])}
+    def _public_node(self, node: NodeRecord) -> dict[str, Any]:
+        return {"id": node.id, "type": node.type,
+                "label": self._render_label(node), "meta": dict(node.meta)}
 
     @staticmethod
-    def _public_edge(edge: dict[str, Any]) -> dict[str, Any]:
-        return {"source": edge["source"], "target": edge["target"],
-                "meta": dict(edge["meta"])}
+    def _public_edge(edge: EdgeRecord) -> dict[str, Any]:
+        return {"source": edge.source, "target": edge.target,
+                "meta": dict(edge.meta)}
 
     # ---- snapshot ------------------------------------------------------
 
     def snapshot(self) -> dict[str, Any]:
         """Úplný stav pro init zprávu. Pozn.: pending delty jsou už součástí
-        stavu – klient proto aplikuje adds jako upserty (idempotence)."""
-        with self._lock:
-            return {
-                "seq": self._seq,
-                "config": dict(self.config),
-                "node_types": {n: dict(s) for n, s in self._node_types.items()},
-                "nodes": [self._public_node(n) for n in self._nodes.values()],
-                "edges": [self._public_edge(e) for e in self._edges.values()],
-                "flow_types": {n: dict(s) for n, s in self._flow_types.items()},
-                "flows": [dict(f) for f in self._flows.values()],
-                "windows": [
+        stavu – klient proto aplikuje adds jako upserty (idempotence).
+        Graf se serializuje mimo zámek (viz state())."""
+        return self.state().as_dict()
+
+    def state(self) -> CanvasState:
+        """O(1) handle neměnné verze stavu (copy-on-write). Zámek se drží
+        jen na zmražení kontejnerů a kopii drobností (config, typy, toky,
+        okna); serializaci grafu si volající udělá mimo zámek, zatímco
+        producenti dál mutují."""
+        with self._lock:
+            nodes, edges = self._freeze_all()
+            return CanvasState(
+                seq=self._seq,
+                config=dict(self.config),
+                node_types={n: dict(s) for n, s in self._node_types.items()},
+                flow_types={n: dict(s) for n, s in self._flow_types.items()},
+                flows=[dict(f) for f in self._flows.values()],
+                paths={pid: list(p) for pid, p in self._paths.items()},
+                positions=self._positions,
+                windows=[
                     {**w.spec(), "live": self._window_live.get(wid, False)}
                     for wid, w in self._windows.items()]
                 + [t.spec() for t in self._terminals.values()],
-            }
+                nodes=nodes, edges=edges,
+                label_template=self._node_label_template)
 
     # ---- delty ---------------------------------------------------------
 
@@ -647,14 +1622,176 @@ class Canvas:
             deltas = {
                 "remove_edges": [list(k) for k in self._pending["remove_edges"]],
                 "remove_nodes": list(self._pending["remove_nodes"]),
-                "add_nodes": list(self._pending["add_nodes"].values()),
-                "update_nodes": list(self._pending["update_nodes"].values()),
-                "add_edges": list(self._pending["add_edges"].values()),
+                "add_nodes": [self._public_node(self._nodes[i])
+                              for i in self._pending["add_nodes"]],
+                "update_nodes": [self._public_node(self._nodes[i])
+                                 for i in self._pending["update_nodes"]],
+                "add_edges": [self._public_edge(self._edges[k])
+                              for k in self._pending["add_edges"]],
             }
+            if self._patch_listeners:
+                labels = {i: self._nodes[i].label_template
+                          for i in self._pending["add_nodes"]
+                          if self._nodes[i].label_template is not None}
             self._pending = self._empty_pending()
             self._seq += 1
+            for listener in self._patch_listeners:
+                listener(self._seq, deltas, labels)
             return self._seq, deltas
 
+    # ---- odběr proudu a replay -------------------------------------------
+
+    def subscribe(self, *, on_patch: Callable[..., None] | None = None,
+                  on_actions: Callable[..., None] | None = None
+                  ) -> Callable[[], None]:
+        """Odebírej vydrénovaný proud (žurnál, záznam relace, zrcadlení):
+        `on_patch(seq, deltas, labels)` po každém drain(), `on_actions(after,
+        actions)` po neprázdném drain_actions() – `after` je seq posledního
+        patche; akce odkazují na stav nejvýš o patch dál (server drénuje akce
+        před deltami). `labels` = {id: label šablona} nových uzlů, které ji
+        mají (payload nese jen vyrenderovaný popisek). Callbacky běží pod
+        zámkem canvasu: jen ať zařadí do fronty a payload nemutují. Vrací
+        funkci pro odhlášení."""
+        with self._lock:
+            if on_patch is not None:
+                self._patch_listeners.append(on_patch)
+            if on_actions is not None:
+                self._action_listeners.append(on_actions)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if on_patch in self._patch_listeners:
+                    self._patch_listeners.remove(on_patch)
+                if on_actions in self._action_listeners:
+                    self._action_listeners.remove(on_actions)
+        return unsubscribe
+
+    def apply_patch(self, deltas: dict[str, list],
+                    labels: dict[str, str] | None = None) -> None:
+        """Aplikuj patch ve tvaru z drain() – replay žurnálu či záznamu,
+        zrcadlení jiného canvasu. Adds/updates jsou upserty (meta se nahradí
+        celá, neznámý typ se zaregistruje prázdným stylem), remove
+        neexistujícího je no-op – opakované přehrání je idempotentní.
+        `labels` viz subscribe(); změny odejdou klientům jako běžné delty."""
+        labels = labels or {}
+        with self._lock, self.batch():
+            for source, target in deltas.get("remove_edges", ()):
+                key = _edge_key(source, target)
+                if key in self._edges:
+                    self._remove_edge_locked(key)
+            for node_id in deltas.get("remove_nodes", ()):
+                if node_id in self._nodes:
+                    self._remove_node_locked(node_id)
+            for node in (*deltas.get("add_nodes", ()),
+                         *deltas.get("update_nodes", ())):
+                self._upsert_node_locked(
+                    node["id"], node.get("type"),
+                    labels.get(node["id"], _KEEP), node.get("meta") or {})
+            for edge in deltas.get("add_edges", ()):
+                self._upsert_edge_locked(edge["source"], edge["target"],
+                                         edge.get("meta") or {})
+
+    def _upsert_node_locked(self, node_id: str, type: str | None,
+                            label: Any, meta: dict[str, Any]) -> None:
+        """Uzel přesně v daném stavu (typ, šablona, celá meta) bez validace
+        změn; `label=_KEEP` ponechá šablonu existujícího uzlu."""
+        if type is not None and type not in self._node_types:
+            self._node_types[type] = {}
+        node = self._nodes.get(node_id)
+        if node is None:
+            self._add_node(node_id, type, None if label is _KEEP else label,
+                           meta)
+            return
+        if label is _KEEP:
+            label = node.label_template
+        if self._derived_keys:             # odvozené atributy spravuje canvas
+            meta = {**meta, **{k: node.meta[k] for k in self._derived_keys
+                               if k in node.meta}}
+        if node.type != type or node.label_template != label:
+            self._index.remove(node)
+            node = NodeRecord(node.id, type, label, interned_meta(meta),
+                              self._epoch)
+            self._writable_nodes()[node.id] = node
+            self._index.add(node)
+        elif meta != node.meta:
+            self._index.remove_meta(node)
+            node = self._own_node(node_id)
+            node.meta = interned_meta(meta)
+            self._index.add_meta(node)
+        else:
+            return
+        self._touch(node_id)
+        self._mark_node_updated(node_id)
+
+    def _upsert_edge_locked(self, source: str, target: str,
+                            meta: dict[str, Any]) -> None:
+        key = _edge_key(source, target)
+        edge = self._edges.get(key)
+        if edge is None:
+            if source in self._nodes and target in self._nodes \
+                    and source != target:
+                self._add_edge(source, target, meta)
+            return
+        if meta != edge.meta:
+            changed = edge.meta.keys() | meta.keys()
+            self._own_edge(key).meta = interned_meta(meta)
+            self._mark_edge_updated(key, changed)
+
+    def apply_action(self, action: dict[str, Any]) -> None:
+        """Přehraj akci ve tvaru z drain_actions(): trvalé akce upraví stav
+        (trvalé toky, téma, styl hran) a akce se zařadí klientům. Tok po
+        cestě, která už neexistuje, a stop neznámého toku se přeskočí –
+        přehrání je idempotentní."""
+        kind = action.get("action")
+        with self._lock:
+            if kind == "define_path":
+                path = action.get("path") or []
+                if action.get("path_id") in self._paths or len(path) < 2 \
+                        or tuple(path) in self._path_ids or not all(
+                            _edge_key(a, b) in self._edges
+                            for a, b in zip(path, path[1:])):
+                    return
+                self._define_path_locked(action["path_id"], list(path))
+            elif kind == "drop_path":
+                if action.get("path_id") not in self._paths:
+                    return
+                self._drop_path_locked(action["path_id"])
+                return                      # _drop_path_locked akci zařadil
+            elif kind == "flow":
+                path = action.get("path") or self._paths.get(
+                    action.get("path_id"), [])
+                if len(path) < 2 or not all(
+                        _edge_key(a, b) in self._edges
+                        for a, b in zip(path, path[1:])):
+                    logger.debug("apply_action: tok po neplatné cestě %r"
+                                 " přeskočen", path)
+                    return
+                if action.get("flow_id") is not None:
+                    self._flows[action["flow_id"]] = {
+                        **{k: v for k, v in action.items() if k != "action"},
+                        "path": list(path)}
+            elif kind == "stop_flow":
+                if self._flows.pop(action.get("flow_id"), None) is None:
+                    return
+            elif kind == "set_theme":
+                self.config["theme"] = action["theme"]
+            elif kind == "set_edge_style":
+                self.config["edge_style"] = {
+                    "style": action["style"],
+                    "elasticity": action["elasticity"]}
+            elif kind in ("focus", "show_detail", "highlight"):
+                if action.get("node_id") not in self._nodes:
+                    return
+            self._actions.append(dict(action))
+
+    def _reset_stream(self, seq: int) -> None:
+        """Zahoď čekající delty i akce a nastav seq – po obnově stavu, který
+        klienti dostanou celý v init (žurnál)."""
+        with self._lock:
+            self._pending = self._empty_pending()
+            self._actions = []
+            self._seq = seq
+
     # ---- periodické úlohy ----------------------------------------------
 
     def every(self, seconds: float, *,
@@ -802,4 +1939,7 @@ class Canvas:
         """Vrátí akce k odeslání (v pořadí volání) a frontu vyprázdní."""
         with self._lock:
             actions, self._actions = self._actions, []
+            if actions:
+                for listener in self._action_listeners:
+                    listener(self._seq, actions)
             return actions
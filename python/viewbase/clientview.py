@@ -0,0 +1,413 @@
+"""Zúžené pohledy klientů: výřez podle kamery a filtry uzlů.
+
+Výřez (hello ``"viewport": true``): telefonu se nikdy neposílá celý graf,
+klient dostane jen uzly v okolí svého pohledu (koule kolem cíle kamery,
+poloměr z view_change × `margin`, nejvýš `max_nodes` nejbližších) a hrany
+mezi nimi. Výběr jde přes
+prostorovou mřížku (`SpatialGrid`) nad serverovými pozicemi – z
+precompute_layout, set_positions nebo serverového layoutu; uzel bez
+pozice do výřezu nepatří. Pohnutí kamerou pošle jen rozdíl (vstupující
+uzly s pozicemi a hranami, odcházející k odebrání) a běžné patche se
+pro klienta filtrují na jeho výřez. Klient má vlastní řadu `seq`.
+
+Mřížka se staví líně z pozic canvasu a platí, dokud nevzroste jeho verze
+pozic (`_positions_version`) – zápis do nesdíleného slovníku jde na místě.
+
+Filtr (`Filters`, event ``set_filter`` nebo POST /api/filter): klient
+vidí jen uzly vyhovující predikátu z `compile_filter` (jen routery, jen
+hosty jednoho tenanta, …) a hrany mezi nimi."""
+from __future__ import annotations
+
+import math
+import threading
+from typing import Any, Callable, Hashable
+
+from . import protocol
+from .canvas import Canvas, _edge_key
+
+CELL_SIZE = 200.0         # hrana buňky mřížky (~3 délky hrany layoutu)
+DEFAULT_RADIUS = 1000.0   # výchozí kamera klienta (3D z=900, fov 60°, 16:9)
+
+Position = tuple[float, float, float]
+
+
+class SpatialGrid:
+    """Uniformní mřížka nad pozicemi: buňka -> [(id, pozice)]."""
+
+    def __init__(self, positions: dict[str, Position],
+                 cell: float = CELL_SIZE) -> None:
+        self.cell = cell
+        self.cells: dict[tuple[int, int, int], list[tuple[str, Position]]] = {}
+        for node_id, p in positions.items():
+            self.cells.setdefault(self._key(p), []).append((node_id, p))
+
+    def _key(self, p: Position) -> tuple[int, int, int]:
+        c = self.cell
+        return (math.floor(p[0] / c), math.floor(p[1] / c),
+                math.floor(p[2] / c))
+
+    def query(self, center: Position, radius: float,
+              limit: int | None = None) -> list[str]:
+        """Id v kouli (center, radius) seřazená podle vzdálenosti; nejvýš
+        `limit` nejbližších."""
+        lo = self._key(tuple(x - radius for x in center))
+        hi = self._key(tuple(x + radius for x in center))
+        span = (hi[0] - lo[0] + 1) * (hi[1] - lo[1] + 1) * (hi[2] - lo[2] + 1)
+        if span > len(self.cells):          # velký pohled: projdi obsazené
+            cells = [v for k, v in self.cells.items()
+                     if all(lo[a] <= k[a] <= hi[a] for a in range(3))]
+        else:
+            cells = [self.cells[(x, y, z)]
+                     for x in range(lo[0], hi[0] + 1)
+                     for y in range(lo[1], hi[1] + 1)
+                     for z in range(lo[2], hi[2] + 1)
+                     if (x, y, z) in self.cells]
+        r2 = radius * radius
+        cx, cy, cz = center
+        hits = []
+        for bucket in cells:
+            for node_id, (x, y, z) in bucket:
+                d2 = (x - cx) ** 2 + (y - cy) ** 2 + (z - cz) ** 2
+                if d2 <= r2:
+                    hits.append((d2, node_id))
+        hits.sort()
+        return [node_id for _, node_id in hits[:limit]]
+
+
+def _patch(view: _Viewport | _Filtered, deltas: dict[str, list],
+           positions: dict[str, Position]) -> dict[str, Any]:
+    """Patch v řadě seq klienta; `positions` = serverové pozice uzlů,
+    které u klienta právě vstoupily (fyzika je nerozhází)."""
+    view.seq += 1
+    message = protocol.patch_message(view.seq, deltas)
+    if positions:
+        message["positions"] = positions
+    return message
+
+
+class _Viewport:
+    __slots__ = ("nodes", "edges", "seq", "center", "radius")
+
+    def __init__(self) -> None:
+        self.nodes: set[str] = set()
+        self.edges: set[tuple[str, str]] = set()
+        self.seq = 0
+        self.center: Position = (0.0, 0.0, 0.0)
+        self.radius = DEFAULT_RADIUS
+
+
+class Viewports:
+    """Výřezy připojených klientů jednoho canvasu. Volání serveru jsou
+    serializovaná jeho zámkem; mřížka je sdílená a chráněná vlastním."""
+
+    def __init__(self, canvas: Canvas, *, max_nodes: int = 2000,
+                 margin: float = 1.5) -> None:
+        if max_nodes < 1:
+            raise ValueError("max_nodes musí být aspoň 1")
+        self.canvas = canvas
+        self.max_nodes = max_nodes
+        self.margin = margin
+        self._clients: dict[Hashable, _Viewport] = {}
+        self._grid_lock = threading.Lock()
+        self._grid: SpatialGrid | None = None
+        self._grid_version = -1
+
+    def __contains__(self, client: Hashable) -> bool:
+        return client in self._clients
+
+    def _select(self, view: _Viewport) -> list[str]:
+        """Uzly ve výřezu podle aktuálních pozic; volat pod zámkem canvasu
+        (verze a slovník pozic se čtou konzistentně)."""
+        canvas = self.canvas
+        with self._grid_lock:
+            if self._grid_version != canvas.positions_version:
+                self._grid = SpatialGrid(canvas._positions)
+                self._grid_version = canvas.positions_version
+            grid = self._grid
+        return grid.query(view.center, view.radius * self.margin,
+                          self.max_nodes)
+
+    # ---- životní cyklus klienta -----------------------------------------
+
+    def connect(self, client: Hashable) -> dict[str, Any]:
+        """Zaregistruj klienta; vrací init (subgraph_dict) výchozího pohledu
+        s vlastní řadou seq od 0."""
+        view = _Viewport()
+        with self.canvas._lock:
+            state = self.canvas.state()
+            view.nodes = set(self._select(view)) & state._nodes.keys()
+        init = state.subgraph_dict(view.nodes)
+        init["seq"] = 0
+        view.edges = {_edge_key(e["source"], e["target"])
+                      for e in init["edges"]}
+        self._clients[client] = view
+        return init
+
+    def disconnect(self, client: Hashable) -> None:
+        self._clients.pop(client, None)
+
+    # ---- pohyb kamery ----------------------------------------------------
+
+    def move(self, client: Hashable, event: dict[str, Any]
+             ) -> dict[str, Any] | None:
+        """view_change klienta -> patch se vstupujícími/odcházejícími uzly
+        (None = výřez beze změny). Payload: target {x,y,z}, position, zoom,
+        volitelně radius (poloměr viditelné oblasti u cíle)."""
+        view = self._clients.get(client)
+        if view is None:
+            return None
+        try:
+            target = event["target"]
+            center = (float(target["x"]), float(target["y"]),
+                      float(target.get("z", 0.0)))
+            radius = event.get("radius")
+            if radius is None:              # odhad: vzdálenost kamery od cíle
+                position = event["position"]
+                radius = math.dist(center, (
+                    float(position["x"]), float(position["y"]),
+                    float(position.get("z", 0.0))))
+                radius /= float(event.get("zoom") or 1.0)
+            view.center, view.radius = center, max(float(radius), 1.0)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise ValueError("view_change: čekám target {x, y, z}"
+                             " a radius nebo position") from None
+        canvas = self.canvas
+        with canvas._lock:
+            wanted = set(self._select(view))
+            wanted &= canvas._nodes.keys()
+            enter = wanted - view.nodes
+            leave = view.nodes - wanted
+            if not enter and not leave:
+                return None
+            gone = [key for key in view.edges
+                    if key[0] in leave or key[1] in leave]
+            view.edges.difference_update(gone)
+            view.nodes = wanted
+            added = []
+            for node_id in enter:
+                for neighbor in canvas._adjacency.get(node_id, ()):
+                    key = _edge_key(node_id, neighbor)
+                    if neighbor in wanted and key not in view.edges:
+                        view.edges.add(key)
+                        added.append(canvas._public_edge(canvas._edges[key]))
+            deltas = {
+                "remove_edges": [list(key) for key in gone],
+                "remove_nodes": sorted(leave),
+                "add_nodes": [canvas._public_node(canvas._nodes[i])
+                              for i in enter],
+                "update_nodes": [],
+                "add_edges": added,
+            }
+            positions = {i: canvas._positions[i] for i in enter
+                         if i in canvas._positions}
+        return _patch(view, deltas, positions)
+
+    # ---- filtrování běžných patchů ---------------------------------------
+
+    def filter(self, client: Hashable, deltas: dict[str, list]
+               ) -> dict[str, Any] | None:
+        """Patch canvasu zúžený na výřez klienta (None = nic pro něj).
+        Nový uzel vstoupí, leží-li (podle serverové pozice) ve výřezu."""
+        view = self._clients[client]
+        positions = self.canvas._positions
+        out: dict[str, list] = {
+            "remove_edges": [], "remove_nodes": [], "add_nodes": [],
+            "update_nodes": [], "add_edges": []}
+        for source, target in deltas["remove_edges"]:
+            key = (source, target)
+            if key in view.edges:
+                view.edges.discard(key)
+                out["remove_edges"].append([source, target])
+        for node_id in deltas["remove_nodes"]:
+            if node_id in view.nodes:
+                view.nodes.discard(node_id)
+                out["remove_nodes"].append(node_id)
+        entered = {}
+        for node in deltas["add_nodes"]:
+            node_id = node["id"]
+            if node_id not in view.nodes:
+                p = positions.get(node_id)
+                if p is None or not self._inside(view, p):
+                    continue
+                view.nodes.add(node_id)
+                entered[node_id] = p
+            out["add_nodes"].append(node)
+        out["update_nodes"] = [node for node in deltas["update_nodes"]
+                               if node["id"] in view.nodes]
+        for edge in deltas["add_edges"]:
+            if edge["source"] in view.nodes and edge["target"] in view.nodes:
+                view.edges.add(_edge_key(edge["source"], edge["target"]))
+                out["add_edges"].append(edge)
+        if not any(out.values()):
+            return None
+        return _patch(view, out, entered)
+
+    def _inside(self, view: _Viewport, p: Position) -> bool:
+        limit = view.radius * self.margin
+        return (len(view.nodes) < self.max_nodes
+                and math.dist(view.center, p) <= limit)
+
+
+# ---- filtry klientů ------------------------------------------------------
+
+NodePredicate = Callable[[str, dict[str, Any]], bool]
+
+
+def compile_filter(spec: dict[str, Any]) -> NodePredicate:
+    """JSON specifikace filtru -> predikát (typ, meta) uzlu.
+
+    Klíče jednoho slovníku platí současně (AND), `type`/`where` jako
+    u Canvas.select: ``{"type": "router"}`` nebo ``{"type": ["router",
+    "switch"]}``, ``{"where": {"tenant": "acme", "zone": ["a", "b"]}}``
+    (rovnost meta; seznam = některá z hodnot), ``{"all": [...]}``,
+    ``{"any": [...]}``, ``{"not": {...}}``.
+    Hrany filtr nemají – klient dostane hrany mezi propuštěnými uzly."""
+    if not isinstance(spec, dict):
+        raise ValueError(f"filtr musí být objekt, ne {type(spec).__name__}")
+    checks: list[NodePredicate] = []
+    for key, value in spec.items():
+        if key == "type":
+            types = frozenset(value if isinstance(value, list) else [value])
+            checks.append(lambda t, m, types=types: t in types)
+        elif key == "where":
+            if not isinstance(value, dict):
+                raise ValueError("filtr: 'where' musí být objekt")
+            for name, wanted in value.items():
+                allowed = wanted if isinstance(wanted, list) else [wanted]
+                checks.append(lambda t, m, name=name, allowed=allowed:
+                              name in m and m[name] in allowed)
+        elif key in ("all", "any"):
+            if not isinstance(value, list):
+                raise ValueError(f"filtr: '{key}' musí být seznam")
+            parts = [compile_filter(part) for part in value]
+            combine = all if key == "all" else any
+            checks.append(lambda t, m, parts=parts, combine=combine:
+                          combine(p(t, m) for p in parts))
+        elif key == "not":
+            inner = compile_filter(value)
+            checks.append(lambda t, m, inner=inner: not inner(t, m))
+        else:
+            raise ValueError(f"filtr: neznámý klíč {key!r}")
+    return lambda t, m: all(check(t, m) for check in checks)
+
+
+class _Filtered:
+    __slots__ = ("nodes", "edges", "seq", "predicate")
+
+    def __init__(self, predicate: NodePredicate) -> None:
+        self.nodes: set[str] = set()
+        self.edges: set[tuple[str, str]] = set()
+        self.seq = 0
+        self.predicate = predicate
+
+
+class Filters:
+    """Filtry připojených klientů (event ``set_filter`` / POST /api/filter).
+
+    Predikát se vyhodnocuje inkrementálně: graf (s indexy z create_index
+    jen kandidáti) projde jen při změně filtru (nový init), v každém tiku
+    jen uzly z patche – update, po kterém
+    uzel přestane/začne vyhovovat, ho klientovi odebere/přidá i s hranami
+    (sousedé z adjacency, O(stupeň)). Klient má vlastní řadu `seq`."""
+
+    def __init__(self, canvas: Canvas) -> None:
+        self.canvas = canvas
+        self._clients: dict[Hashable, _Filtered] = {}
+
+    def __contains__(self, client: Hashable) -> bool:
+        return client in self._clients
+
+    def set(self, client: Hashable, spec: dict[str, Any]) -> dict[str, Any]:
+        """Nastav filtr klienta; vrací init se zúženým grafem (pokračuje
+        v řadě seq klienta). ValueError při vadné specifikaci."""
+        view = _Filtered(compile_filter(spec))
+        previous = self._clients.get(client)
+        if previous is not None:
+            view.seq = previous.seq
+        canvas = self.canvas
+        with canvas._lock:
+            state = canvas.state()
+            ids = self._candidates(spec)
+        records = (state.node_records() if ids is None else
+                   (state._nodes[i] for i in ids if i in state._nodes))
+        view.nodes = {n.id for n in records if view.predicate(n.type, n.meta)}
+        init = state.subgraph_dict(view.nodes)
+        init["seq"] = view.seq
+        view.edges = {_edge_key(e["source"], e["target"])
+                      for e in init["edges"]}
+        self._clients[client] = view
+        return init
+
+    def _candidates(self, spec: dict[str, Any]) -> list[str] | None:
+        """Kandidáti z indexů canvasu (create_index) pro jednoduchý filtr
+        typu `select` – nahoře `type`/`where` se skalárními hodnotami;
+        None = projdi celý graf. Volá se pod zámkem canvasu."""
+        type_ = spec.get("type")
+        where = spec.get("where") or {}
+        return self.canvas._index.candidates(
+            type_ if isinstance(type_, str) else None,
+            {k: v for k, v in where.items() if not isinstance(v, list)})
+
+    def disconnect(self, client: Hashable) -> None:
+        """Zruš filtr klienta (odpojení, nebo návrat k celému grafu)."""
+        self._clients.pop(client, None)
+
+    def filter(self, client: Hashable, deltas: dict[str, list]
+               ) -> dict[str, Any] | None:
+        """Patch canvasu přeložený na filtr klienta (None = nic pro něj)."""
+        view = self._clients[client]
+        out: dict[str, list] = {
+            "remove_edges": [], "remove_nodes": [], "add_nodes": [],
+            "update_nodes": [], "add_edges": []}
+        for source, target in deltas["remove_edges"]:
+            key = (source, target)
+            if key in view.edges:
+                view.edges.discard(key)
+                out["remove_edges"].append([source, target])
+        for node_id in deltas["remove_nodes"]:
+            if node_id in view.nodes:
+                view.nodes.discard(node_id)
+                out["remove_nodes"].append(node_id)
+        entered: list[str] = []
+        left: list[str] = []
+        for kind in ("add_nodes", "update_nodes"):
+            for node in deltas[kind]:
+                node_id = node["id"]
+                match = view.predicate(node["type"], node["meta"])
+                if node_id in view.nodes:
+                    if match:
+                        out[kind].append(node)
+                    else:
+                        view.nodes.discard(node_id)
+                        left.append(node_id)
+                elif match:
+                    view.nodes.add(node_id)
+                    entered.append(node_id)
+                    out["add_nodes"].append(node)
+        canvas = self.canvas
+        with canvas._lock:
+            for node_id in left:            # klient hrany kaskádně smaže
+                out["remove_nodes"].append(node_id)
+                for neighbor in canvas._adjacency.get(node_id, ()):
+                    view.edges.discard(_edge_key(node_id, neighbor))
+            fresh = set()                   # hrany poslané se vstupem
+            for node_id in entered:
+                for neighbor in canvas._adjacency.get(node_id, ()):
+                    key = _edge_key(node_id, neighbor)
+                    if neighbor in view.nodes and key not in view.edges:
+                        view.edges.add(key)
+                        fresh.add(key)
+                        out["add_edges"].append(
+                            canvas._public_edge(canvas._edges[key]))
+            positions = {i: canvas._positions[i] for i in entered
+                         if i in canvas._positions}
+        for edge in deltas["add_edges"]:
+            source, target = edge["source"], edge["target"]
+            key = _edge_key(source, target)
+            if source in view.nodes and target in view.nodes:
+                view.edges.add(key)
+                if key not in fresh:
+                    out["add_edges"].append(edge)
+        if not any(out.values()):
+            return None
+        return _patch(view, out, positions)
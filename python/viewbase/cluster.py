@@ -0,0 +1,367 @@
+"""Hierarchická agregace: shluky velkého grafu jako super-uzly.
+
+Nad ~500k uzlů prohlížeč nestačí ani na samotný init. ClusterView drží
+vedle zdrojového canvasu `base` druhý canvas `view` – ten se servíruje
+(``vb.serve(clusters.view)``) a nese hrubý graf: každý shluk (label
+propagation, metrics.label_propagation) je jeden super-uzel typu
+``cluster`` s meta ``size``, hrany mezi shluky jsou agregované s meta
+``weight`` = počet hran zdrojového grafu mezi nimi. `expand(cluster_id)`
+nahradí super-uzel jeho členy (s meta a hranami ze zdroje, hrany do
+ostatních shluků se agregují per člen), `collapse` ho vrátí – obojí jako
+běžné patche view canvasu.
+
+Změny zdroje se zapracují inkrementálně: `refresh()` (periodicky přes
+view.every) vydrénuje `base` a váhy agregovaných hran jen přičte/odečte;
+nový uzel je nejdřív samostatný shluk a s první hranou přejde ke shluku
+souseda (inkrementální krok label propagation). Úplné přeshlukování je
+`recluster()`. Zdrojový canvas se proto sám neservíruje – jeho proud
+drénuje ClusterView (žurnál/subscribe na něm fungují dál)."""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any
+
+from .canvas import Canvas, _edge_key
+from .metrics import label_propagation
+
+logger = logging.getLogger("viewbase")
+
+CLUSTER_TYPE = "cluster"
+CLUSTER_PREFIX = "cluster:"
+_CLUSTER_LABEL = "{name} ({size})"
+
+
+class ClusterView:
+    """Hrubý pohled na `base`: super-uzly shluků s agregovanými hranami.
+
+    `view` je servírovaný canvas (výchozí: nový se stejným configem),
+    `interval` perioda refresh(), `expand_on_click` rozbalí super-uzel
+    kliknutím v prohlížeči."""
+
+    def __init__(self, base: Canvas, *, view: Canvas | None = None,
+                 interval: float = 1.0, max_iter: int = 20, seed: int = 0,
+                 expand_on_click: bool = True) -> None:
+        self.base = base
+        config = base.config
+        self.view = view if view is not None else Canvas(
+            title=config["title"], dimensions=config["dimensions"],
+            theme=config["theme"],
+            highlight_neighbors=config["highlight_neighbors"],
+            quality=config["quality"])
+        with base._lock:
+            for name, style in base._node_types.items():
+                self.view.define_type(name, **style)
+            self.view.node_label(base._node_label_template)
+        self.view.define_type(CLUSTER_TYPE)
+        self.max_iter = max_iter
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._label: dict[str, str] = {}            # uzel zdroje -> štítek
+        self._members: dict[str, set[str]] = {}     # štítek -> uzly
+        self._expanded: set[str] = set()            # rozbalené štítky
+        # agregované hrany view: (rep, rep) -> počet hran zdroje; spočtené
+        # hrany zdroje (add_edges nese i změny meta – ty se nepočítají)
+        self._weights: dict[tuple[str, str], int] = {}
+        self._counted: set[tuple[str, str]] = set()
+        self._serial = 0
+        self.recluster()
+        self.view.every(interval, name="clusters")(self.refresh)
+        if expand_on_click:
+            self.view.on_click(self._on_click)
+
+    # ---- dotazy ----------------------------------------------------------
+
+    def cluster_of(self, node_id: str) -> str:
+        """Id super-uzlu shluku, do něhož uzel zdroje patří."""
+        with self._lock:
+            label = self._label.get(node_id)
+        if label is None:
+            raise ValueError(f"Uzel '{node_id}' neexistuje")
+        return CLUSTER_PREFIX + label
+
+    def members(self, cluster_id: str) -> list[str]:
+        with self._lock:
+            return sorted(self._members[self._label_of(cluster_id)])
+
+    def clusters(self) -> dict[str, int]:
+        """{id super-uzlu: počet členů} všech shluků."""
+        with self._lock:
+            return {CLUSTER_PREFIX + label: len(members)
+                    for label, members in self._members.items()}
+
+    def _label_of(self, cluster_id: str) -> str:
+        label = cluster_id[len(CLUSTER_PREFIX):]
+        if not cluster_id.startswith(CLUSTER_PREFIX) \
+                or label not in self._members:
+            raise ValueError(f"Shluk '{cluster_id}' neexistuje")
+        return label
+
+    def _rep(self, node_id: str) -> str:
+        """Viditelný zástupce uzlu zdroje: on sám, nebo super-uzel."""
+        label = self._label[node_id]
+        return node_id if label in self._expanded else CLUSTER_PREFIX + label
+
+    # ---- přeshlukování a inkrementální údržba ---------------------------
+
+    def recluster(self) -> None:
+        """Spočítej shluky znovu (label propagation nad zmraženým stavem
+        mimo zámek zdroje) a srovnej view jedním patchem (sync). Rozbalené
+        shluky, které přežily, zůstanou rozbalené."""
+        with self._lock:
+            state = self.base.state()
+            adjacency: dict[str, list[str]] = {
+                n.id: [] for n in state.node_records()}
+            for edge in state.edge_records():
+                adjacency[edge.source].append(edge.target)
+                adjacency[edge.target].append(edge.source)
+            labels = label_propagation(adjacency, max_iter=self.max_iter,
+                                       seed=self.seed)
+            del adjacency
+            with self.base._lock:
+                # změny po snapshotu: sestavení níže čte aktuální stav celý
+                self.base.drain()
+                self._drop_actions_locked()
+                self._label = {}
+                self._members = {}
+                for node_id in self.base._nodes:
+                    label = labels.get(node_id, node_id)
+                    self._label[node_id] = label
+                    self._members.setdefault(label, set()).add(node_id)
+                self._expanded &= self._members.keys()
+                self._counted = set(self.base._edges)
+                self._weights = {}
+                for a, b in self._counted:
+                    ra, rb = self._rep(a), self._rep(b)
+                    if ra != rb:
+                        key = _edge_key(ra, rb)
+                        self._weights[key] = self._weights.get(key, 0) + 1
+                nodes, edges = self._visible_locked()
+            self.view.sync(nodes, edges)
+
+    def _visible_locked(self) -> tuple[list[dict], list[dict]]:
+        nodes = []
+        for label, members in self._members.items():
+            if label in self._expanded:
+                for node_id in members:
+                    node = self.base._nodes[node_id]
+                    nodes.append({"id": node_id, "type": node.type,
+                                  "label": node.label_template,
+                                  "meta": node.meta})
+            else:
+                nodes.append(self._cluster_spec(label))
+        edges = [{"source": a, "target": b, "meta": self._edge_meta(a, b, w)}
+                 for (a, b), w in self._weights.items()]
+        return nodes, edges
+
+    def _cluster_spec(self, label: str) -> dict[str, Any]:
+        return {"id": CLUSTER_PREFIX + label, "type": CLUSTER_TYPE,
+                "label": _CLUSTER_LABEL,
+                "meta": {"name": label, "size": len(self._members[label])}}
+
+    def _edge_meta(self, ra: str, rb: str, weight: int) -> dict[str, Any]:
+        """Hrana mezi dvěma rozbalenými členy nese meta zdroje, ostatní
+        jsou agregované."""
+        if ra in self._label and rb in self._label \
+                and self._rep(ra) == ra and self._rep(rb) == rb:
+            return dict(self.base._edges[_edge_key(ra, rb)].meta)
+        return {"weight": weight}
+
+    def refresh(self) -> bool:
+        """Zapracuj změny zdroje od minula (drain) do view; False = nebyly."""
+        with self._lock, self.base._lock:
+            return self._refresh_locked()
+
+    def _refresh_locked(self) -> bool:
+        drained = self.base.drain()
+        self._forward_actions_locked()
+        if drained is None:
+            return False
+        _, deltas = drained
+        with self.view.batch():
+            self._apply_locked(deltas)
+        return True
+
+    def _apply_locked(self, deltas: dict[str, list]) -> None:
+        for source, target in deltas["remove_edges"]:
+            key = _edge_key(source, target)
+            if key in self._counted:
+                self._counted.discard(key)
+                self._uncount(*key)
+        for node_id in deltas["remove_nodes"]:
+            self._leave(node_id)
+        for node in (*deltas["add_nodes"], *deltas["update_nodes"]):
+            node_id = node["id"]
+            if node_id not in self._label:
+                self._join(node_id, self._new_label(node_id))
+            elif self._rep(node_id) == node_id:
+                self._show_member(node_id)          # změna meta člena
+        added = []
+        for edge in deltas["add_edges"]:
+            key = (edge["source"], edge["target"])
+            if key not in self._counted:
+                self._counted.add(key)
+                self._count(*key)
+                added.append(key)
+            elif self._rep(key[0]) == key[0] and self._rep(key[1]) == key[1]:
+                self._put_edge(key[0], key[1], dict(edge["meta"]))
+        # Inkrementální label propagation: osamělý uzel přejde ke shluku
+        # souseda (až po započtení všech nových hran – přesun je přepočítá).
+        for a, b in added:
+            for node_id, other in ((a, b), (b, a)):
+                label, target = self._label[node_id], self._label[other]
+                if label != target and len(self._members[label]) == 1:
+                    self._move(node_id, target)
+                    break
+
+    def _new_label(self, node_id: str) -> str:
+        label = node_id
+        while label in self._members:               # štítek po odebraném
+            self._serial += 1
+            label = f"{node_id}#{self._serial}"
+        return label
+
+    def _join(self, node_id: str, label: str) -> None:
+        self._label[node_id] = label
+        self._members.setdefault(label, set()).add(node_id)
+        if label in self._expanded:
+            self._show_member(node_id)
+        else:
+            self._put_node(self._cluster_spec(label))
+
+    def _leave(self, node_id: str) -> None:
+        label = self._label.pop(node_id, None)
+        if label is None:
+            return
+        members = self._members[label]
+        members.discard(node_id)
+        expanded = label in self._expanded
+        if expanded and self.view.has_node(node_id):
+            self.view.remove_node(node_id)
+        if members:
+            if not expanded:
+                self._put_node(self._cluster_spec(label))
+            return
+        del self._members[label]
+        self._expanded.discard(label)
+        if not expanded and self.view.has_node(CLUSTER_PREFIX + label):
+            self.view.remove_node(CLUSTER_PREFIX + label)
+
+    def _move(self, node_id: str, label: str) -> None:
+        edges = [_edge_key(node_id, nb)
+                 for nb in self.base._adjacency.get(node_id, ())]
+        edges = [key for key in edges if key in self._counted]
+        for key in edges:
+            self._uncount(*key)
+        self._leave(node_id)
+        self._join(node_id, label)
+        for key in edges:
+            self._count(*key)
+
+    def _count(self, a: str, b: str) -> None:
+        ra, rb = self._rep(a), self._rep(b)
+        if ra == rb:
+            return
+        key = _edge_key(ra, rb)
+        weight = self._weights.get(key, 0) + 1
+        self._weights[key] = weight
+        if weight == 1:
+            self._put_edge(key[0], key[1], self._edge_meta(*key, 1))
+        else:
+            self.view.incr_edge(key[0], key[1], "weight", 1)
+
+    def _uncount(self, a: str, b: str) -> None:
+        ra, rb = self._rep(a), self._rep(b)
+        if ra == rb:
+            return
+        key = _edge_key(ra, rb)
+        weight = self._weights.get(key, 0) - 1
+        if weight > 0:
+            self._weights[key] = weight
+            self.view.incr_edge(key[0], key[1], "weight", -1)
+            return
+        self._weights.pop(key, None)
+        if self.view.has_edge(*key):
+            self.view.remove_edge(*key)
+
+    # ---- rozbalení / sbalení --------------------------------------------
+
+    def expand(self, cluster_id: str) -> None:
+        """Nahraď super-uzel jeho členy (meta, popisky a hrany ze zdroje)."""
+        self._toggle(cluster_id, expand=True)
+
+    def collapse(self, cluster_id: str) -> None:
+        """Vrať rozbalený shluk zpět do jednoho super-uzlu."""
+        self._toggle(cluster_id, expand=False)
+
+    def _toggle(self, cluster_id: str, *, expand: bool) -> None:
+        with self._lock, self.base._lock:
+            self._refresh_locked()          # členové odpovídají zdroji
+            label = self._label_of(cluster_id)
+            if (label in self._expanded) == expand:
+                return
+            members = self._members[label]
+            edges = {_edge_key(m, nb) for m in members
+                     for nb in self.base._adjacency.get(m, ())}
+            with self.view.batch():
+                for key in edges:
+                    self._uncount(*key)
+                if expand:
+                    self.view.remove_node(cluster_id)
+                    self._expanded.add(label)
+                    for node_id in members:
+                        self._show_member(node_id)
+                else:
+                    for node_id in members:
+                        self.view.remove_node(node_id)
+                    self._expanded.discard(label)
+                    self._put_node(self._cluster_spec(label))
+                for key in edges:
+                    self._count(*key)
+
+    def _on_click(self, event) -> None:
+        node_id = getattr(event, "node_id", None)
+        if isinstance(node_id, str) and node_id.startswith(CLUSTER_PREFIX):
+            try:
+                self.expand(node_id)
+            except ValueError:
+                pass                        # mezitím zmizel
+
+    # ---- zápis do view ---------------------------------------------------
+
+    def _show_member(self, node_id: str) -> None:
+        node = self.base._nodes[node_id]
+        self._put_node({"id": node_id, "type": node.type,
+                        "label": node.label_template, "meta": node.meta})
+
+    def _put_node(self, spec: dict[str, Any]) -> None:
+        labels = ({spec["id"]: spec["label"]}
+                  if spec["label"] is not None else None)
+        self.view.apply_patch({"add_nodes": [
+            {"id": spec["id"], "type": spec["type"],
+             "meta": dict(spec["meta"])}]}, labels)
+
+    def _put_edge(self, a: str, b: str, meta: dict[str, Any]) -> None:
+        self.view.apply_patch(
+            {"add_edges": [{"source": a, "target": b, "meta": meta}]})
+
+    # ---- akce zdroje -----------------------------------------------------
+
+    def _forward_actions_locked(self) -> None:
+        """Akce na uzlech zdroje (focus, show_detail, highlight) přesměruj
+        na jejich viditelného zástupce; ostatní (toky přes cesty zdroje)
+        ve hrubém grafu nemají smysl a zahodí se."""
+        for action in self.base.drain_actions():
+            node_id = action.get("node_id")
+            if node_id not in self._label:
+                continue
+            rep = self._rep(node_id)
+            if action["action"] == "focus":
+                self.view.focus(rep)
+            elif action["action"] == "show_detail":
+                self.view.show_detail(rep)
+            elif action["action"] == "highlight":
+                self.view.highlight(rep, action.get("depth"))
+
+    def _drop_actions_locked(self) -> None:
+        self.base.drain_actions()
@@ -0,0 +1,119 @@
+"""Sekundární indexy uzlů pro Canvas.select().
+
+Index typu (typ -> id uzlů) a hash indexy vybraných meta klíčů
+(klíč -> hodnota -> id uzlů). Udržují se inkrementálně při add/update/
+remove – dotaz „všechny routery" nebo „status == busy" pak nesahá na celý
+graf. Uzly s nehashovatelnou hodnotou (list, dict) indexovaného klíče se
+drží stranou a při dotazu se porovnají přímo."""
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from .records import NodeRecord, intern
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class NodeIndex:
+    """Indexy nad záznamy uzlů; Canvas je volá pod svým zámkem."""
+
+    def __init__(self) -> None:
+        self.by_type: dict[str | None, dict[str, None]] | None = None
+        # klíč -> (hodnota -> {id: None}, {id: None} s nehashovatelnou hodnotou)
+        self.by_meta: dict[str, tuple[dict[Any, dict[str, None]],
+                                      dict[str, None]]] = {}
+
+    @property
+    def meta_keys(self) -> tuple[str, ...]:
+        return tuple(self.by_meta)
+
+    def enable(self, nodes: Iterable[NodeRecord], *, types: bool,
+               meta_keys: Iterable[str]) -> None:
+        """Zapni indexy a hromadně je naplň z existujících uzlů."""
+        nodes = list(nodes)
+        if types and self.by_type is None:
+            self.by_type = {}
+            for node in nodes:
+                self.by_type.setdefault(node.type, {})[node.id] = None
+        for key in meta_keys:
+            key = intern(key)
+            if key in self.by_meta:
+                continue
+            self.by_meta[key] = ({}, {})
+            for node in nodes:
+                self._add_meta(node, key)
+
+    def clear(self) -> None:
+        """Vyprázdni obsah indexů; zapnuté indexy zůstanou zapnuté."""
+        if self.by_type is not None:
+            self.by_type = {}
+        self.by_meta = {key: ({}, {}) for key in self.by_meta}
+
+    def add(self, node: NodeRecord) -> None:
+        if self.by_type is not None:
+            self.by_type.setdefault(node.type, {})[node.id] = None
+        self.add_meta(node)
+
+    def remove(self, node: NodeRecord) -> None:
+        if self.by_type is not None:
+            bucket = self.by_type.get(node.type)
+            if bucket is not None:
+                bucket.pop(node.id, None)
+                if not bucket:
+                    del self.by_type[node.type]
+        self.remove_meta(node)
+
+    def add_meta(self, node: NodeRecord) -> None:
+        """Zaindexuj meta uzlu (volá se po změně meta)."""
+        for key in self.by_meta:
+            self._add_meta(node, key)
+
+    def remove_meta(self, node: NodeRecord) -> None:
+        """Vyjmi meta uzlu z indexů (volá se před změnou meta)."""
+        for key, (values, unhashable) in self.by_meta.items():
+            if key not in node.meta:
+                continue
+            value = node.meta[key]
+            if not _hashable(value):
+                unhashable.pop(node.id, None)
+                continue
+            bucket = values.get(value)
+            if bucket is not None:
+                bucket.pop(node.id, None)
+                if not bucket:
+                    del values[value]
+
+    def _add_meta(self, node: NodeRecord, key: str) -> None:
+        if key not in node.meta:
+            return
+        values, unhashable = self.by_meta[key]
+        value = node.meta[key]
+        if _hashable(value):
+            values.setdefault(value, {})[node.id] = None
+        else:
+            unhashable[node.id] = None
+
+    def candidates(self, type: str | None,
+                   where: dict[str, Any]) -> list[str] | None:
+        """Nejmenší množina kandidátních id podle dostupných indexů, nebo
+        None, když žádný index dotaz nepokrývá (volající projde vše).
+        Kandidáty je nutné ještě dofiltrovat plnou podmínkou."""
+        sets: list[Iterable[str]] = []
+        if type is not None and self.by_type is not None:
+            sets.append(self.by_type.get(type, {}))
+        for key, value in where.items():
+            index = self.by_meta.get(key)
+            if index is None or not _hashable(value):
+                continue
+            values, unhashable = index
+            hit = values.get(value, {})
+            sets.append([*hit, *unhashable] if unhashable else hit)
+        if not sets:
+            return None
+        return list(min(sets, key=len))
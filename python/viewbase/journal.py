@@ -0,0 +1,221 @@
+"""Žurnál (write-ahead log) vydrénovaných delt pro obnovu po pádu a audit.
+
+Adresář žurnálu::
+
+    checkpoint-<seq>.vbs    úplný stav (Canvas.save) k danému seq
+    segment-<seq>.log       JSONL záznamy od daného seq dál
+
+Záznamy segmentu (jeden JSON na řádek):
+
+- ``{"seq": n, "deltas": {...}, "labels": {...}}`` – patch z drain()
+- ``{"after": n, "actions": [...]}`` – trvalé akce z drain_actions()
+  (trvalé toky, stop_flow, set_theme, set_edge_style); okna a jednorázové
+  akce se nežurnálují
+
+Posluchač na canvasu jen zařadí objekt do fronty (pod zámkem canvasu);
+kódování, zápis i checkpointy běží ve vlákně žurnálu. Segment se flushne
+každých `flush_interval` sekund a fsyncne při rotaci, checkpointu a
+close() – pád procesu ztratí nejvýš poslední interval, výpadek napájení
+nejvýš otevřený segment. Typy a config mimo akce (define_type, node_label)
+zachytí až příští checkpoint."""
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import threading
+from pathlib import Path
+from typing import Any
+
+from .canvas import Canvas
+from .protocol import is_state_action
+
+logger = logging.getLogger("viewbase")
+
+_CHECKPOINT = re.compile(r"^checkpoint-(\d{12})\.vbs$")
+_SEGMENT = re.compile(r"^segment-(\d{12})\.log$")
+_STOP = object()
+
+
+def _listing(directory: Path, pattern: re.Pattern) -> list[tuple[int, Path]]:
+    """Soubory žurnálu daného druhu seřazené podle seq ve jméně."""
+    found = []
+    for path in directory.iterdir():
+        match = pattern.match(path.name)
+        if match:
+            found.append((int(match.group(1)), path))
+    return sorted(found)
+
+
+class Journal:
+    """Připojí canvas k žurnálu v `directory` a hned zapíše výchozí
+    checkpoint; dosavadní obsah adresáře pak smaže (pro pokračování po pádu
+    nejdřív `Journal.recover`). Checkpoint každých `checkpoint_every`
+    patchů, segment se rotuje po `segment_bytes`; s `prune=True` se
+    segmenty a checkpointy překryté novějším checkpointem mažou."""
+
+    def __init__(self, canvas: Canvas, directory: str | os.PathLike, *,
+                 segment_bytes: int = 64 << 20, checkpoint_every: int = 10_000,
+                 flush_interval: float = 1.0, prune: bool = True) -> None:
+        if segment_bytes <= 0 or checkpoint_every <= 0 or flush_interval <= 0:
+            raise ValueError("segment_bytes, checkpoint_every a flush_interval"
+                             " musí být kladné")
+        self.canvas = canvas
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._segment_bytes = segment_bytes
+        self._checkpoint_every = checkpoint_every
+        self._flush_interval = flush_interval
+        self._prune = prune
+        self._file = None
+        self._written = 0                    # bajty v otevřeném segmentu
+        self._since_checkpoint = 0           # patche od posledního checkpointu
+        self._queue: queue.Queue = queue.Queue()
+        self._closed = False
+        self._checkpoint(prune=True)
+        self._unsubscribe = canvas.subscribe(on_patch=self._on_patch,
+                                             on_actions=self._on_actions)
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="viewbase-journal")
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---- posluchači (pod zámkem canvasu – jen fronta) --------------------
+
+    def _on_patch(self, seq: int, deltas: dict[str, list],
+                  labels: dict[str, str]) -> None:
+        self._queue.put({"seq": seq, "deltas": deltas, "labels": labels})
+
+    def _on_actions(self, after: int, actions: list[dict[str, Any]]) -> None:
+        persistent = [a for a in actions if is_state_action(a)]
+        if persistent:
+            self._queue.put({"after": after, "actions": persistent})
+
+    # ---- vlákno žurnálu --------------------------------------------------
+
+    def _run(self) -> None:
+        while True:
+            try:
+                record = self._queue.get(timeout=self._flush_interval)
+            except queue.Empty:
+                if self._file is not None:
+                    self._file.flush()
+                continue
+            if record is _STOP:
+                return
+            try:
+                self._write(record)
+            except Exception:
+                logger.exception("Zápis do žurnálu %s selhal", self.directory)
+
+    def _write(self, record: dict[str, Any]) -> None:
+        if self._file is None:
+            first = record.get("seq", record.get("after", 0))
+            self._file = open(self.directory / f"segment-{first:012d}.log",
+                              "ab")
+            self._written = 0
+        line = json.dumps(record, separators=(",", ":"),
+                          ensure_ascii=False).encode() + b"\n"
+        self._file.write(line)
+        self._written += len(line)
+        if "seq" in record:
+            self._since_checkpoint += 1
+        if self._since_checkpoint >= self._checkpoint_every:
+            self._checkpoint(prune=self._prune)
+        elif self._written >= self._segment_bytes:
+            self._close_segment()
+
+    def _close_segment(self) -> None:
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+
+    def _checkpoint(self, *, prune: bool) -> None:
+        """Uzavři segment a zapiš checkpoint (save je atomický). Všechno už
+        zapsané bylo vydrénované před zmražením stavu, checkpoint to tedy
+        překrývá – s `prune` se starší checkpointy i segmenty smažou."""
+        self._close_segment()
+        path = self.directory / f"checkpoint-{self.canvas.state().seq:012d}.vbs"
+        self.canvas.save(path)
+        self._since_checkpoint = 0
+        if prune:
+            for _, old in (*_listing(self.directory, _CHECKPOINT),
+                           *_listing(self.directory, _SEGMENT)):
+                if old != path:
+                    old.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        """Odhlas se z canvasu, dopiš frontu a fsyncni segment. Idempotentní
+        (registrováno i v atexit)."""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self._unsubscribe()
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._close_segment()
+
+    # ---- obnova ----------------------------------------------------------
+
+    @classmethod
+    def recover(cls, directory: str | os.PathLike,
+                **canvas_kwargs: Any) -> Canvas:
+        """Canvas obnovený ze žurnálu: poslední checkpoint + přehrání
+        novějších patchů a trvalých akcí (akce se aplikují po patchi, na
+        jehož stav odkazují). Useknutý poslední řádek (pád uprostřed zápisu)
+        se ignoruje. Prázdný/neexistující adresář vrátí čerstvý
+        Canvas(**canvas_kwargs); jinak jdou kwargs do Canvas.load."""
+        directory = Path(directory)
+        if not directory.is_dir():
+            return Canvas(**canvas_kwargs)
+        checkpoints = _listing(directory, _CHECKPOINT)
+        if not checkpoints:
+            return Canvas(**canvas_kwargs)
+        base, path = checkpoints[-1]
+        canvas = Canvas.load(path, **canvas_kwargs)
+        seq = canvas.state().seq       # soubor mohl zmrazit i pozdější seq
+        held: list[dict[str, Any]] = []
+        for record in _records(directory):
+            if "actions" in record:
+                if record["after"] >= base:
+                    held.append(record)
+                continue
+            if record["seq"] <= base:
+                continue
+            canvas.apply_patch(record["deltas"], record.get("labels"))
+            seq = max(seq, record["seq"])
+            ready = [r for r in held if r["after"] < record["seq"]]
+            held = [r for r in held if r["after"] >= record["seq"]]
+            for pending in ready:
+                for action in pending["actions"]:
+                    canvas.apply_action(action)
+        for pending in held:
+            for action in pending["actions"]:
+                canvas.apply_action(action)
+        canvas._reset_stream(seq)
+        return canvas
+
+
+def _records(directory: Path):
+    """Záznamy všech segmentů v pořadí zápisu. Řádek bez koncového \\n je
+    nedopsaný zápis z pádu – přeskočí se; poškozený úplný řádek je chyba."""
+    for _, path in _listing(directory, _SEGMENT):
+        with open(path, "rb") as fh:
+            for number, line in enumerate(fh, 1):
+                if not line.endswith(b"\n"):
+                    logger.warning("Žurnál %s: useknutý řádek %d ignorován",
+                                   path.name, number)
+                    break
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    raise ValueError(
+                        f"Žurnál {path.name}: poškozený řádek {number}"
+                    ) from None
@@ -0,0 +1,241 @@
+"""Serverový výpočet rozložení grafu: počáteční (Canvas.precompute_layout)
+a průběžný pro slabé klienty (ServerLayout + PositionStream, viz server).
+
+Fruchterman–Reingold vektorizovaný v NumPy: přitažlivost po hranách
+a odpuzování všech dvojic. Do `EXACT_LIMIT` uzlů se odpuzování počítá
+přesně po blocích, nad ním aproximací Barnes–Hut o jedné úrovni – uzly
+se rozdělí do mřížky ~√N buněk, vzdálené buňky působí svým těžištěm
+(hmotnost = počet uzlů) a uvnitř vlastní buňky se počítá přesně. Krok
+je O(N·√N) místo O(N²) a běží celý v NumPy.
+
+Ideální délka hrany odpovídá vzdálenosti pružin klientské fyziky
+(d3-force, 60 jednotek), takže klient otevře graf už usazený a simulace
+jen dolaďuje. NumPy je volitelná závislost: ``pip install viewbase[layout]``."""
+from __future__ import annotations
+
+import json
+import math
+import struct
+from typing import Iterable, Mapping, Sequence
+
+try:
+    import numpy as np
+except ImportError:                 # volitelná závislost (extra "layout")
+    np = None
+
+EDGE_LENGTH = 60.0      # = forceLink().distance(60) ve frontend/src/physics
+EXACT_LIMIT = 500       # do tolika uzlů přesné odpuzování všech dvojic
+_INT16 = 32_767
+_BLOCK = 2_048          # řádky na blok (paměť bloku ~ _BLOCK × sloupce × 3)
+
+Position = tuple[float, float, float]
+
+
+def force_layout(ids: Sequence[str], edges: Iterable[tuple[str, str]], *,
+                 dimensions: int = 3, iterations: int = 100,
+                 seed: int = 0,
+                 initial: Mapping[str, Sequence[float]] | None = None,
+                 temperature: float | None = None,
+                 ) -> dict[str, Position]:
+    """Rozlož uzly `ids` podle hran; vrací {id: (x, y, z)} (ve 2D z = 0),
+    vystředěné do počátku. Uzly s pozicí v `initial` z ní startují (rozložení
+    se jen doladí), ostatní začínají náhodně podle `seed` – výsledek je
+    deterministický. Hrany s neznámým koncem se ignorují. `temperature`
+    (násobek poloměru grafu) přebije výchozí počáteční krok – průběžný
+    serverový layout ji snižuje kolo od kola."""
+    if np is None:
+        raise ImportError("precompute_layout potřebuje numpy:"
+                          " pip install viewbase[layout]")
+    if dimensions not in (2, 3):
+        raise ValueError("dimensions musí být 2 nebo 3")
+    if iterations < 0:
+        raise ValueError("iterations nesmí být záporné")
+    n = len(ids)
+    if n == 0:
+        return {}
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    pairs = [(index[a], index[b]) for a, b in edges
+             if a in index and b in index and a != b]
+    src = np.fromiter((a for a, _ in pairs), dtype=np.intp, count=len(pairs))
+    dst = np.fromiter((b for _, b in pairs), dtype=np.intp, count=len(pairs))
+
+    k = EDGE_LENGTH
+    radius = k * n ** (1.0 / dimensions)
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform(-radius, radius, (n, dimensions))
+    fixed = 0
+    if initial:
+        for node_id, p in initial.items():
+            i = index.get(node_id)
+            if i is not None:
+                pos[i] = p[:dimensions]
+                fixed += 1
+    # Známé pozice už jsou usazené: nižší teplota jen doladí, nerozhází.
+    if temperature is None:
+        temperature = 0.1 if fixed < n // 2 else 0.02
+    temperature *= radius
+    for step in range(iterations):
+        disp = _repulsion(pos, k * k)
+        if len(pairs):
+            delta = pos[src] - pos[dst]
+            dist = np.sqrt((delta * delta).sum(axis=1))[:, None] + 1e-9
+            pull = delta * (dist / k)           # FR přitažlivost d²/k
+            for axis in range(dimensions):
+                disp[:, axis] -= np.bincount(src, pull[:, axis], minlength=n)
+                disp[:, axis] += np.bincount(dst, pull[:, axis], minlength=n)
+        length = np.sqrt((disp * disp).sum(axis=1))[:, None] + 1e-9
+        limit = temperature * (1.0 - step / iterations)   # lineární chladnutí
+        pos += disp / length * np.minimum(length, limit)
+    pos -= pos.mean(axis=0)
+    if dimensions == 2:
+        pos = np.hstack([pos, np.zeros((n, 1))])
+    return {node_id: (float(x), float(y), float(z))
+            for node_id, (x, y, z) in zip(ids, pos.round(1))}
+
+
+def _repulsion(pos, k2: float):
+    """Odpudivé posuny FR (k²/d ve směru od souseda) pro všechny uzly."""
+    if len(pos) <= EXACT_LIMIT:
+        return _exact(pos, pos, k2, same=True)
+    return _barnes_hut(pos, k2)
+
+
+def _exact(pos, other, k2: float, *, same: bool):
+    """Přesné odpuzování `pos` od všech bodů `other` po blocích řádků.
+    `same` = jde o tutéž množinu (nulová vzdálenost k sobě se vynechá)."""
+    disp = np.empty_like(pos)
+    for start in range(0, len(pos), _BLOCK):
+        block = pos[start:start + _BLOCK]
+        delta = block[:, None, :] - other[None, :, :]
+        dist2 = (delta * delta).sum(axis=2)
+        if same:
+            rows = np.arange(len(block))
+            dist2[rows, rows + start] = np.inf
+        np.maximum(dist2, 1e-2, out=dist2)      # shodné body se nerozletí
+        disp[start:start + _BLOCK] = (delta * (k2 / dist2)[:, :, None]).sum(
+            axis=1)
+    return disp
+
+
+def _barnes_hut(pos, k2: float):
+    """Jednoúrovňový Barnes–Hut: těžiště buněk mřížky pro vzdálené uzly,
+    přesně uvnitř vlastní buňky."""
+    n, dims = pos.shape
+    side = max(2, round(math.sqrt(n) ** (1.0 / dims)))
+    lo = pos.min(axis=0)
+    span = pos.max(axis=0) - lo + 1e-9
+    coords = np.minimum((pos - lo) / span * side, side - 1).astype(np.intp)
+    cell = np.ravel_multi_index(coords.T, (side,) * dims)
+    cells = side ** dims
+    mass = np.bincount(cell, minlength=cells).astype(float)
+    occupied = np.flatnonzero(mass)
+    centroid = np.stack([np.bincount(cell, pos[:, a], minlength=cells)
+                         for a in range(dims)], axis=1)[occupied]
+    centroid /= mass[occupied, None]
+    weight = mass[occupied]
+    # sloupec vlastní buňky každého uzlu (ten se nahradí přesným výpočtem)
+    column = np.searchsorted(occupied, cell)
+    disp = np.empty_like(pos)
+    for start in range(0, n, _BLOCK):
+        block = pos[start:start + _BLOCK]
+        delta = block[:, None, :] - centroid[None, :, :]
+        dist2 = np.maximum((delta * delta).sum(axis=2), 1e-2)
+        factor = weight[None, :] * k2 / dist2
+        factor[np.arange(len(block)), column[start:start + _BLOCK]] = 0.0
+        disp[start:start + _BLOCK] = (delta * factor[:, :, None]).sum(axis=1)
+    order = np.argsort(cell, kind="stable")
+    bounds = np.searchsorted(cell[order], occupied)
+    for begin, end in zip(bounds, list(bounds[1:]) + [n]):
+        members = order[begin:end]
+        if len(members) > 1:
+            local = pos[members]
+            disp[members] += _exact(local, local, k2, same=True)
+    return disp
+
+
+class PositionStream:
+    """Kvantizované pozice pro jednoho klienta serverového layoutu.
+
+    Binární rámec (little-endian): u32 délka JSON hlavičky
+    ``{"type": "positions", "scale": s, "keyframe": bool[, "ids": [...]]}``,
+    zarovnání na 4 B a Int16 x, y, z po uzlech. Keyframe nese absolutní
+    hodnoty ``round(pozice / scale)``, ostatní rámce jen rozdíl proti
+    minulému rámci – usazující se graf se pohybuje málo a rozdíly dobře
+    komprimuje i permessage-deflate. ``ids`` jde jen při změně pořadí.
+    Keyframe vznikne i při přetečení Int16 (graf se roztáhl)."""
+
+    def __init__(self) -> None:
+        self._ids: list[str] | None = None
+        self._last = None            # minule odeslané kvantované hodnoty
+        self._scale = 1.0
+
+    def encode(self, ids: list[str], coords) -> bytes | None:
+        """Rámec pro pozice `coords` (pole N×3) uzlů `ids`; None, když se
+        od minula nic nepohnulo."""
+        coords = np.asarray(coords, dtype=float).reshape(-1, 3)
+        header: dict[str, object] = {"type": "positions"}
+        keyframe = ids != self._ids or self._last is None
+        if not keyframe:
+            quantized = np.rint(coords / self._scale)
+            delta = quantized - self._last
+            keyframe = bool(np.abs(quantized).max(initial=0) > _INT16
+                            or np.abs(delta).max(initial=0) > _INT16)
+        if keyframe:
+            extent = float(np.abs(coords).max(initial=0.0))
+            self._scale = max(extent * 1.5 / _INT16, 0.01)   # rezerva růstu
+            quantized = np.rint(coords / self._scale)
+            values = quantized
+            if ids != self._ids:
+                header["ids"] = list(ids)
+                self._ids = list(ids)
+        else:
+            if not delta.any():
+                return None
+            values = delta
+        self._last = quantized
+        header.update(scale=self._scale, keyframe=keyframe)
+        raw = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        head = struct.pack("<I", len(raw)) + raw
+        head += b"\0" * (-len(head) % 4)
+        return head + values.astype("<i2").tobytes()
+
+
+class ServerLayout:
+    """Průběžný layout na serveru pro slabé klienty (hello layout="server").
+
+    Každé kolo spustí pár iterací force_layout v procesu `executor`
+    (mimo GIL event loopu) nad zmraženým stavem a výsledek zapíše do
+    canvasu (set_positions) – dostanou ho i inity ostatních. Teplota kolo
+    od kola klesá; změna topologie ji znovu zvedne. Usazený graf se
+    nepočítá."""
+
+    def __init__(self, iterations: int = 10, cooling: float = 0.85,
+                 min_temperature: float = 0.002) -> None:
+        if np is None:
+            raise ImportError("serverový layout potřebuje numpy:"
+                              " pip install viewbase[layout]")
+        self.iterations = iterations
+        self.cooling = cooling
+        self.min_temperature = min_temperature
+        self._temperature = 0.1
+        self._topology: int | None = None
+
+    def round(self, canvas, executor):
+        """Spusť kolo v `executor`; vrátí future s {id: pozice}, nebo None,
+        když je graf usazený a topologie se nezměnila."""
+        topology = canvas.topology_version  # čteno před state(): spíš kolo navíc
+        state = canvas.state()
+        if topology != self._topology:
+            self._topology = topology
+            self._temperature = 0.1 if len(state.positions) * 2 < len(state) \
+                else 0.03
+        elif self._temperature < self.min_temperature:
+            return None
+        future = executor.submit(
+            force_layout, [n.id for n in state.node_records()],
+            [(e.source, e.target) for e in state.edge_records()],
+            dimensions=state.config["dimensions"],
+            iterations=self.iterations, initial=state.positions,
+            temperature=self._temperature)
+        self._temperature *= self.cooling
+        return future
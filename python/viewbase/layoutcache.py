@@ -0,0 +1,180 @@
+"""Diskový cache rozložení podle topologie grafu.
+
+Tytéž referenční topologie (mapa datacentra, …) se otevírají pořád dokola;
+místo nového výpočtu layoutu se pozice vezmou z cache. Klíčem je stabilní
+hash množin uzlů a hran (`topology_hash`, nezávislý na pořadí vkládání
+a směru hrany). Pro téměř shodné topologie drží index každé položky
+bottom-k MinHash skicu množiny {uzly} ∪ {hrany}: odhad Jaccardovy
+podobnosti ze dvou skic je k nejmenších hashů sjednocení, z nichž se
+spočítá podíl obsažený v obou. Nad `min_similarity` se pozice převezmou
+pro společné uzly, zbytek doladí layout (nebo klientská fyzika).
+
+Adresář obsahuje ``index.json`` (hash → skica, počet uzlů, pořadí užití)
+a ``<hash>.json`` s pozicemi. Počet položek je omezený (LRU); zápisy jsou
+atomické přes dočasný soubor."""
+from __future__ import annotations
+
+import hashlib
+import heapq
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Iterable
+
+from .snapshot import CanvasState
+
+SKETCH_SIZE = 128
+
+Position = tuple[float, float, float]
+
+
+def _edge_token(source: str, target: str) -> str:
+    a, b = sorted((source, target))
+    return f"{a}\0{b}"
+
+
+def topology_hash(ids: Iterable[str], edges: Iterable[tuple[str, str]]) -> str:
+    """SHA-256 seřazených id uzlů a hran – stejný graf dá stejný hash bez
+    ohledu na pořadí vkládání i orientaci hran."""
+    digest = hashlib.sha256()
+    for node_id in sorted(ids):
+        digest.update(node_id.encode("utf-8") + b"\1")
+    digest.update(b"\2")
+    for token in sorted(_edge_token(a, b) for a, b in edges):
+        digest.update(token.encode("utf-8") + b"\1")
+    return digest.hexdigest()
+
+
+def _sketch(tokens: Iterable[str]) -> list[int]:
+    """Bottom-k MinHash: SKETCH_SIZE nejmenších 64bit hashů tokenů."""
+    return sorted(heapq.nsmallest(SKETCH_SIZE, {
+        int.from_bytes(hashlib.blake2b(t.encode("utf-8"),
+                                       digest_size=8).digest(), "little")
+        for t in tokens}))
+
+
+def similarity(a: list[int], b: list[int]) -> float:
+    """Odhad Jaccardovy podobnosti dvou bottom-k skic (0–1)."""
+    if not a or not b:
+        return 0.0
+    both = set(a) & set(b)
+    union = heapq.nsmallest(SKETCH_SIZE, set(a) | set(b))
+    return sum(h in both for h in union) / len(union)
+
+
+class LayoutCache:
+    """Pozice uzlů na disku podle topologie; `lookup`/`restore` je vrátí
+    pro shodný nebo podobný graf, `store` je uloží. Thread-safe."""
+
+    def __init__(self, directory: str | os.PathLike, *, max_entries: int = 32,
+                 min_similarity: float = 0.8) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries musí být aspoň 1")
+        if not 0.0 < min_similarity <= 1.0:
+            raise ValueError("min_similarity musí být v (0, 1]")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self._index: dict[str, dict] = self._read_index()
+        self._clock = max((e["used"] for e in self._index.values()),
+                          default=0)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @staticmethod
+    def _topology(state: CanvasState) -> tuple[str, list[int]]:
+        ids = [n.id for n in state.node_records()]
+        edges = [(e.source, e.target) for e in state.edge_records()]
+        return (topology_hash(ids, edges),
+                _sketch(ids + [_edge_token(a, b) for a, b in edges]))
+
+    def lookup(self, state: CanvasState) -> dict[str, Position]:
+        """Pozice pro topologii `state`: přesná shoda, jinak nejpodobnější
+        položka nad `min_similarity`; {} když nic. Pozice neznámých uzlů se
+        nefiltrují – set_positions je přeskočí."""
+        key, sketch = self._topology(state)
+        with self._lock:
+            if key not in self._index:
+                key = self._nearest(sketch)
+                if key is None:
+                    return {}
+            try:
+                data = json.loads((self.directory / f"{key}.json").read_text(
+                    encoding="utf-8"))
+            except (OSError, ValueError):
+                self._index.pop(key, None)      # soubor zmizel / je vadný
+                self._write_index()
+                return {}
+            self._touch(key)
+            self._write_index()
+        return {node_id: tuple(p) for node_id, p in data.items()}
+
+    def restore(self, canvas) -> int:
+        """Převezmi pozice z cache do canvasu (set_positions – přepíše
+        i existující pozice společných uzlů). Vrací počet převzatých."""
+        positions = self.lookup(canvas.state())
+        return canvas.set_positions(positions) if positions else 0
+
+    def store(self, state: CanvasState) -> str | None:
+        """Ulož pozice `state` pod hash jeho topologie; vrací hash, nebo
+        None, když graf žádné pozice nemá. Téměř shodnou položku (tu, kterou
+        by vrátil lookup) nahradí – živý graf, který se pořád mírně mění,
+        tak drží jednu položku a nevytlačí referenční topologie. Nad
+        `max_entries` vyhodí nejdéle nepoužitou položku."""
+        if not state.positions:
+            return None
+        key, sketch = self._topology(state)
+        raw = json.dumps({node_id: list(p) for node_id, p
+                          in state.positions.items()},
+                         separators=(",", ":"))
+        with self._lock:
+            if key not in self._index:
+                near = self._nearest(sketch)
+                if near is not None:
+                    self._drop(near)
+            self._atomic_write(self.directory / f"{key}.json", raw)
+            self._index[key] = {"sketch": sketch, "nodes": len(state),
+                                "used": 0}
+            self._touch(key)
+            while len(self._index) > self.max_entries:
+                self._drop(min(self._index,
+                               key=lambda k: self._index[k]["used"]))
+            self._write_index()
+        return key
+
+    def _nearest(self, sketch: list[int]) -> str | None:
+        """Nejpodobnější položka nad `min_similarity`, jinak None."""
+        scored = [(similarity(sketch, entry["sketch"]), k)
+                  for k, entry in self._index.items()]
+        score, key = max(scored, default=(0.0, None))
+        return key if score >= self.min_similarity else None
+
+    def _drop(self, key: str) -> None:
+        del self._index[key]
+        (self.directory / f"{key}.json").unlink(missing_ok=True)
+
+    def _touch(self, key: str) -> None:
+        self._clock += 1
+        self._index[key]["used"] = self._clock
+
+    def _read_index(self) -> dict[str, dict]:
+        try:
+            index = json.loads((self.directory / "index.json").read_text(
+                encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return index if isinstance(index, dict) else {}
+
+    def _write_index(self) -> None:
+        self._atomic_write(self.directory / "index.json",
+                           json.dumps(self._index, separators=(",", ":")))
+
+    @staticmethod
+    def _atomic_write(path: Path, text: str) -> None:
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
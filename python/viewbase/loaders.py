@@ -0,0 +1,194 @@
+"""Streamované importy grafu ze souborů (edge list, JSONL, CSV).
+
+Soubor se čte po řádcích a každých `chunk_size` entit se dávka zapíše
+hromadnou cestou (Canvas._ingest – nové záznamy bez validace per prvek,
+existující se slučují jako ensure_*). Paměť drží jen jednu dávku, ne celý
+graf jako networkx. Každá dávka je samostatný patch: pusť import ve
+vlákně vedle `serve` a klienti vidí graf růst. `progress(přečteno,
+celkem)` v bajtech se volá po každé dávce."""
+from __future__ import annotations
+
+import csv
+import json
+import math
+import os
+from typing import Any, Callable, Iterator
+
+from .canvas import Canvas
+
+Progress = Callable[[int, int], None]
+
+# Sloupce/klíče se zvláštním významem (zbytek jde do meta).
+_NODE_KEYS = ("id", "type", "label")
+_EDGE_KEYS = ("source", "target")
+
+
+def _lines(path: str | os.PathLike, counter: list[int]) -> Iterator[str]:
+    """Dekódované řádky souboru; `counter[0]` = dosud přečtené bajty."""
+    with open(path, "rb") as fh:
+        for raw in fh:
+            counter[0] += len(raw)
+            yield raw.decode("utf-8")
+
+
+class _Chunker:
+    """Sbírá uzly a hrany a po `chunk_size` entitách je zapíše do canvasu."""
+
+    def __init__(self, canvas: Canvas, path: str | os.PathLike,
+                 chunk_size: int, progress: Progress | None, *,
+                 nodes: bool = True) -> None:
+        if chunk_size <= 0:
+            raise ValueError("chunk_size musí být kladné")
+        self.canvas = canvas
+        self.read = [0]
+        self.total = os.path.getsize(path)
+        self._chunk_size = chunk_size
+        self._progress = progress
+        self._nodes: list[tuple[str, str | None, str | None,
+                                dict[str, Any]]] = []
+        self._edges: list[tuple[str, str, dict[str, Any]]] = []
+        # holé konce hran, které smí doplnit pozdější řádek (Canvas._ingest);
+        # edge list řádky uzlů nemá, tam by jen zbytečně rostla
+        self._bare: set[str] | None = set() if nodes else None
+
+    def node(self, node_id: Any, type: Any, label: Any,
+             meta: dict[str, Any]) -> None:
+        self._nodes.append((str(node_id),
+                            None if type is None else str(type),
+                            label, meta))
+        self._maybe_flush()
+
+    def edge(self, source: Any, target: Any, meta: dict[str, Any]) -> None:
+        self._edges.append((str(source), str(target), meta))
+        self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if len(self._nodes) + len(self._edges) >= self._chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._nodes or self._edges:
+            self.canvas._ingest(self._nodes, self._edges, self._bare)
+            self._nodes, self._edges = [], []
+        if self._progress is not None:
+            self._progress(self.read[0], self.total)
+
+
+def _scalar(text: str) -> Any:
+    """Hodnota z textového souboru: int/float jen tehdy, když se číslo
+    vypíše zpět na týž text – "01234", "007" či "1e5" (identifikátory)
+    zůstanou řetězci, aby meta prošla tam i zpět a sedla na filtry."""
+    for convert in (int, float):
+        try:
+            value = convert(text)
+        except ValueError:
+            continue
+        if str(value) == text and math.isfinite(value):
+            return value
+        return text
+    return text
+
+
+def load_edgelist(path: str | os.PathLike, canvas: Canvas | None = None, *,
+                  delimiter: str | None = None, comments: str = "#",
+                  chunk_size: int = 50_000,
+                  progress: Progress | None = None) -> Canvas:
+    """Edge list (formát networkx): řádek ``source target [data]``, kde
+    data je JSON objekt (``{"w": 2}``) nebo jedna hodnota (→ meta
+    ``weight``). Komentář (`comments`) smí začít kdekoli mimo JSON data –
+    ``{"color": "#ff0000"}`` projde celé. Uzly vzniknou z konců hran. Bez
+    `canvas` založí nový; vrací canvas."""
+    canvas = canvas if canvas is not None else Canvas()
+    chunker = _Chunker(canvas, path, chunk_size, progress, nodes=False)
+    decoder = json.JSONDecoder()
+    for number, line in enumerate(_lines(path, chunker.read), 1):
+        parts = line.strip().split(delimiter, 2)
+        json_data = (len(parts) == 3 and parts[2].lstrip().startswith("{")
+                     and not (comments and comments in parts[0] + parts[1]))
+        if comments and comments in line and not json_data:
+            # komentář uvnitř JSON dat ("#ff0000") se neořezává
+            parts = line[:line.index(comments)].strip().split(delimiter, 2)
+        if not parts or not parts[0]:
+            continue
+        if len(parts) < 2:
+            raise ValueError(f"{path}:{number}: čekám 'source target [data]'")
+        meta: dict[str, Any] = {}
+        if len(parts) == 3:
+            data = parts[2].strip()
+            if json_data:
+                try:
+                    meta, end = decoder.raw_decode(data)
+                except ValueError:
+                    meta, end = None, 0
+                rest = data[end:].strip()
+                if not isinstance(meta, dict) or (
+                        rest and not (comments and rest.startswith(comments))):
+                    raise ValueError(
+                        f"{path}:{number}: data hrany nejsou JSON objekt")
+            else:
+                meta = {"weight": _scalar(data)}
+        chunker.edge(parts[0], parts[1], meta)
+    chunker.flush()
+    return canvas
+
+
+def load_jsonl(path: str | os.PathLike, canvas: Canvas | None = None, *,
+               chunk_size: int = 50_000,
+               progress: Progress | None = None) -> Canvas:
+    """JSONL: objekt se ``source`` a ``target`` je hrana, s ``id`` uzel
+    (volitelně ``type`` a ``label``). Meta je buď vnořený ``meta``
+    (tvar z init/snapshot), nebo zbylé klíče. Neznámé typy se
+    auto-registrují; hrany smí předcházet svým uzlům."""
+    canvas = canvas if canvas is not None else Canvas()
+    chunker = _Chunker(canvas, path, chunk_size, progress)
+    for number, line in enumerate(_lines(path, chunker.read), 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise ValueError(f"{path}:{number}: neplatný JSON") from None
+        if not isinstance(record, dict):
+            raise ValueError(f"{path}:{number}: čekám JSON objekt")
+        if "source" in record and "target" in record:
+            meta = record.get("meta", {k: v for k, v in record.items()
+                                       if k not in _EDGE_KEYS})
+            chunker.edge(record["source"], record["target"], dict(meta))
+        elif "id" in record:
+            meta = record.get("meta", {k: v for k, v in record.items()
+                                       if k not in _NODE_KEYS})
+            chunker.node(record["id"], record.get("type"),
+                         record.get("label"), dict(meta))
+        else:
+            raise ValueError(
+                f"{path}:{number}: záznam potřebuje 'id' nebo 'source'+'target'")
+    chunker.flush()
+    return canvas
+
+
+def load_csv(path: str | os.PathLike, canvas: Canvas | None = None, *,
+             delimiter: str = ",", chunk_size: int = 50_000,
+             progress: Progress | None = None) -> Canvas:
+    """CSV s hlavičkou: řádek s vyplněnými sloupci ``source`` a ``target``
+    je hrana, jinak uzel podle ``id`` (volitelně ``type``, ``label``).
+    Ostatní neprázdné sloupce jdou do meta (čísla se převedou); prázdné
+    buňky se vynechají, takže jeden soubor smí nést uzly i hrany."""
+    canvas = canvas if canvas is not None else Canvas()
+    chunker = _Chunker(canvas, path, chunk_size, progress)
+    rows = csv.DictReader(_lines(path, chunker.read), delimiter=delimiter)
+    fields = rows.fieldnames or []
+    if "id" not in fields and not all(k in fields for k in _EDGE_KEYS):
+        raise ValueError(f"{path}: hlavička potřebuje 'id' nebo"
+                         " 'source' a 'target'")
+    for row in rows:
+        if row.get("source") and row.get("target"):
+            chunker.edge(row["source"], row["target"], {
+                k: _scalar(v) for k, v in row.items()
+                if k and v and k not in _EDGE_KEYS})
+        elif row.get("id"):
+            chunker.node(row["id"], row.get("type") or None,
+                         row.get("label") or None, {
+                             k: _scalar(v) for k, v in row.items()
+                             if k and v and k not in _NODE_KEYS})
+    chunker.flush()
+    return canvas
@@ -0,0 +1,190 @@
+"""Grafové metriky pro odvozené atributy uzlů (Canvas.track_metrics).
+
+- stupeň: Canvas ho drží v O(1) na změnu hrany (délka množiny sousedů)
+- komponenty: union-find – sjednocení při přidání hrany v O(α), po
+  odebrání hrany se líně přestaví (odebrání union-find neumí)
+- PageRank a betweenness: těžké, počítají se na pozadí nad zmraženým
+  stavem (CanvasState) a publikují nejvýš jednou za interval
+
+Čisté funkce nad slovníkem sousedů {id: iterovatelné sousedů}; závislost
+na networkx/numpy nevzniká."""
+from __future__ import annotations
+
+import random
+from collections import deque
+from typing import Iterable, Mapping
+
+METRICS = ("degree", "component", "pagerank", "betweenness")
+
+Adjacency = Mapping[str, Iterable[str]]
+
+
+class UnionFind:
+    """Disjunktní množiny s kompresí cest (půlením) a sjednocením podle
+    velikosti. Neznámý prvek je jednoprvková množina sám se sebou."""
+
+    __slots__ = ("parent", "size")
+
+    def __init__(self) -> None:
+        self.parent: dict[str, str] = {}
+        self.size: dict[str, int] = {}
+
+    @classmethod
+    def build(cls, edges: Iterable[tuple[str, str]]) -> "UnionFind":
+        uf = cls()
+        for a, b in edges:
+            uf.union(a, b)
+        return uf
+
+    def find(self, x: str) -> str:
+        parent = self.parent
+        root = parent.get(x)
+        if root is None:
+            return x
+        while root != x:
+            grand = parent[root]
+            parent[x] = grand                 # půlení cesty
+            x, root = root, grand
+        return x
+
+    def union(self, a: str, b: str) -> str:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return ra
+        size = self.size
+        sa, sb = size.get(ra, 1), size.get(rb, 1)
+        if sa < sb:
+            ra, rb, sa, sb = rb, ra, sb, sa
+        self.parent.setdefault(ra, ra)
+        self.parent[rb] = ra
+        size[ra] = sa + sb
+        size.pop(rb, None)
+        return ra
+
+    def connected(self, a: str, b: str) -> bool:
+        return self.find(a) == self.find(b)
+
+    def discard(self, x: str) -> None:
+        """Zapomeň jednoprvkovou množinu (odebraný izolovaný uzel)."""
+        if self.size.get(x, 1) == 1 and self.parent.get(x, x) == x:
+            self.parent.pop(x, None)
+            self.size.pop(x, None)
+
+    def copy(self) -> "UnionFind":
+        uf = UnionFind()
+        uf.parent = dict(self.parent)
+        uf.size = dict(self.size)
+        return uf
+
+
+def component_labels(nodes: Iterable[str], uf: UnionFind) -> dict[str, int]:
+    """Číslo komponenty pro každý uzel: 0 = největší, pak sestupně podle
+    velikosti (stejná velikost = pořadí prvního výskytu)."""
+    members: dict[str, list[str]] = {}
+    for node in nodes:
+        members.setdefault(uf.find(node), []).append(node)
+    ordered = sorted(members.values(), key=len, reverse=True)
+    return {node: label for label, group in enumerate(ordered)
+            for node in group}
+
+
+def pagerank(adjacency: Adjacency, *, damping: float = 0.85,
+             tol: float = 1e-6, max_iter: int = 100) -> dict[str, float]:
+    """PageRank neorientovaného grafu (mocninná metoda). Izolované uzly
+    rozdělují svou váhu rovnoměrně všem (jako networkx)."""
+    nodes = list(adjacency)
+    n = len(nodes)
+    if n == 0:
+        return {}
+    neighbors = {node: list(adjacency[node]) for node in nodes}
+    rank = dict.fromkeys(nodes, 1.0 / n)
+    for _ in range(max_iter):
+        dangling = sum(rank[v] for v in nodes if not neighbors[v])
+        base = (1.0 - damping) / n + damping * dangling / n
+        new = dict.fromkeys(nodes, base)
+        for v in nodes:
+            out = neighbors[v]
+            if out:
+                share = damping * rank[v] / len(out)
+                for w in out:
+                    new[w] += share
+        error = sum(abs(new[v] - rank[v]) for v in nodes)
+        rank = new
+        if error < n * tol:
+            break
+    return rank
+
+
+def label_propagation(adjacency: Adjacency, *, max_iter: int = 20,
+                      seed: int = 0) -> dict[str, str]:
+    """Shluky label propagation: každý uzel přebírá nejčastější štítek
+    sousedů (remízu rozhodne štítek, který už má, jinak náhoda podle
+    `seed`), dokud se něco mění. Vrací {uzel: štítek}; štítek je id
+    některého člena shluku, izolovaný uzel je shlukem sám pro sebe."""
+    rng = random.Random(seed)
+    nodes = list(adjacency)
+    labels = {node: node for node in nodes}
+    for _ in range(max_iter):
+        rng.shuffle(nodes)
+        changed = False
+        for node in nodes:
+            counts: dict[str, int] = {}
+            for neighbor in adjacency[node]:
+                label = labels[neighbor]
+                counts[label] = counts.get(label, 0) + 1
+            if not counts:
+                continue
+            best = max(counts.values())
+            if counts.get(labels[node]) == best:
+                continue
+            candidates = [label for label, c in counts.items() if c == best]
+            labels[node] = (candidates[0] if len(candidates) == 1
+                            else rng.choice(sorted(candidates)))
+            changed = True
+        if not changed:
+            break
+    return labels
+
+
+def betweenness(adjacency: Adjacency, *, samples: int | None = None,
+                seed: int = 0) -> dict[str, float]:
+    """Normalizovaná betweenness centralita (Brandes, neváženě). Se
+    `samples` se počítá z náhodného vzorku zdrojů a škáluje – odhad pro
+    velké grafy v O(samples · E) místo O(N · E)."""
+    nodes = list(adjacency)
+    n = len(nodes)
+    result = dict.fromkeys(nodes, 0.0)
+    if n < 3:
+        return result
+    sources = nodes
+    if samples is not None and samples < n:
+        sources = random.Random(seed).sample(nodes, samples)
+    for s in sources:
+        stack: list[str] = []
+        preds: dict[str, list[str]] = {s: []}
+        sigma = {s: 1.0}
+        dist = {s: 0}
+        queue = deque([s])
+        while queue:
+            v = queue.popleft()
+            stack.append(v)
+            for w in adjacency[v]:
+                if w not in dist:
+                    dist[w] = dist[v] + 1
+                    sigma[w] = 0.0
+                    preds[w] = []
+                    queue.append(w)
+                if dist[w] == dist[v] + 1:
+                    sigma[w] += sigma[v]
+                    preds[w].append(v)
+        delta = dict.fromkeys(stack, 0.0)
+        while stack:
+            w = stack.pop()
+            for v in preds[w]:
+                delta[v] += sigma[v] / sigma[w] * (1.0 + delta[w])
+            if w != s:
+                result[w] += delta[w]
+    # neorientovaně: každá cesta započtena z obou konců; normalizace na
+    # počet dvojic (n-1)(n-2)/2 a škálování vzorku
+    scale = 1.0 / ((n - 1) * (n - 2)) * (n / len(sources))
+    return {v: c * scale for v, c in result.items()}
@@ -0,0 +1,275 @@
+"""Uložení a načtení canvasu v kompaktním binárním sloupcovém formátu.
+
+Soubor (little-endian)::
+
+    b"VBSNAP01"  u32 délka hlavičky  hlavička (JSON)  zarovnání na 8 B
+    sekce…       (každá zarovnaná na 8 B; offsety relativní k první sekci)
+
+Hlavička nese config, typy, trvalé toky, `seq` a tabulku sekcí
+{jméno: {offset, length, codec}}. Sekce:
+
+- ``str_offsets`` (u32) + ``str_data`` (UTF-8): tabulka řetězců – id uzlů,
+  typy, šablony popisků a meta klíče jsou v ní jen jednou; offsety jsou
+  ve znacích dekódovaného textu (řez bez per-řetězcového dekódování).
+- ``node_id``, ``node_type``, ``node_label`` (u32 indexy do tabulky,
+  0xFFFFFFFF = None), ``edge_source``, ``edge_target`` (u32 indexy uzlů).
+- ``node_pos_index`` (u32 indexy uzlů) + ``node_pos`` (f32 x, y, z):
+  pozice uzlů z precompute_layout / set_positions (jen umístěné uzly;
+  starší soubory sekce nemají).
+- ``node_schema``/``edge_schema`` (u32): index „tvaru" meta (n-tice klíčů)
+  v ``*_shapes`` (JSON seznam seznamů indexů klíčů); ``*_values`` je JSON
+  seznam hodnot na entitu. Stejně strukturovaná meta (typicky celý import)
+  sdílí jeden tvar a načtení je jen ``dict(zip(klíče, hodnoty))``.
+
+Nekomprimované sekce se při načtení čtou přes mmap bez kopie; s
+``compress=True`` je každá sekce zvlášť zlib. Načtení obchází validaci
+per uzel a indexy staví hromadně. Okna (ControlWindow/TerminalWindow) se
+neukládají – jejich callbacky jsou kód, po startu je otevři znovu."""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .records import EdgeRecord, NodeRecord, gc_paused, intern
+
+if TYPE_CHECKING:
+    from .canvas import Canvas
+
+MAGIC = b"VBSNAP01"
+FORMAT_VERSION = 1
+NONE = 0xFFFFFFFF
+_ALIGN = 8
+_SWAP = sys.byteorder != "little"
+
+
+def _align(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _u32(values) -> bytes:
+    arr = array("I", values)
+    if _SWAP:
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _f32(values) -> bytes:
+    arr = array("f", values)
+    if _SWAP:
+        arr.byteswap()
+    return arr.tobytes()
+
+
+class _StringTable:
+    """Deduplikovaná tabulka řetězců (řetězec -> index)."""
+
+    def __init__(self) -> None:
+        self.index: dict[str, int] = {}
+
+    def add(self, value: str | None) -> int:
+        if value is None:
+            return NONE
+        idx = self.index.get(value)
+        if idx is None:
+            idx = self.index[value] = len(self.index)
+        return idx
+
+    def sections(self) -> dict[str, bytes]:
+        offsets = [0]
+        for text in self.index:
+            offsets.append(offsets[-1] + len(text))
+        return {"str_offsets": _u32(offsets),
+                "str_data": "".join(self.index).encode("utf-8")}
+
+
+def _meta_columns(prefix: str, metas: list[dict[str, Any]],
+                  strings: _StringTable) -> dict[str, bytes]:
+    """Meta entit jako sloupce: index tvaru (n-tice klíčů) + seznam hodnot."""
+    shapes: dict[tuple[str, ...], int] = {}
+    schema = []
+    for meta in metas:
+        shape = tuple(meta)
+        idx = shapes.get(shape)
+        if idx is None:
+            idx = shapes[shape] = len(shapes)
+        schema.append(idx)
+    shape_keys = [[strings.add(k) for k in shape] for shape in shapes]
+    return {
+        f"{prefix}_schema": _u32(schema),
+        f"{prefix}_shapes": json.dumps(shape_keys).encode("utf-8"),
+        f"{prefix}_values": json.dumps(
+            [list(meta.values()) for meta in metas],
+            separators=(",", ":")).encode("utf-8"),
+    }
+
+
+def save(canvas: "Canvas", path: str | os.PathLike, *,
+         compress: bool = False) -> None:
+    """Zapiš stav canvasu do `path` (atomicky přes dočasný soubor).
+    Stav se zmrazí v O(1) (Canvas.state), serializace běží mimo zámek."""
+    state = canvas.state()
+    nodes = list(state.node_records())
+    edges = list(state.edge_records())
+    strings = _StringTable()
+    node_index = {n.id: i for i, n in enumerate(nodes)}
+    columns: dict[str, bytes] = {
+        "node_id": _u32(strings.add(n.id) for n in nodes),
+        "node_type": _u32(strings.add(n.type) for n in nodes),
+        "node_label": _u32(strings.add(n.label_template) for n in nodes),
+        "edge_source": _u32(node_index[e.source] for e in edges),
+        "edge_target": _u32(node_index[e.target] for e in edges),
+        "node_pos_index": _u32(node_index[i] for i in state.positions),
+        "node_pos": _f32(c for p in state.positions.values() for c in p),
+    }
+    columns.update(_meta_columns("node", [n.meta for n in nodes], strings))
+    columns.update(_meta_columns("edge", [e.meta for e in edges], strings))
+    columns.update(strings.sections())
+
+    table: dict[str, dict[str, Any]] = {}
+    blobs: list[bytes] = []
+    offset = 0
+    for name, raw in columns.items():
+        data = zlib.compress(raw, 1) if compress else raw
+        table[name] = {"offset": offset, "length": len(data),
+                       "codec": "zlib" if compress else "raw"}
+        padded = data + b"\0" * (_align(len(data)) - len(data))
+        blobs.append(padded)
+        offset += len(padded)
+    header = json.dumps({
+        "version": FORMAT_VERSION,
+        "seq": state.seq,
+        "config": state.config,
+        "node_types": state.node_types,
+        "flow_types": state.flow_types,
+        "flows": state.flows,
+        "paths": state.paths,
+        "node_label": state.label_template,
+        "counts": {"nodes": len(nodes), "edges": len(edges)},
+        "sections": table,
+    }, separators=(",", ":")).encode("utf-8")
+    prefix = MAGIC + struct.pack("<I", len(header)) + header
+    prefix += b"\0" * (_align(len(prefix)) - len(prefix))
+
+    target = Path(path)
+    tmp = target.with_name(target.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(prefix)
+        for blob in blobs:
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, target)
+
+
+def read_header(buf) -> tuple[dict[str, Any], int]:
+    """Přečti hlavičku; vrátí (hlavička, offset první sekce)."""
+    if bytes(buf[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Soubor není viewbase snapshot (chybí VBSNAP01)")
+    (length,) = struct.unpack_from("<I", buf, len(MAGIC))
+    start = len(MAGIC) + 4
+    header = json.loads(bytes(buf[start:start + length]))
+    if header.get("version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Nepodporovaná verze snapshotu {header.get('version')!r}")
+    return header, _align(start + length)
+
+
+def _section(buf, header: dict[str, Any], base: int, name: str):
+    """Obsah sekce: memoryview do mmapu (raw) nebo dekomprimované bytes."""
+    spec = header["sections"][name]
+    view = buf[base + spec["offset"]:base + spec["offset"] + spec["length"]]
+    if spec["codec"] == "zlib":
+        return zlib.decompress(view)
+    if spec["codec"] != "raw":
+        raise ValueError(f"Neznámý codec sekce {name}: {spec['codec']!r}")
+    return view
+
+
+def _u32_column(buf, header, base, name) -> array | memoryview:
+    return _column(buf, header, base, name, "I")
+
+
+def _column(buf, header, base, name, code: str) -> array | memoryview:
+    """Sekce jako pole typu `code` (array) – bez kopie, je-li to možné."""
+    data = _section(buf, header, base, name)
+    if _SWAP:
+        arr = array(code)
+        arr.frombytes(bytes(data))
+        arr.byteswap()
+        return arr
+    return memoryview(data).cast(code)
+
+
+def load(cls: type["Canvas"], path: str | os.PathLike,
+         **canvas_kwargs: Any) -> "Canvas":
+    """Postav nový canvas ze souboru uloženého `save`. `canvas_kwargs`
+    (např. max_nodes, title) jdou do konstruktoru a mají přednost před
+    configem ze souboru; zbytek configu se převezme ze souboru."""
+    with open(path, "rb") as f:
+        try:
+            buf = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except ValueError:                      # prázdný soubor nejde mmapnout
+            buf = memoryview(f.read())
+    # mmap se zavře s posledním pohledem do něj (konec _load).
+    with gc_paused():
+        return _load(cls, buf, canvas_kwargs)
+
+
+def _load(cls, buf, canvas_kwargs: dict[str, Any]) -> "Canvas":
+    header, base = read_header(buf)
+    config = header["config"]
+    kwargs = {key: config[key] for key in
+              ("title", "dimensions", "theme", "highlight_neighbors", "quality")
+              if key in config}
+    kwargs.update(canvas_kwargs)
+    canvas = cls(**kwargs)
+
+    offsets = _u32_column(buf, header, base, "str_offsets")
+    text = bytes(_section(buf, header, base, "str_data")).decode("utf-8")
+    strings = [intern(text[offsets[i]:offsets[i + 1]])
+               for i in range(len(offsets) - 1)]
+    del offsets
+
+    def string(idx: int) -> str | None:
+        return None if idx == NONE else strings[idx]
+
+    def metas(prefix: str) -> list[dict[str, Any]]:
+        shapes = [tuple(strings[k] for k in shape) for shape in json.loads(
+            bytes(_section(buf, header, base, f"{prefix}_shapes")))]
+        schema = _u32_column(buf, header, base, f"{prefix}_schema")
+        values = json.loads(
+            bytes(_section(buf, header, base, f"{prefix}_values")))
+        return [dict(zip(shapes[schema[i]], vals))
+                for i, vals in enumerate(values)]
+
+    ids = _u32_column(buf, header, base, "node_id")
+    types = _u32_column(buf, header, base, "node_type")
+    labels = _u32_column(buf, header, base, "node_label")
+    nodes = [NodeRecord(strings[ids[i]], string(types[i]), string(labels[i]),
+                        meta)
+             for i, meta in enumerate(metas("node"))]
+    del ids, types, labels
+    sources = _u32_column(buf, header, base, "edge_source")
+    targets = _u32_column(buf, header, base, "edge_target")
+    edges = [EdgeRecord(nodes[sources[i]].id, nodes[targets[i]].id, meta)
+             for i, meta in enumerate(metas("edge"))]
+    del sources, targets
+    positions = {}
+    if "node_pos" in header["sections"]:
+        index = _u32_column(buf, header, base, "node_pos_index")
+        coords = _column(buf, header, base, "node_pos", "f")
+        positions = {nodes[idx].id: (round(coords[3 * i], 1),
+                                     round(coords[3 * i + 1], 1),
+                                     round(coords[3 * i + 2], 1))
+                     for i, idx in enumerate(index)}
+        del index, coords
+
+    canvas._restore(header, nodes, edges, positions, keep=canvas_kwargs)
+    return canvas
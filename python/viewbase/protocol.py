@@ -2,16 +2,37 @@
 from __future__ import annotations
 
 import json
+import struct
+import sys
+from array import array
 from typing import Any
 
 PROTOCOL_VERSION = 1
 
+# Akce, jejichž efekt je součástí stavu v init (trvalé toky nesou flow_id).
+_STATE_ACTIONS = ("stop_flow", "set_theme", "set_edge_style",
+                  "define_path", "drop_path")
+# Akce vázané na okna – callbacky jsou kód, do záznamu/replay nepatří.
+WINDOW_ACTIONS = ("open_window", "close_window", "terminal_append")
+
+
+def is_state_action(action: dict[str, Any]) -> bool:
+    """Mění akce stav posílaný v init (trvalý tok, stop, téma, styl hran,
+    registrované cesty)?"""
+    if action.get("action") == "flow":
+        return action.get("flow_id") is not None
+    return action.get("action") in _STATE_ACTIONS
+
 
 def init_message(*, seq: int, config: dict, node_types: dict,
                  nodes: list, edges: list,
                  flow_types: dict, flows: list,
-                 windows: list) -> dict[str, Any]:
-    return {
+                 windows: list, paths: dict | None = None,
+                 positions: dict | None = None,
+                 upload_positions: float | None = None,
+                 server_layout: bool = False,
+                 client_id: str | None = None) -> dict[str, Any]:
+    message = {
         "type": "init",
         "protocol": PROTOCOL_VERSION,
         "seq": seq,
@@ -21,8 +42,50 @@ def init_message(*, seq: int, config: dict, node_types: dict,
         "edges": edges,
         "flow_types": flow_types,
         "flows": flows,
+        "paths": paths or {},
+        "positions": positions or {},
         "windows": windows,
+        # vedoucí klient: po kolika s posílat usazené pozice (None = neposílá)
+        "upload_positions": upload_positions,
+        # klient si v hello řekl o serverový layout a server ho umí: pozice
+        # chodí binárně (layout.PositionStream), lokální fyzika neběží
+        "server_layout": server_layout,
     }
+    if client_id is not None:
+        # adresa klienta pro POST /api/filter (filtr nastavený zvenčí)
+        message["client_id"] = client_id
+    return message
+
+
+def leader_message(interval: float) -> dict[str, Any]:
+    """Klient se stal vedoucím (předchozí se odpojil): posílej pozice."""
+    return {"type": "leader", "interval": interval}
+
+
+def decode_positions(data: bytes) -> tuple[list[str], array]:
+    """Binární zpráva vedoucího klienta s usazenými pozicemi (little-endian):
+    u32 délka hlavičky, JSON ``{"type": "positions", "ids": [...]}``,
+    zarovnání na 4 B a float32 x, y, z pro každé id v pořadí hlavičky.
+    Vrací (ids, ploché pole souřadnic); vadnou zprávu odmítne ValueError."""
+    if len(data) < 4:
+        raise ValueError("Zpráva s pozicemi je příliš krátká")
+    (length,) = struct.unpack_from("<I", data)
+    try:
+        header = json.loads(data[4:4 + length])
+    except ValueError:
+        raise ValueError("Hlavička pozic není JSON") from None
+    if not isinstance(header, dict) or header.get("type") != "positions" \
+            or not isinstance(header.get("ids"), list):
+        raise ValueError("Čekám hlavičku {type: 'positions', ids: [...]}")
+    ids = header["ids"]
+    start = (4 + length + 3) // 4 * 4
+    coords = array("f")
+    coords.frombytes(data[start:start + 12 * len(ids)])
+    if len(coords) != 3 * len(ids):
+        raise ValueError("Počet souřadnic neodpovídá počtu id")
+    if sys.byteorder != "little":
+        coords.byteswap()
+    return [str(i) for i in ids], coords
 
 
 def patch_message(seq: int, deltas: dict[str, list]) -> dict[str, Any]:
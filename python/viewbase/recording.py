@@ -0,0 +1,356 @@
+"""Záznam relace (patche + akce s časem) a přehrávání s převíjením.
+
+Soubor záznamu je JSONL; první řádek je hlavička, pak záznamy s časem `t`
+v sekundách od startu::
+
+    {"viewbase_recording": 1, "started": <unix čas>, "keyframe_every": 60.0}
+    {"t": 0.0, "keyframe": {...}}                úplný stav
+    {"t": 0.51, "seq": 1, "deltas": {...}, "labels": {...}}
+    {"t": 0.52, "after": 1, "actions": [...]}
+
+Keyframe (úplný stav vč. label šablon) se zapíše na startu a pak nejdřív
+`keyframe_every` sekund po předchozím; vedle záznamu vzniká index
+``<soubor>.idx`` (JSONL ``[t, offset]`` keyframů). Převinutí na minutu 47
+tak načte nejbližší starší keyframe a přehraje jen zbytek intervalu.
+Chybí-li index (pád), Replay ho obnoví průchodem souboru. Akce oken se
+nezaznamenávají – jejich callbacky jsou kód. Akce se smí odkazovat na stav
+až po patchi `after + 1` (server drénuje akce před deltami), Replay je
+proto aplikuje až po něm."""
+from __future__ import annotations
+
+import atexit
+import bisect
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from .canvas import Canvas
+from .protocol import WINDOW_ACTIONS, is_state_action
+from .snapshot import CanvasState
+
+logger = logging.getLogger("viewbase")
+
+FORMAT_VERSION = 1
+_STOP = object()
+
+
+def _index_path(path: Path) -> Path:
+    return path.with_name(path.name + ".idx")
+
+
+def _dumps(record: dict[str, Any]) -> bytes:
+    return json.dumps(record, separators=(",", ":"),
+                      ensure_ascii=False).encode() + b"\n"
+
+
+def _keyframe(state: CanvasState) -> dict[str, Any]:
+    """Úplný stav pro keyframe – na rozdíl od init nese label šablony."""
+    return {
+        "seq": state.seq,
+        "config": state.config,
+        "node_types": state.node_types,
+        "flow_types": state.flow_types,
+        "flows": state.flows,
+        "paths": state.paths,
+        "node_label": state.label_template,
+        "nodes": [[n.id, n.type, n.label_template, n.meta]
+                  for n in state.node_records()],
+        "edges": [[e.source, e.target, e.meta] for e in state.edge_records()],
+    }
+
+
+def _load_keyframe(canvas: Canvas, frame: dict[str, Any]) -> None:
+    """Převeď canvas na stav keyframu rozdílem proti aktuálnímu stavu
+    (seek záznamu, zrcadlo brokeru)."""
+    for name, style in frame["node_types"].items():
+        canvas.define_type(name, **style)
+    for name, spec in frame["flow_types"].items():
+        canvas.define_flow_type(name, **spec)
+    canvas.node_label(frame["node_label"])
+    current = canvas.state()
+    node_ids = {node[0] for node in frame["nodes"]}
+    edge_keys = {(source, target) for source, target, _ in frame["edges"]}
+    canvas.apply_patch({
+        "remove_edges": [[e.source, e.target]
+                         for e in current.edge_records()
+                         if (e.source, e.target) not in edge_keys],
+        "remove_nodes": [n.id for n in current.node_records()
+                         if n.id not in node_ids],
+        "add_nodes": [{"id": i, "type": type, "meta": meta}
+                      for i, type, _, meta in frame["nodes"]],
+        "add_edges": [{"source": s, "target": t, "meta": meta}
+                      for s, t, meta in frame["edges"]],
+    }, labels={node[0]: node[2] for node in frame["nodes"]})
+    wanted_paths = frame.get("paths", {})
+    for path_id, path in current.paths.items():
+        if wanted_paths.get(path_id) != path:
+            canvas.apply_action({"action": "drop_path", "path_id": path_id})
+    for path_id, path in wanted_paths.items():
+        if current.paths.get(path_id) != path:
+            canvas.apply_action({"action": "define_path",
+                                 "path_id": path_id, "path": path})
+    flows = {f["flow_id"]: f for f in current.flows}
+    wanted = {f["flow_id"]: f for f in frame["flows"]}
+    for flow_id, flow in flows.items():
+        if wanted.get(flow_id) != flow:
+            canvas.apply_action({"action": "stop_flow", "flow_id": flow_id})
+    for flow_id, flow in wanted.items():
+        if flows.get(flow_id) != flow:
+            canvas.apply_action({"action": "flow", **flow})
+    config = frame["config"]
+    if config.get("theme") != current.config.get("theme"):
+        canvas.apply_action({"action": "set_theme",
+                             "theme": config["theme"]})
+    style = config.get("edge_style")
+    if style and style != current.config.get("edge_style"):
+        canvas.apply_action({"action": "set_edge_style", **style})
+
+
+class Recorder:
+    """Nahrávej vydrénovaný proud canvasu do souboru `path` (přepíše ho).
+    Posluchač jen zařadí do fronty (keyframe = O(1) CanvasState), kódování
+    a zápis běží ve vlastním vlákně; flush každých `flush_interval` s."""
+
+    def __init__(self, canvas: Canvas, path: str | os.PathLike, *,
+                 keyframe_every: float = 60.0,
+                 flush_interval: float = 1.0) -> None:
+        if keyframe_every <= 0 or flush_interval <= 0:
+            raise ValueError("keyframe_every a flush_interval musí být kladné")
+        self.canvas = canvas
+        self.path = Path(path)
+        self._keyframe_every = keyframe_every
+        self._flush_interval = flush_interval
+        self._file = open(self.path, "wb")
+        self._index = open(_index_path(self.path), "w")
+        self._file.write(_dumps({"viewbase_recording": FORMAT_VERSION,
+                                 "started": time.time(),
+                                 "keyframe_every": keyframe_every}))
+        self._queue: queue.Queue = queue.Queue()
+        self._closed = False
+        self._start = time.monotonic()
+        self._last_keyframe = 0.0
+        self._queue.put(("keyframe", 0.0, canvas.state()))
+        self._unsubscribe = canvas.subscribe(on_patch=self._on_patch,
+                                             on_actions=self._on_actions)
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="viewbase-recorder")
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---- posluchači (pod zámkem canvasu – jen fronta) --------------------
+
+    def _on_patch(self, seq: int, deltas: dict[str, list],
+                  labels: dict[str, str]) -> None:
+        t = time.monotonic() - self._start
+        self._queue.put(("patch", t, {"seq": seq, "deltas": deltas,
+                                      "labels": labels}))
+        if t - self._last_keyframe >= self._keyframe_every:
+            # hned po drain: stav = přesně po patchi seq (pending je prázdný)
+            self._last_keyframe = t
+            self._queue.put(("keyframe", t, self.canvas.state()))
+
+    def _on_actions(self, after: int, actions: list[dict[str, Any]]) -> None:
+        recorded = [a for a in actions if a.get("action") not in WINDOW_ACTIONS]
+        if recorded:
+            self._queue.put(("actions", time.monotonic() - self._start,
+                             {"after": after, "actions": recorded}))
+
+    # ---- vlákno záznamu --------------------------------------------------
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self._flush_interval)
+            except queue.Empty:
+                self._file.flush()
+                self._index.flush()
+                continue
+            if item is _STOP:
+                return
+            try:
+                self._write(*item)
+            except Exception:
+                logger.exception("Zápis záznamu %s selhal", self.path)
+
+    def _write(self, kind: str, t: float, payload: Any) -> None:
+        t = round(t, 6)
+        if kind == "keyframe":
+            offset = self._file.tell()
+            self._file.write(_dumps({"t": t, "keyframe": _keyframe(payload)}))
+            self._index.write(json.dumps([t, offset]) + "\n")
+        else:
+            self._file.write(_dumps({"t": t, **payload}))
+
+    def close(self) -> None:
+        """Odhlas se z canvasu, dopiš frontu a zavři soubory. Idempotentní
+        (registrováno i v atexit)."""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self._unsubscribe()
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._file.close()
+        self._index.close()
+
+
+class Replay:
+    """Přehrávač záznamu do `canvas` (typicky servírovaného; bez něj nový).
+    `seek(t)` skočí na čas t přes nejbližší keyframe, `play(speed)`
+    přehrává v časové ose záznamu (blokuje – pro ovládání za běhu pusť
+    ve vlákně; `stop()` i `seek()` z jiného vlákna přehrávání přeruší)."""
+
+    def __init__(self, path: str | os.PathLike,
+                 canvas: Canvas | None = None) -> None:
+        self.path = Path(path)
+        self.canvas = canvas if canvas is not None else Canvas()
+        self._file = open(self.path, "rb")
+        header = json.loads(self._file.readline() or b"null")
+        if not isinstance(header, dict) \
+                or header.get("viewbase_recording") != FORMAT_VERSION:
+            raise ValueError(f"{self.path} není záznam viewbase "
+                             f"(verze {FORMAT_VERSION})")
+        self._body = self._file.tell()
+        self._keyframes = self._read_index()
+        if not self._keyframes:
+            raise ValueError(f"Záznam {self.path} nemá žádný keyframe")
+        self._times = [t for t, _ in self._keyframes]
+        self.duration = self._scan_end()
+        self.position = 0.0
+        self._offset = self._body
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._deferred: list[dict[str, Any]] = []   # akce čekající na patch
+        self.seek(0.0)
+
+    def _read_index(self) -> list[tuple[float, int]]:
+        index = _index_path(self.path)
+        if index.exists():
+            entries = []
+            for line in index.read_text().splitlines():
+                try:
+                    t, offset = json.loads(line)
+                except ValueError:
+                    break                    # useknutý poslední řádek
+                entries.append((t, offset))
+            if entries:
+                return entries
+        logger.info("Záznam %s: index chybí, obnovuji ho", self.path)
+        entries = []
+        self._file.seek(self._body)
+        while True:
+            offset = self._file.tell()
+            line = self._file.readline()
+            if not line.endswith(b"\n"):
+                return entries
+            if line.find(b'"keyframe"', 0, 40) != -1:
+                entries.append((json.loads(line)["t"], offset))
+
+    def _scan_end(self) -> float:
+        """Čas posledního úplného záznamu (čte se jen od posledního keyframu)."""
+        end = self._keyframes[-1][0]
+        self._file.seek(self._keyframes[-1][1])
+        for line in self._file:
+            if not line.endswith(b"\n"):
+                break
+            end = json.loads(line)["t"]
+        return end
+
+    def _records(self):
+        """(offset, záznam) od aktuálního offsetu do konce úplných řádků."""
+        self._file.seek(self._offset)
+        while True:
+            offset = self._file.tell()
+            line = self._file.readline()
+            if not line.endswith(b"\n"):
+                return
+            yield offset, json.loads(line)
+
+    def seek(self, t: float) -> None:
+        """Nastav canvas na stav v čase `t` (ořízne se na 0..duration):
+        nejbližší starší keyframe + patche a stavové akce do `t`. Klienti
+        dostanou rozdíl jako jeden patch."""
+        self._stop.set()
+        with self._lock:
+            self._stop.clear()
+            t = max(0.0, min(float(t), self.duration))
+            i = bisect.bisect_right(self._times, t) - 1
+            self._offset = self._keyframes[max(i, 0)][1]
+            with self.canvas.batch():
+                for offset, record in self._records():
+                    if record["t"] > t:
+                        self._offset = offset
+                        break
+                    self._apply(record, transient=False)
+                else:
+                    self._offset = self._file.tell()
+                self._flush_deferred(None)
+            self.position = t
+
+    def play(self, speed: float = 1.0, *, until: float | None = None) -> None:
+        """Přehrávej od aktuální pozice `speed`-krát rychleji než záznam,
+        do `until` (None = do konce). Blokuje; vrátí se na konci, po stop()
+        nebo při seek() z jiného vlákna."""
+        if speed <= 0:
+            raise ValueError("speed musí být kladné")
+        end = self.duration if until is None else min(until, self.duration)
+        with self._lock:
+            self._stop.clear()
+            start, origin = time.monotonic(), self.position
+            for offset, record in self._records():
+                if record["t"] > end:
+                    self._offset = offset
+                    break
+                delay = (record["t"] - origin) / speed \
+                    - (time.monotonic() - start)
+                if delay > 0 and self._stop.wait(delay):
+                    self._offset = offset
+                    self.position = origin + (time.monotonic() - start) * speed
+                    self._flush_deferred(None)
+                    return
+                self._apply(record, transient=True)
+                self._offset = self._file.tell()
+                self.position = record["t"]
+            self._flush_deferred(None)
+            self.position = max(self.position, end)
+
+    def stop(self) -> None:
+        """Přeruš běžící play() (pozice zůstane, kde přehrávání skončilo)."""
+        self._stop.set()
+
+    def close(self) -> None:
+        self.stop()
+        with self._lock:
+            self._file.close()
+
+    # ---- aplikace záznamů ------------------------------------------------
+
+    def _apply(self, record: dict[str, Any], *, transient: bool) -> None:
+        """Patch vždy; z akcí při převíjení jen stavové (jednorázový tok či
+        focus z minulosti nemá smysl). Keyframe uprostřed přehrávání je
+        redundantní – použije se jen jako výchozí bod seeku."""
+        if "keyframe" in record:
+            self._deferred = []
+            if not transient:
+                _load_keyframe(self.canvas, record["keyframe"])
+        elif "deltas" in record:
+            self.canvas.apply_patch(record["deltas"], record.get("labels"))
+            self._flush_deferred(record["seq"])
+        else:
+            self._deferred.append({**record, "actions": [
+                a for a in record["actions"]
+                if transient or is_state_action(a)]})
+
+    def _flush_deferred(self, seq: int | None) -> None:
+        """Aplikuj odložené akce s `after < seq` (None = všechny)."""
+        ready = [r for r in self._deferred if seq is None or r["after"] < seq]
+        self._deferred = [r for r in self._deferred if r not in ready]
+        for record in ready:
+            for action in record["actions"]:
+                self.canvas.apply_action(action)
@@ -0,0 +1,204 @@
+"""Kompaktní záznamy uzlů a hran v Canvas.
+
+Při milionech entit dominuje RSS režie per-entitního dictu. Záznamy proto
+mají __slots__ (žádný __dict__) a id, typy i meta klíče se internují –
+opakované řetězce (typ "host", klíč "ip") existují v paměti jen jednou.
+Meta zůstává obyčejný dict: hodnoty jsou libovolné a mění se za běhu.
+
+Copy-on-write: každý záznam nese `epoch`, ve které vznikl. Canvas při
+vydání pohledu/snapshotu posune svou epochu; záznam ze starší epochy se
+před mutací naklonuje (i s meta), takže vydané pohledy zůstanou
+konzistentní bez kopírování celého grafu."""
+from __future__ import annotations
+
+import gc
+import logging
+import re
+import sys
+import threading
+import types
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+logger = logging.getLogger("viewbase")
+
+_LABEL_KEY = re.compile(r"\{([^{}]+)\}")
+
+
+def intern(value: Any) -> Any:
+    """sys.intern pro řetězce, ostatní hodnoty (None, čísla) projdou beze změny."""
+    return sys.intern(value) if type(value) is str else value
+
+
+def interned_meta(meta: dict[str, Any]) -> dict[str, Any]:
+    """Kopie meta s internovanými klíči (vstupní dict se nemění)."""
+    _intern = sys.intern                  # horká cesta importů: bez volání intern()
+    return {_intern(k) if type(k) is str else k: v for k, v in meta.items()}
+
+
+# GC je stav celého procesu: pauzy z více vláken (souběžné importy) se
+# počítají a GC se zapne až po poslední z nich.
+_gc_lock = threading.Lock()
+_gc_pauses = 0
+_gc_was_enabled = False
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """Pozastav cyklický GC při hromadné stavbě záznamů. Miliony nových
+    objektů by ho opakovaně spouštěly (desítky % času importu/načtení),
+    přitom záznamy cykly netvoří. Re-entrantní i napříč vlákny: GC se
+    obnoví až po skončení poslední pauzy, a jen byl-li předtím zapnutý."""
+    global _gc_pauses, _gc_was_enabled
+    with _gc_lock:
+        if _gc_pauses == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_pauses -= 1
+            if _gc_pauses == 0 and _gc_was_enabled:
+                gc.enable()
+
+
+def render_label(node: "NodeRecord", canvas_template: str | None) -> str:
+    """Popisek uzlu: per-node šablona > celocanvasová šablona > id uzlu."""
+    template = node.label_template
+    if template is None:                       # bez per-node šablony
+        template = canvas_template             # zkus celocanvasovou
+    if template is None:
+        return node.id
+
+    def substitute(match: re.Match[str]) -> str:
+        key = match.group(1)
+        if key in node.meta:
+            return str(node.meta[key])
+        logger.warning(
+            "Uzel '%s': klíč '%s' z label šablony chybí v metadatech",
+            node.id, key)
+        return ""
+
+    return _LABEL_KEY.sub(substitute, template)
+
+
+class NodeRecord:
+    """Uzel grafu: id, typ, per-node šablona popisku a meta."""
+
+    __slots__ = ("id", "type", "label_template", "meta", "epoch")
+
+    def __init__(self, node_id: str, type: str | None,
+                 label_template: str | None, meta: dict[str, Any],
+                 epoch: int = 0) -> None:
+        self.id = intern(node_id)
+        self.type = intern(type)
+        self.label_template = intern(label_template)
+        self.meta = meta
+        self.epoch = epoch
+
+    def clone(self, epoch: int) -> "NodeRecord":
+        """Soukromá kopie pro mutaci (COW): nový záznam s kopií meta."""
+        return NodeRecord(self.id, self.type, self.label_template,
+                          dict(self.meta), epoch)
+
+
+class EdgeRecord:
+    """Neorientovaná hrana: konce v kanonickém pořadí (source <= target) a meta."""
+
+    __slots__ = ("source", "target", "meta", "epoch")
+
+    def __init__(self, source: str, target: str, meta: dict[str, Any],
+                 epoch: int = 0) -> None:
+        self.source = source
+        self.target = target
+        self.meta = meta
+        self.epoch = epoch
+
+    def clone(self, epoch: int) -> "EdgeRecord":
+        return EdgeRecord(self.source, self.target, dict(self.meta), epoch)
+
+
+class NodeView(Mapping):
+    """Read-only pohled na uzel bez kopírování: mapping s klíči
+    'id', 'type', 'label', 'meta' (meta jako MappingProxy). Popisek se
+    vyrenderuje až při prvním čtení. Záznam je zmražený (COW), pohled proto
+    ukazuje stav z okamžiku vydání i při souběžných mutacích."""
+
+    __slots__ = ("_node", "_template", "_label")
+    _KEYS = ("id", "type", "label", "meta")
+
+    def __init__(self, node: NodeRecord, canvas_template: str | None) -> None:
+        self._node = node
+        self._template = canvas_template
+        self._label: str | None = None
+
+    @property
+    def id(self) -> str:
+        return self._node.id
+
+    @property
+    def type(self) -> str | None:
+        return self._node.type
+
+    @property
+    def label(self) -> str:
+        if self._label is None:
+            self._label = render_label(self._node, self._template)
+        return self._label
+
+    @property
+    def meta(self) -> Mapping[str, Any]:
+        return types.MappingProxyType(self._node.meta)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+    def __repr__(self) -> str:
+        return f"NodeView({self._node.id!r})"
+
+
+class EdgeView(Mapping):
+    """Read-only pohled na hranu: mapping s klíči 'source', 'target', 'meta'."""
+
+    __slots__ = ("_edge",)
+    _KEYS = ("source", "target", "meta")
+
+    def __init__(self, edge: EdgeRecord) -> None:
+        self._edge = edge
+
+    @property
+    def source(self) -> str:
+        return self._edge.source
+
+    @property
+    def target(self) -> str:
+        return self._edge.target
+
+    @property
+    def meta(self) -> Mapping[str, Any]:
+        return types.MappingProxyType(self._edge.meta)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+    def __repr__(self) -> str:
+        return f"EdgeView({self._edge.source!r}, {self._edge.target!r})"
@@ -3,42 +3,101 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import multiprocessing
+import re
 import threading
 import time
 import uuid
 import webbrowser
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, Mapping
 
 import uvicorn
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 
-from . import protocol
+from . import layout, protocol
 from .canvas import Canvas
+from .clientview import Filters, Viewports
+from .layoutcache import LayoutCache
+from .snapshot import CanvasState
 
 logger = logging.getLogger("viewbase")
 
 STATIC_DIR = Path(__file__).parent / "static"
 PATCH_INTERVAL = 1 / 30
+POSITIONS_INTERVAL = 10.0   # jak často vedoucí klient nahrává usazené pozice
+LAYOUT_RATE = 5.0           # rámce pozic/s pro klienty se serverovým layoutem
+VIEWPORT_NODES = 2000       # strop uzlů ve výřezu klienta s viewportem
+CANVAS_NAME = re.compile(r"[A-Za-z0-9_-]{1,64}")   # jméno v /c/<jméno>/
 
 
-async def _broadcast_step(canvas: Canvas, clients: set[WebSocket]) -> None:
+def _encode_init(state: CanvasState, leader: bool = False,
+                 server_layout: bool = False,
+                 client_id: str | None = None) -> str:
+    return protocol.encode(protocol.init_message(
+        **state.as_dict(),
+        upload_positions=POSITIONS_INTERVAL if leader else None,
+        server_layout=server_layout, client_id=client_id))
+
+
+def _apply_positions(canvas: Canvas, data: bytes,
+                     cache: LayoutCache | None = None) -> int:
+    """Binární zprávu vedoucího klienta převeď na Canvas.set_positions;
+    usazené pozice jdou i do cache rozložení (příští otevření téže
+    topologie je převezme)."""
+    ids, coords = protocol.decode_positions(data)
+    taken = canvas.set_positions(
+        dict(zip(ids, zip(coords[0::3], coords[1::3], coords[2::3]))))
+    if cache is not None and taken:
+        cache.store(canvas.state())
+    return taken
+
+
+def _restore_layout(canvas: Canvas, cache: LayoutCache,
+                    tried: dict[str, int | None]) -> None:
+    """Před initem: neumístěné uzly zkus doplnit z cache – jednou na verzi
+    topologie (hash grafu je O(N), nepočítá se při každém připojení)."""
+    state = canvas.state()
+    if (len(state.positions) == len(state)
+            or tried["topology"] == canvas.topology_version):
+        return
+    tried["topology"] = canvas.topology_version
+    cache.restore(canvas)
+
+
+async def _broadcast_step(canvas: Canvas, clients: set[WebSocket],
+                          narrowers: tuple[Viewports | Filters, ...] = ()
+                          ) -> None:
     """Jeden krok vysílání: nejdřív patch (data), pak akce (odkazují na data).
 
     Akce se drainují PŘED deltami: _require_node zaručuje, že uzel akce byl
-    přidán dřív, takže jeho delta je v tomto (nebo dřívějším) patchi."""
+    přidán dřív, takže jeho delta je v tomto (nebo dřívějším) patchi.
+    Klienti registrovaní v `narrowers` (výřez, filtr) dostanou patch
+    zúžený na svůj pohled s vlastní řadou seq."""
     actions = canvas.drain_actions()
     drained = canvas.drain()
-    messages = []
+    patch = None
     if drained is not None:
         seq, deltas = drained
-        messages.append(protocol.encode(protocol.patch_message(seq, deltas)))
-    messages.extend(
-        protocol.encode({"type": "action", **action}) for action in actions)
-    if not messages or not clients:
+        patch = protocol.encode(protocol.patch_message(seq, deltas))
+    tail = [protocol.encode({"type": "action", **action})
+            for action in actions]
+    if (patch is None and not tail) or not clients:
         return
     for ws in list(clients):
+        messages = list(tail)
+        if patch is not None:
+            narrower = next((n for n in narrowers if ws in n), None)
+            if narrower is None:
+                messages.insert(0, patch)
+            else:
+                narrowed = narrower.filter(ws, deltas)
+                if narrowed is not None:
+                    messages.insert(0, protocol.encode(narrowed))
         try:
             for raw in messages:
                 await ws.send_text(raw)
@@ -46,33 +105,180 @@ async def _broadcast_step(canvas: Canvas, clients: set[WebSocket]) -> None:
             clients.discard(ws)
 
 
-async def _broadcast_loop(canvas: Canvas, clients: set[WebSocket],
-                          state_lock: asyncio.Lock) -> None:
+def _quiet(canvas: Canvas) -> bool:
+    """Nic k vysílání? Čte se bez zámku – zápis souběžný s kontrolou
+    zachytí příští tik. Nečinný canvas tak sdílenou smyčku stojí jen ji."""
+    return not canvas._actions and not any(canvas._pending.values())
+
+
+async def _broadcast_loop(hubs: Callable[[], Iterable[_Hub]]) -> None:
+    """Sdílený plánovač vysílání všech canvasů procesu (jeden tik na
+    PATCH_INTERVAL); drénuje i canvasy bez klientů kvůli odběratelům
+    (žurnál, záznam)."""
     while True:
         await asyncio.sleep(PATCH_INTERVAL)
+        for hub in list(hubs()):
+            if _quiet(hub.canvas):
+                continue
+            try:
+                async with hub.state_lock:
+                    await _broadcast_step(hub.canvas, hub.clients,
+                                          (hub.views, hub.filters))
+            except Exception:
+                logger.exception("Chyba ve vysílací smyčce")
+
+
+async def _send_positions(canvas: Canvas,
+                          streams: dict[WebSocket, layout.PositionStream]
+                          ) -> None:
+    """Každému klientovi se serverovým layoutem kvantovaný rámec ze všech
+    umístěných uzlů (pořadí dictu se mění jen přidáním/odebráním uzlu)."""
+    positions = canvas.state().positions
+    ids = list(positions)
+    coords = list(positions.values())
+    for ws, stream in list(streams.items()):
+        frame = stream.encode(ids, coords)
+        if frame is None:
+            continue
         try:
-            async with state_lock:
-                await _broadcast_step(canvas, clients)
+            await ws.send_bytes(frame)
         except Exception:
-            logger.exception("Chyba ve vysílací smyčce")
+            streams.pop(ws, None)
 
 
-def create_app(canvas: Canvas) -> FastAPI:
-    clients: set[WebSocket] = set()
-    state_lock = asyncio.Lock()
+async def _layout_loop(hubs: Callable[[], Iterable[_Hub]],
+                       rate: float) -> None:
+    """Serverový layout běží jen pro canvasy, k nimž je připojen klient,
+    který o něj požádal; jediný proces executoru (sdílený všemi canvasy,
+    kola jdou po sobě) vzniká až s prvním takovým klientem."""
+    executor: ProcessPoolExecutor | None = None
+    try:
+        while True:
+            await asyncio.sleep(1 / rate)
+            active = [hub for hub in list(hubs()) if hub.streams]
+            if not active:
+                continue
+            if executor is None:
+                # spawn: fork procesu s vlákny uvicornu/canvasu není bezpečný
+                executor = ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=multiprocessing.get_context("spawn"))
+            for hub in active:
+                if hub.runner is None:
+                    hub.runner = layout.ServerLayout()
+                try:
+                    # Kolo běží v procesu executoru mimo state_lock – patche
+                    # mezitím tečou dál; výsledek jde do canvasu
+                    # (set_positions), takže ho nesou i inity ostatních.
+                    job = hub.runner.round(hub.canvas, executor)
+                    if job is not None:
+                        positions = await asyncio.wrap_future(job)
+                        await asyncio.to_thread(
+                            hub.canvas.set_positions, positions)
+                    async with hub.state_lock:  # rámce nesouběžně s patchi
+                        await _send_positions(hub.canvas, hub.streams)
+                except Exception:
+                    logger.exception("Chyba serverového layoutu")
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
 
-    @asynccontextmanager
-    async def lifespan(app: FastAPI):
-        task = asyncio.create_task(_broadcast_loop(canvas, clients, state_lock))
-        stop_tasks = canvas.start_periodic_tasks()   # every() úlohy
-        yield
-        stop_tasks.set()
-        task.cancel()
 
-    app = FastAPI(lifespan=lifespan)
+async def _move_view(ws: WebSocket, views: Viewports, payload: dict,
+                     state_lock: asyncio.Lock, client_id: str) -> None:
+    """view_change klienta s výřezem: pošli mu vstupující/odcházející uzly.
+    Pod state_lock – seq výřezu nesmí předběhnout zúžený patch."""
+    async with state_lock:
+        try:
+            patch = views.move(ws, payload)
+        except ValueError as exc:
+            logger.warning("Vadný view_change od klienta %s: %s",
+                           client_id, exc)
+            return
+        if patch is not None:
+            await ws.send_text(protocol.encode(patch))
+
+
+async def _promote_leader(leader: dict[str, WebSocket | None],
+                          clients: set[WebSocket]) -> None:
+    """Vedoucí se odpojil: roli dostane první klient, který ji přijme
+    (`clients` = jen klienti s vlastní fyzikou)."""
+    leader["ws"] = None
+    message = protocol.encode(protocol.leader_message(POSITIONS_INTERVAL))
+    for ws in list(clients):
+        try:
+            await ws.send_text(message)
+        except Exception:
+            clients.discard(ws)
+            continue
+        leader["ws"] = ws
+        return
 
-    @app.websocket("/ws")
-    async def ws_endpoint(ws: WebSocket) -> None:
+
+class _Hub:
+    """Připojení jednoho canvasu: klienti, vedoucí, výřezy, filtry.
+    Vysílání a serverový layout obstarávají sdílené smyčky aplikace."""
+
+    def __init__(self, canvas: Canvas, *, layout_cache: LayoutCache | None,
+                 viewport_nodes: int) -> None:
+        self.canvas = canvas
+        self.layout_cache = layout_cache
+        self.clients: set[WebSocket] = set()
+        self.state_lock = asyncio.Lock()
+        # Vedoucí klient nahrává své usazené pozice do canvasu
+        # (set_positions), další inity je nesou – nové záložky a reconnecty
+        # přeskočí zahřívání. Jeden najednou; po jeho odpojení převezme
+        # roli jiný připojený klient.
+        self.leader: dict[str, WebSocket | None] = {"ws": None}
+        # Klienti se serverovým layoutem: vlastní fyziku nespouští, pozice
+        # jim posílá _layout_loop (delta-kvantované Int16, stav na klienta).
+        self.streams: dict[WebSocket, layout.PositionStream] = {}
+        self.runner: layout.ServerLayout | None = None
+        self.cache_tried: dict[str, int | None] = {"topology": None}
+        # Klienti s výřezem: init jen z okolí kamery, patche zúžené na
+        # výřez, view_change posílá vstupující/odcházející uzly. Nevedou
+        # (nemají celý graf) a serverový layout pro ně neplatí.
+        self.views = Viewports(canvas, max_nodes=viewport_nodes)
+        # Klienti s filtrem (set_filter / POST api/filter): jen vyhovující
+        # uzly, patche přeložené inkrementálně. Také nevedou – jejich
+        # fyzika nevidí celý graf a usazené pozice by rozložení ostatních
+        # pokřivily.
+        self.filters = Filters(canvas)
+        self.sockets: dict[str, WebSocket] = {}   # client_id -> ws (REST)
+
+    def can_lead(self, ws: WebSocket) -> bool:
+        return (ws not in self.streams and ws not in self.views
+                and ws not in self.filters)
+
+    async def apply_filter(self, ws: WebSocket, client_id: str, spec) -> None:
+        """Nastav (spec) nebo zruš (None/{}) filtr klienta a pošli mu nový
+        init. ValueError při vadném filtru nebo klientovi s výřezem či
+        serverovým layoutem (jeho rámce nesou pozice celého grafu)."""
+        if ws in self.views or ws in self.streams:
+            raise ValueError("klient s výřezem nebo serverovým layoutem"
+                             " filtr nepodporuje")
+        leader = self.leader
+        async with self.state_lock:
+            if spec:
+                init = await asyncio.to_thread(self.filters.set, ws, spec)
+                raw = protocol.encode(protocol.init_message(
+                    **init, client_id=client_id))
+            else:
+                self.filters.disconnect(ws)
+                is_leader = leader["ws"] is None
+                raw = await asyncio.to_thread(
+                    _encode_init, self.canvas.state(), is_leader, False,
+                    client_id)
+                if is_leader:
+                    leader["ws"] = ws
+            await ws.send_text(raw)
+            if leader["ws"] is ws and ws in self.filters:
+                await _promote_leader(
+                    leader, {c for c in self.clients if self.can_lead(c)})
+
+    async def serve_client(self, ws: WebSocket) -> None:
+        """Celý život WebSocket klienta: hello, init, příjem zpráv."""
+        canvas, leader = self.canvas, self.leader
         await ws.accept()
         client_id = uuid.uuid4().hex[:8]
         try:
@@ -92,17 +298,55 @@ def create_app(canvas: Canvas) -> FastAPI:
             # Sdílený zámek: snapshot + zařazení mezi klienty je atomické vůči
             # broadcast kroku. Pending delty se NEzahazují – příští broadcast
             # je pošle všem (novému klientovi jako idempotentní upsert), takže
-            # seq navazuje pro staré i nové klienty.
-            async with state_lock:
-                snap = canvas.snapshot()
-                await ws.send_text(protocol.encode(
-                    protocol.init_message(**snap)))
-                clients.add(ws)
+            # seq navazuje pro staré i nové klienty. Canvas zámek drží jen
+            # O(1) state(); serializace grafu běží ve vlákně mimo event loop
+            # a producenti mezitím dál mutují (copy-on-write).
+            # Serverový layout jen s numpy; jinak klient spustí vlastní fyziku.
+            viewport = hello.get("viewport") is True
+            server_layout = (hello.get("layout") == "server"
+                             and layout.np is not None and not viewport)
+            if self.layout_cache is not None:
+                await asyncio.to_thread(_restore_layout, canvas,
+                                        self.layout_cache, self.cache_tried)
+            async with self.state_lock:
+                if viewport:
+                    init = await asyncio.to_thread(self.views.connect, ws)
+                    raw = protocol.encode(protocol.init_message(
+                        **init, client_id=client_id))
+                    is_leader = False
+                else:
+                    state = canvas.state()
+                    is_leader = (leader["ws"] is None
+                                 and not server_layout)
+                    raw = await asyncio.to_thread(
+                        _encode_init, state, is_leader, server_layout,
+                        client_id)
+                await ws.send_text(raw)
+                self.clients.add(ws)
+                self.sockets[client_id] = ws
+                if is_leader:
+                    leader["ws"] = ws
+                if server_layout:
+                    self.streams[ws] = layout.PositionStream()
         except WebSocketDisconnect:
             return
         try:
             while True:
-                raw = await ws.receive_text()
+                message = await ws.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    if ws is not leader["ws"]:
+                        continue            # pozice bere jen od vedoucího
+                    try:
+                        await asyncio.to_thread(
+                            _apply_positions, canvas, message["bytes"],
+                            self.layout_cache)
+                    except ValueError as exc:
+                        logger.warning("Vadné pozice od klienta %s: %s",
+                                       client_id, exc)
+                    continue
+                raw = message.get("text") or ""
                 try:
                     msg = protocol.decode(raw)
                 except ValueError:
@@ -113,6 +357,16 @@ def create_app(canvas: Canvas) -> FastAPI:
                     payload = msg.get("payload")
                     if not isinstance(payload, dict):
                         payload = {}
+                    if msg["event"] == "view_change" and ws in self.views:
+                        await _move_view(ws, self.views, payload,
+                                         self.state_lock, client_id)
+                    elif msg["event"] == "set_filter":
+                        try:
+                            await self.apply_filter(
+                                ws, client_id, payload.get("filter"))
+                        except ValueError as exc:
+                            logger.warning("Vadný filtr od klienta %s: %s",
+                                           client_id, exc)
                     canvas.dispatch_event(
                         msg["event"], {**payload, "client_id": client_id})
                 else:
@@ -121,10 +375,17 @@ def create_app(canvas: Canvas) -> FastAPI:
         except WebSocketDisconnect:
             pass
         finally:
-            clients.discard(ws)
+            self.clients.discard(ws)
+            self.streams.pop(ws, None)
+            self.sockets.pop(client_id, None)
+            if leader["ws"] is ws:
+                async with self.state_lock:  # nesouběžně s broadcastem
+                    await _promote_leader(leader, {
+                        c for c in self.clients if self.can_lead(c)})
+            self.views.disconnect(ws)
+            self.filters.disconnect(ws)
 
-    @app.post("/api/event")
-    def inject_event(message: dict) -> dict:
+    def inject_event(self, message: dict) -> dict:
         """REST vstřik události — totéž, co by poslal prohlížeč přes WS.
 
         `{"event": "terminal_input", "payload": {"window_id": "konzole",
@@ -132,22 +393,170 @@ def create_app(canvas: Canvas) -> FastAPI:
         z prohlížeče: handler (on_input) se zavolá a jeho výstup + mutace
         canvasu se rozešlou VŠEM připojeným klientům. Určeno pro demo/testy
         řízené zvenčí (curl) — konverzaci tak lze přehrát do otevřených oken.
-        Sync endpoint (threadpool): blokující handler nezmrazí WS broadcast.
+        Běží ve vlákně (threadpool): blokující handler nezmrazí broadcast.
         """
         event = message.get("event")
         payload = message.get("payload") or {}
         if not isinstance(event, str) or not isinstance(payload, dict):
             return {"ok": False, "error": "čekám {event: str, payload: dict}"}
-        canvas.dispatch_event(event, {**payload, "client_id": "rest"})
+        self.canvas.dispatch_event(event, {**payload, "client_id": "rest"})
+        return {"ok": True}
+
+    async def set_filter(self, message: dict) -> dict:
+        """Filtr klienta zvenčí: `{"client_id": "…", "filter": {"type":
+        "router"}}` (client_id nese init zpráva, `filter: null` filtr
+        zruší). Klient dostane nový init se zúženým grafem a dál jen
+        přeložené patche – viz clientview.compile_filter."""
+        client_id = message.get("client_id")
+        ws = (self.sockets.get(client_id) if isinstance(client_id, str)
+              else None)
+        if ws is None:
+            return {"ok": False, "error": "neznámý klient"}
+        try:
+            await self.apply_filter(ws, client_id, message.get("filter"))
+        except ValueError as exc:
+            return {"ok": False, "error": str(exc)}
         return {"ok": True}
 
+
+def create_app(canvas: Canvas | None = None, *,
+               canvases: Mapping[str, Canvas]
+               | Callable[[str], Canvas | None] | None = None,
+               layout_rate: float = LAYOUT_RATE,
+               layout_cache: LayoutCache | None = None,
+               viewport_nodes: int = VIEWPORT_NODES) -> FastAPI:
+    """Aplikace pro jeden canvas (`canvas`: stránka `/`, `/ws`,
+    `/api/event`, `/api/filter`) a/nebo mnoho canvasů pod `/c/<jméno>/`
+    (`canvases`: slovník jméno → Canvas, nebo továrna volaná líně při
+    prvním přístupu k jménu – None = takový canvas není). Všechny canvasy
+    sdílí event loop a smyčky vysílání i layoutu, každý má vlastní
+    klienty; canvas bez změn stojí jen levnou kontrolu za tik. Canvasy
+    z továrny patří aplikaci – při ukončení je zavře.
+
+    `layout_rate` = rámce pozic za sekundu pro klienty, kteří v hello
+    požádali o serverový layout (`"layout": "server"`, slabá zařízení).
+    `layout_cache` = diskový cache rozložení: inity doplní pozice uložené
+    pro shodnou/podobnou topologii, usazené pozice vedoucího se do něj
+    ukládají. `viewport_nodes` = strop uzlů pro klienty, kteří v hello
+    žádají jen výřez u své kamery (`"viewport": true`, viz clientview)."""
+    if canvas is None and canvases is None:
+        raise ValueError("create_app potřebuje canvas nebo canvases")
+    if layout_rate <= 0:
+        raise ValueError("layout_rate musí být kladné")
+
+    def new_hub(c: Canvas) -> _Hub:
+        return _Hub(c, layout_cache=layout_cache,
+                    viewport_nodes=viewport_nodes)
+
+    root = new_hub(canvas) if canvas is not None else None
+    named: dict[str, _Hub] = {}
+    factory = canvases if callable(canvases) else None
+    if canvases is not None and factory is None:
+        for name, c in canvases.items():
+            if not CANVAS_NAME.fullmatch(name):
+                raise ValueError(f"Neplatné jméno canvasu {name!r}")
+            named[name] = new_hub(c)
+    owned: list[Canvas] = []                # z továrny – zavře je aplikace
+    stops: list[threading.Event] = []       # every() úlohy všech canvasů
+    creating = asyncio.Lock()
+
+    def hubs() -> Iterator[_Hub]:
+        if root is not None:
+            yield root
+        yield from named.values()
+
+    async def hub_for(name: str) -> _Hub | None:
+        hub = named.get(name)
+        if hub is not None or factory is None:
+            return hub
+        if not CANVAS_NAME.fullmatch(name):
+            return None
+        async with creating:                # dva první klienti = jeden canvas
+            if name not in named:
+                created = await asyncio.to_thread(factory, name)
+                if created is None:
+                    return None
+                owned.append(created)
+                named[name] = new_hub(created)
+                stops.append(created.start_periodic_tasks())
+            return named[name]
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        tasks = [
+            asyncio.create_task(_broadcast_loop(hubs)),
+            asyncio.create_task(_layout_loop(hubs, layout_rate)),
+        ]
+        stops.extend(hub.canvas.start_periodic_tasks() for hub in hubs())
+        yield
+        for stop in stops:
+            stop.set()
+        for task in tasks:
+            task.cancel()
+        for c in owned:
+            c.close()
+
+    app = FastAPI(lifespan=lifespan)
+
+    if root is not None:
+        @app.websocket("/ws")
+        async def ws_endpoint(ws: WebSocket) -> None:
+            await root.serve_client(ws)
+
+        @app.post("/api/event")
+        def inject_event(message: dict) -> dict:
+            """REST vstřik události – viz _Hub.inject_event."""
+            return root.inject_event(message)
+
+        @app.post("/api/filter")
+        async def set_filter(message: dict) -> dict:
+            """Filtr klienta zvenčí – viz _Hub.set_filter."""
+            return await root.set_filter(message)
+
+    if canvases is not None:
+        @app.websocket("/c/{name}/ws")
+        async def named_ws_endpoint(ws: WebSocket, name: str) -> None:
+            hub = await hub_for(name)
+            if hub is None:
+                await ws.close(code=4404)   # neznámý canvas
+                return
+            await hub.serve_client(ws)
+
+        @app.post("/c/{name}/api/event")
+        async def named_inject_event(name: str, message: dict) -> dict:
+            hub = await hub_for(name)
+            if hub is None:
+                return {"ok": False, "error": "neznámý canvas"}
+            return await asyncio.to_thread(hub.inject_event, message)
+
+        @app.post("/c/{name}/api/filter")
+        async def named_set_filter(name: str, message: dict) -> dict:
+            hub = await hub_for(name)
+            if hub is None:
+                return {"ok": False, "error": "neznámý canvas"}
+            return await hub.set_filter(message)
+
+        @app.get("/c/{name}")
+        async def named_redirect(name: str) -> RedirectResponse:
+            # frontend odvozuje adresu ws z cesty stránky – chce lomítko
+            return RedirectResponse(f"/c/{name}/")
+
+        @app.get("/c/{name}/")
+        async def named_page(name: str) -> FileResponse:
+            index = STATIC_DIR / "index.html"
+            if await hub_for(name) is None or not index.is_file():
+                raise HTTPException(status_code=404)
+            return FileResponse(index)
+
     @app.middleware("http")
     async def _no_html_cache(request, call_next):
         """index.html se nikdy necachuje — odkazuje na hashované bundly;
         zastaralé HTML by po deployi drželo starý frontend (a např.
         perzistence pozic by „nefungovala")."""
         response = await call_next(request)
-        if request.url.path in ("/", "/index.html"):
+        path = request.url.path
+        if path in ("/", "/index.html") or (path.startswith("/c/")
+                                            and path.endswith("/")):
             response.headers["Cache-Control"] = "no-cache"
         return response
 
@@ -163,10 +572,10 @@ class ServerHandle:
     zastaví."""
 
     def __init__(self, server: uvicorn.Server, thread: threading.Thread,
-                 canvas: Canvas):
+                 canvases: list[Canvas]):
         self._server = server
         self._thread = thread
-        self._canvas = canvas
+        self._canvases = canvases
 
     @property
     def port(self) -> int:
@@ -174,10 +583,11 @@ class ServerHandle:
         return self._server.servers[0].sockets[0].getsockname()[1]
 
     def stop(self, timeout: float = 5.0) -> None:
-        """Zastav server (graceful), počkej na doběh vlákna, zavři canvas."""
+        """Zastav server (graceful), počkej na doběh vlákna, zavři canvasy."""
         self._server.should_exit = True
         self._thread.join(timeout)
-        self._canvas.close()
+        for canvas in self._canvases:
+            canvas.close()
 
     def __enter__(self) -> "ServerHandle":
         return self
@@ -186,25 +596,52 @@ class ServerHandle:
         self.stop()
 
 
-def _make_server(canvas: Canvas, host: str, port: int) -> uvicorn.Server:
+def _make_server(canvas: Canvas | None, host: str, port: int,
+                 layout_rate: float = LAYOUT_RATE,
+                 layout_cache: LayoutCache | None = None,
+                 viewport_nodes: int = VIEWPORT_NODES,
+                 canvases: Mapping[str, Canvas]
+                 | Callable[[str], Canvas | None] | None = None
+                 ) -> uvicorn.Server:
     # ws_ping_interval=None vypíná serverový keepalive ping knihovny
     # websockets: jeho samostatná úloha jinak souběžně "draina" stejné
     # spojení jako náš broadcast a při velkém provozu spadne na interním
     # assertu. Mrtvá spojení odhalí selhání dalšího patche (klient se
     # reconnectne), keepalive proto nepotřebujeme.
-    config = uvicorn.Config(create_app(canvas), host=host, port=port,
+    app = create_app(canvas, canvases=canvases, layout_rate=layout_rate,
+                     layout_cache=layout_cache, viewport_nodes=viewport_nodes)
+    config = uvicorn.Config(app, host=host, port=port,
                             log_level="warning",
                             ws_ping_interval=None, ws_ping_timeout=None)
     return uvicorn.Server(config)
 
 
-def serve(canvas: Canvas, *, host: str = "127.0.0.1", port: int = 8080,
-          open_browser: bool = False, block: bool = True) -> ServerHandle | None:
+def serve(canvas: Canvas | None = None, *,
+          canvases: Mapping[str, Canvas]
+          | Callable[[str], Canvas | None] | None = None,
+          host: str = "127.0.0.1", port: int = 8080,
+          open_browser: bool = False, block: bool = True,
+          layout_rate: float = LAYOUT_RATE,
+          layout_cache: LayoutCache | None = None,
+          viewport_nodes: int = VIEWPORT_NODES) -> ServerHandle | None:
     """Spustí server. `block=True` (default) blokuje do Ctrl-C; mutace
     canvasu pak dělej z every() úloh nebo event handlerů. `block=False`
     server spustí v daemon vlákně a vrátí ServerHandle (REPL/Jupyter):
-    prompt zůstane volný, `handle.stop()` server ukončí."""
-    server = _make_server(canvas, host, port)
+    prompt zůstane volný, `handle.stop()` server ukončí. `layout_rate` =
+    rámce pozic/s pro klienty se serverovým layoutem, `layout_cache` =
+    diskový cache rozložení, `viewport_nodes` = strop výřezu, `canvases` =
+    další canvasy pod /c/<jméno>/ (viz create_app). Zavírá `canvas`
+    i canvasy ze slovníku `canvases`; ty z továrny zavře aplikace."""
+    server = _make_server(canvas, host, port, layout_rate, layout_cache,
+                          viewport_nodes, canvases)
+    owned = [canvas] if canvas is not None else []
+    if canvases is not None and not callable(canvases):
+        owned.extend(canvases.values())
+
+    def close_all() -> None:
+        for c in owned:
+            c.close()
+
     if open_browser:
         threading.Timer(
             0.7, webbrowser.open, args=(f"http://{host}:{port}/",)).start()
@@ -212,7 +649,7 @@ def serve(canvas: Canvas, *, host: str = "127.0.0.1", port: int = 8080,
         try:
             server.run()
         finally:
-            canvas.close()   # i po KeyboardInterrupt – nenechat viset vlákna
+            close_all()   # i po KeyboardInterrupt – nenechat viset vlákna
         return None
     thread = threading.Thread(target=server.run, name="viewbase-server",
                               daemon=True)
@@ -220,13 +657,13 @@ def serve(canvas: Canvas, *, host: str = "127.0.0.1", port: int = 8080,
     deadline = time.monotonic() + 5.0
     while not server.started:          # čekej na bind (nebo pád)
         if not thread.is_alive():
-            canvas.close()
+            close_all()
             raise RuntimeError(
                 "viewbase server se nepodařilo spustit – viz log výše"
                 f" (host={host}, port={port})")
         if time.monotonic() > deadline:
             server.should_exit = True
-            canvas.close()
+            close_all()
             raise TimeoutError("viewbase server nenastartoval do 5 s")
         time.sleep(0.01)
-    return ServerHandle(server, thread, canvas)
+    return ServerHandle(server, thread, owned)
@@ -0,0 +1,105 @@
+"""CanvasState – O(1) handle zmraženého stavu canvasu.
+
+Canvas.state() pod zámkem jen zmrazí kontejnery uzlů a hran (copy-on-write,
+viz records.py) a zkopíruje drobné části stavu (config, typy, toky, okna).
+Serializace celého grafu (as_dict, init zpráva) pak běží mimo zámek,
+zatímco producenti dál mutují – ti si zmražené kontejnery/záznamy před
+zápisem naklonují."""
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from .records import EdgeRecord, NodeRecord, render_label
+
+
+class CanvasState:
+    """Neměnná verze stavu canvasu k určitému `seq`."""
+
+    __slots__ = ("seq", "config", "node_types", "flow_types", "flows",
+                 "paths", "positions", "windows", "_nodes", "_edges", "_label_template")
+
+    def __init__(self, *, seq: int, config: dict[str, Any],
+                 node_types: dict[str, dict[str, Any]],
+                 flow_types: dict[str, dict[str, Any]],
+                 flows: list[dict[str, Any]], paths: dict[str, list[str]],
+                 positions: dict[str, tuple[float, float, float]],
+                 windows: list[dict[str, Any]],
+                 nodes: dict[str, NodeRecord],
+                 edges: dict[tuple[str, str], EdgeRecord],
+                 label_template: str | None) -> None:
+        self.seq = seq
+        self.config = config
+        self.node_types = node_types
+        self.flow_types = flow_types
+        self.flows = flows
+        self.paths = paths
+        self.positions = positions      # zmražený slovník (nemutovat)
+        self.windows = windows
+        self._nodes = nodes
+        self._edges = edges
+        self._label_template = label_template
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    @property
+    def label_template(self) -> str | None:
+        """Celocanvasová šablona popisku platná pro tuto verzi."""
+        return self._label_template
+
+    def node_records(self) -> Iterable[NodeRecord]:
+        """Zmražené záznamy uzlů (nemutovat – sdílí je živý canvas)."""
+        return self._nodes.values()
+
+    def edge_records(self) -> Iterable[EdgeRecord]:
+        """Zmražené záznamy hran (nemutovat – sdílí je živý canvas)."""
+        return self._edges.values()
+
+    def nodes(self) -> list[dict[str, Any]]:
+        """Veřejné kopie uzlů {'id','type','label','meta'}; pořadí přidání."""
+        template = self._label_template
+        return [{"id": n.id, "type": n.type,
+                 "label": render_label(n, template), "meta": dict(n.meta)}
+                for n in self._nodes.values()]
+
+    def edges(self) -> list[dict[str, Any]]:
+        """Veřejné kopie hran {'source','target','meta'}; pořadí přidání."""
+        return [{"source": e.source, "target": e.target, "meta": dict(e.meta)}
+                for e in self._edges.values()]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Úplný stav ve tvaru pro init zprávu (protocol.init_message)."""
+        return {
+            "seq": self.seq,
+            "config": self.config,
+            "node_types": self.node_types,
+            "nodes": self.nodes(),
+            "edges": self.edges(),
+            "flow_types": self.flow_types,
+            "flows": self.flows,
+            "paths": self.paths,
+            "positions": self.positions,
+            "windows": self.windows,
+        }
+
+    def subgraph_dict(self, ids: set[str]) -> dict[str, Any]:
+        """Jako as_dict, ale jen uzly `ids` a hrany mezi nimi (init klienta
+        s výřezem, viz clientview). Neznámá id se přeskočí."""
+        template = self._label_template
+        return {
+            "seq": self.seq,
+            "config": self.config,
+            "node_types": self.node_types,
+            "nodes": [{"id": n.id, "type": n.type,
+                       "label": render_label(n, template), "meta": dict(n.meta)}
+                      for n in (self._nodes[i] for i in ids if i in self._nodes)],
+            "edges": [{"source": e.source, "target": e.target,
+                       "meta": dict(e.meta)} for e in self._edges.values()
+                      if e.source in ids and e.target in ids],
+            "flow_types": self.flow_types,
+            "flows": self.flows,
+            "paths": self.paths,
+            "positions": {i: self.positions[i] for i in ids
+                          if i in self.positions},
+            "windows": self.windows,
+        }